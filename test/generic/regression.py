@@ -0,0 +1,267 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+
+from tf.fabric import Fabric
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'profiling'))
+
+from helpers import (  # noqa: E402
+    makeCorpus, saveCorpus, saveWords, saveLinks, quiet,
+    orderOld, rankOld, levUpOld, levDownOld, boundaryOld, uOld, dOld,
+)
+
+# Checks the precomputed data, the accessors and search against the way
+# Text-Fabric computed them before, on the synthetic corpus of the benchmarks.
+# That corpus has nested, overlapping, coinciding and gapped nodes.
+#
+# Every check is done on three loads of the corpus:
+#
+# *   compiled: the first load, which precomputes the data;
+# *   parallel: the first load of a copy, which precomputes the data in workers;
+# *   cached:   a load of the saved, memory mapped data.
+
+MAX_SLOT = 3000
+
+(otype, oslots) = makeCorpus(MAX_SLOT)
+(types, maxSlot, maxNode, slotType) = otype
+FEATURES = 'lex freq link verse'
+
+tmpDir = None
+apis = {}
+
+
+def setUpModule():
+  global tmpDir
+
+  tmpDir = tempfile.mkdtemp()
+  for copy in ('a', 'b'):
+    location = f'{tmpDir}/{copy}'
+    saveCorpus(location, otype, oslots)
+    saveWords(location, maxSlot)
+    saveLinks(location, otype)
+
+  for (kind, copy, workers) in (
+      ('compiled', 'a', None),
+      ('parallel', 'b', 2),
+      ('cached', 'a', None),
+  ):
+    TF = Fabric(locations=f'{tmpDir}/{copy}', silent='deep')
+    apis[kind] = TF.load(FEATURES, silent='deep', workers=workers)
+
+
+def tearDownModule():
+  shutil.rmtree(tmpDir, ignore_errors=True)
+
+
+# THE PREVIOUS PRECOMPUTED DATA
+
+levelData = None
+orderData = None
+rankData = None
+levUpData = None
+levDownData = None
+boundaryData = None
+
+
+def precomputeOld(api):
+  global levelData, orderData, rankData, levUpData, levDownData, boundaryData
+
+  if orderData is None:
+    levelData = api.C.levels.data
+    orderData = orderOld(quiet, quiet, otype, oslots, levelData)
+    rankData = rankOld(quiet, quiet, otype, orderData)
+    levUpData = levUpOld(quiet, quiet, otype, oslots, rankData)
+    levDownData = levDownOld(quiet, quiet, otype, levUpData, rankData)
+    boundaryData = boundaryOld(quiet, quiet, otype, oslots, rankData)
+
+
+def lists(data):
+  return [list(x) for x in data]
+
+
+# BRUTE FORCE SEARCH
+
+def searchOld(api, query):
+  F = api.F
+  E = api.E
+  words = F.otype.s('word')
+  phrases = F.otype.s('phrase')
+  clauses = F.otype.s('clause')
+
+  if query == 'word lex=v1':
+    return {(w,) for w in words if F.lex.v(w) == 'v1'}
+  if query == 'word lex~^v1[0-9]$':
+    return {(w,) for w in words if F.lex.v(w) in {f'v1{i}' for i in range(10)}}
+  if query == 'word freq>990':
+    return {(w,) for w in words if F.freq.v(w) > 990}
+  if query == 'phrase\n  word lex=v1|v2':
+    return {
+        (p, w) for p in phrases for w in E.oslots.s(p)
+        if F.lex.v(w) in {'v1', 'v2'}
+    }
+  if query == 'phrase\n-link> word lex=v2':
+    return {(p, w) for p in phrases for w in E.link.f(p) if F.lex.v(w) == 'v2'}
+  if query == 'clause\n== phrase':
+    slotsOf = {}
+    for p in phrases:
+      slotsOf.setdefault(frozenset(E.oslots.s(p)), []).append(p)
+    return {
+        (c, p) for c in clauses
+        for p in slotsOf.get(frozenset(E.oslots.s(c)), [])
+    }
+  if query == 'phrase\n<: phrase':
+    startsAt = {}
+    for p in phrases:
+      startsAt.setdefault(E.oslots.s(p)[0], []).append(p)
+    return {
+        (p, q) for p in phrases
+        for q in startsAt.get(E.oslots.s(p)[-1] + 1, [])
+    }
+  if query == 'verse freq\n  phrase\n    word freq<3':
+    return set()
+  return None
+
+
+QUERIES = (
+    'word lex=v1',
+    'word lex~^v1[0-9]$',
+    'word freq>990',
+    'phrase\n  word lex=v1|v2',
+    'phrase\n-link> word lex=v2',
+    'clause\n== phrase',
+    'phrase\n<: phrase',
+    'verse freq\n  phrase\n    word freq<3',
+)
+
+
+# THE TESTS
+
+class regression(unittest.TestCase):
+  longMessage = False
+
+  def test_corpus(self):
+    gapped = [
+        slots for slots in oslots[0]
+        if slots[-1] - slots[0] + 1 != len(slots)
+    ]
+    self.assertTrue(len(gapped) > 10)
+
+  def test_order(self):
+    for (kind, api) in apis.items():
+      precomputeOld(api)
+      with self.subTest(msg=kind):
+        self.assertEqual(list(api.C.order.data), list(orderData))
+        self.assertEqual(list(api.C.rank.data), list(rankData))
+
+  def test_levUp(self):
+    for (kind, api) in apis.items():
+      precomputeOld(api)
+      with self.subTest(msg=kind):
+        self.assertEqual(lists(api.C.levUp.data), lists(levUpData))
+
+  def test_levDown(self):
+    for (kind, api) in apis.items():
+      precomputeOld(api)
+      with self.subTest(msg=kind):
+        self.assertEqual(lists(api.C.levDown.data), lists(levDownData))
+
+  def test_boundary(self):
+    for (kind, api) in apis.items():
+      precomputeOld(api)
+      (first, last) = api.C.boundary.data
+      with self.subTest(msg=kind):
+        self.assertEqual(lists(first), lists(boundaryData[0]))
+        self.assertEqual(lists(last), lists(boundaryData[1]))
+
+  def test_oslots(self):
+    for (kind, api) in apis.items():
+      Eoslots = api.E.oslots
+      with self.subTest(msg=kind):
+        self.assertEqual(
+            [list(Eoslots.s(n)) for n in range(maxSlot + 1, maxNode + 1)],
+            lists(oslots[0]),
+        )
+        n = maxSlot + 1
+        self.assertEqual(
+            list(Eoslots.s(n) + Eoslots.s(n + 1)),
+            list(oslots[0][0]) + list(oslots[0][1]),
+        )
+
+  def test_csr(self):
+    for (kind, api) in apis.items():
+      precomputeOld(api)
+      with self.subTest(msg=kind):
+        for (matrix, data, first) in (
+            (api.C.levUp.toCSR(), levUpData, 1),
+            (api.E.oslots.toCSR(), oslots[0], maxSlot + 1),
+        ):
+          matrix.sort_indices()
+          self.assertEqual(
+              [list(matrix[n].indices) for n in range(first, maxNode + 1)],
+              [sorted(x) for x in data],
+          )
+
+  def test_locality(self):
+    for (kind, api) in apis.items():
+      L = api.L
+      for tp in api.F.otype.all:
+        with self.subTest(msg=f'{kind} {tp}'):
+          for n in range(1, maxNode + 1):
+            self.assertEqual(L.u(n, otype=tp), uOld(api, n, tp))
+            self.assertEqual(L.d(n, otype=tp), dOld(api, n, tp))
+
+  def test_bulk(self):
+    nodes = range(1, maxNode + 1)
+    for (kind, api) in apis.items():
+      (F, E, L) = (api.F, api.E, api.L)
+      with self.subTest(msg=kind):
+        for feat in ('otype', 'lex', 'freq', 'verse'):
+          fObj = getattr(F, feat)
+          self.assertEqual(list(fObj.vs(nodes)), [fObj.v(n) for n in nodes])
+        for tp in ('verse', {'chapter', 'phrase'}):
+          self.assertEqual(
+              list(L.us(nodes, otype=tp)), [L.u(n, otype=tp) for n in nodes]
+          )
+        for (bulk, single) in (
+            (E.link.fs, E.link.f),
+            (E.link.ts, E.link.t),
+            (E.link.bs, E.link.b),
+        ):
+          self.assertEqual(list(bulk(nodes)), [single(n) for n in nodes])
+
+  def test_freqList(self):
+    for (kind, api) in apis.items():
+      F = api.F
+      words = F.otype.s('word')
+      expected = Counter(F.lex.v(w) for w in words)
+      with self.subTest(msg=kind):
+        self.assertEqual(dict(F.lex.freqList()), expected)
+        self.assertEqual(dict(F.lex.freqList('word')), expected)
+        self.assertEqual(dict(F.lex.freqList({'word'})), expected)
+        self.assertEqual(F.lex.freqList('phrase'), ())
+
+  def test_search(self):
+    for (kind, api) in apis.items():
+      S = api.S
+      for query in QUERIES:
+        with self.subTest(msg=f'{kind}: {query}'):
+          expected = searchOld(api, query)
+          results = tuple(S.search(query))
+          self.assertEqual(set(results), expected)
+          self.assertEqual(len(results), len(expected))
+
+  def test_searchParallel(self):
+    S = apis['compiled'].S
+    for query in QUERIES:
+      with self.subTest(msg=query):
+        sequential = tuple(S.search(query))
+        self.assertEqual(tuple(S.search(query, workers=2)), sequential)
+
+
+if __name__ == '__main__':
+  unittest.main()
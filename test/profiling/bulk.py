@@ -0,0 +1,88 @@
+"""Benchmark of the bulk accessors.
+
+Compares `F.fff.vs(nodes)`, `F.otype.vs(nodes)`, `L.us(nodes, otype)` and
+`E.fff.fs(nodes)` with calling `F.fff.v(n)`, `F.otype.v(n)`, `L.u(n, otype)` and
+`E.fff.f(n)` for every node.
+
+Usage:
+
+    python bulk.py [number of slots]
+
+It makes the synthetic corpus of `helpers.py` with the given number of slots
+(default 1 million), with a string feature and integer features on the slots,
+one stored densely and one sparsely, and an edge feature that links every node to
+its nearest embedder.
+It checks that the results are identical, and reports the timings.
+"""
+
+import sys
+import time
+import random
+import hashlib
+
+from tf.core.columns import EdgeIndex, encodeInts, encodeValues
+from tf.core.edgefeature import EdgeFeature
+from tf.core.locality import Locality
+from tf.core.nodefeature import NodeFeature
+from helpers import Api, makeCorpus
+
+
+def compare(label, old, new, nodes):
+    start = time.perf_counter()
+    resultOld = [old(n) for n in nodes]
+    tOld = time.perf_counter() - start
+    start = time.perf_counter()
+    resultNew = new(nodes)
+    tNew = time.perf_counter() - start
+    same = "" if resultOld == resultNew else "  DIFFERENT RESULTS!"
+    print(f"{label:<22} {tOld:>7.2f}s => {tNew:>7.2f}s {tOld / tNew:>7.1f}x{same}")
+
+
+def main():
+    maxSlot = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"making a corpus with {maxSlot} slots ...")
+    (otype, oslots) = makeCorpus(maxSlot)
+    maxNode = otype[2]
+    print(f"{maxNode} nodes")
+    api = Api(otype, oslots)
+    rankData = api.C.rank.data
+    levUpData = api.C.levUp.data
+    nodes = range(1, maxNode + 1)
+
+    random.seed(42)
+    words = {n: random.choice(("a", "b", "c", "d")) for n in range(1, maxSlot + 1)}
+    numbers = {n: random.randrange(1, 1000) for n in range(1, maxSlot + 1)}
+    sparse = {n: v for (n, v) in numbers.items() if n % 5 == 0}
+    for (name, data) in (
+        ("word", encodeValues(words)),
+        ("number", encodeInts(numbers)),
+        ("sparse", encodeInts(sparse)),
+    ):
+        feature = NodeFeature(api, {}, data)
+        compare(f"F.{name}.v(s)", feature.v, feature.vs, nodes)
+    compare("F.otype.v(s)", api.F.otype.v, api.F.otype.vs, nodes)
+
+    L = Locality(api)
+    for (label, otp) in (("verse", "verse"), ("chapter+phrase", {"chapter", "phrase"})):
+        compare(
+            f"L.u(s) {label}",
+            lambda n: L.u(n, otype=otp),
+            lambda ns: L.us(ns, otype=otp),
+            nodes,
+        )
+
+    mother = {}
+    for n in nodes:
+        embedders = levUpData[n - 1]
+        if len(embedders):
+            mother[n] = frozenset((embedders[0],))
+    digest = hashlib.sha256(rankData).hexdigest()
+    index = EdgeIndex.fromEdges(mother, False, rankData, digest)
+    feature = EdgeFeature(api, {}, mother, False, index=index)
+    compare("E.mother.f(s)", feature.f, feature.fs, nodes)
+    compare("E.mother.t(s)", feature.t, feature.ts, nodes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark of the lookup of edges.
+
+Compares `tf.core.edgefeature.EdgeFeature` with an index of the edges
+(`tf.core.columns.EdgeIndex`) with the way Text-Fabric looked up edges before:
+inverting the edges when the feature is loaded, and sorting the nodes
+in canonical order on every lookup.
+
+Usage:
+
+    python edges.py [number of slots]
+
+It makes the synthetic corpus of `helpers.py` with the given number of slots
+(default 1 million), with an edge feature that links every node to its
+nearest embedder, and a valued edge feature that links some nodes to nodes
+further on.
+It checks that the results are identical, and reports the timings of
+preparing the feature and of looking up the edges of all nodes in all directions.
+"""
+
+import sys
+import time
+import random
+import hashlib
+
+from tf.core.columns import EdgeIndex
+from tf.core.edgefeature import EdgeFeature
+from helpers import Api, makeCorpus
+
+
+def makeEdges(otype, levUpData):
+    maxNode = otype[2]
+    random.seed(42)
+    mother = {}
+    for n in range(1, maxNode + 1):
+        embedders = levUpData[n - 1]
+        if len(embedders):
+            mother[n] = frozenset((embedders[0],))
+    crossref = {}
+    for n in random.sample(range(1, maxNode + 1), maxNode // 10):
+        crossref[n] = {
+            random.randrange(1, maxNode + 1): random.choice((50, 80, 100))
+            for i in range(random.randint(1, 5))
+        }
+    return (mother, crossref)
+
+
+def main():
+    maxSlot = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"making a corpus with {maxSlot} slots ...")
+    (otype, oslots) = makeCorpus(maxSlot)
+    maxNode = otype[2]
+    print(f"{maxNode} nodes")
+    api = Api(otype, oslots)
+    rankData = api.C.rank.data
+    levUpData = api.C.levUp.data
+    digest = hashlib.sha256(rankData).hexdigest()
+
+    for (name, data, doValues) in zip(
+        ("mother", "crossref"), makeEdges(otype, levUpData), (False, True)
+    ):
+        start = time.perf_counter()
+        old = EdgeFeature(api, {}, data, doValues)
+        tOld = time.perf_counter() - start
+        start = time.perf_counter()
+        index = EdgeIndex.fromEdges(data, doValues, rankData, digest)
+        tIndex = time.perf_counter() - start
+        start = time.perf_counter()
+        new = EdgeFeature(api, {}, data, doValues, index=index)
+        tNew = time.perf_counter() - start
+        print(
+            f"{name:<9} prepare: {tOld:>7.2f}s => {tNew:>7.2f}s"
+            f" (indexing once: {tIndex:.2f}s)"
+        )
+        for kind in "ftb":
+            fOld = getattr(old, kind)
+            fNew = getattr(new, kind)
+            start = time.perf_counter()
+            resultOld = [fOld(n) for n in range(1, maxNode + 1)]
+            tOld = time.perf_counter() - start
+            start = time.perf_counter()
+            resultNew = [fNew(n) for n in range(1, maxNode + 1)]
+            tNew = time.perf_counter() - start
+            same = "" if resultOld == resultNew else "  DIFFERENT RESULTS!"
+            print(
+                f"{name:<9} {kind}:       {tOld:>7.2f}s => {tNew:>7.2f}s"
+                f" {tOld / tNew:>7.1f}x{same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
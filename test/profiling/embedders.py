@@ -0,0 +1,63 @@
+"""Benchmark of the computation of embedders and boundaries.
+
+Compares `tf.core.prepare.levUp`, `tf.core.prepare.levDown` and
+`tf.core.prepare.boundary` with the computations that Text-Fabric used before.
+
+Usage:
+
+    python embedders.py [number of slots]
+
+It makes the synthetic corpus of `helpers.py` with the given number of slots
+(default 1 million), computes the data with both methods,
+checks that the results are identical, and reports the timings and the sizes
+of the results.
+"""
+
+import sys
+import time
+
+from tf.core.budget import dataSize
+from tf.core.columns import columnize
+from tf.core.prepare import levels, order, rank, levUp, levDown, boundary
+from helpers import makeCorpus, levUpOld, levDownOld, boundaryOld, quiet
+
+
+def compare(name, old, new, *args):
+    start = time.perf_counter()
+    resultOld = old(*args)
+    tOld = time.perf_counter() - start
+    start = time.perf_counter()
+    resultNew = new(*args)
+    tNew = time.perf_counter() - start
+    same = "" if flat(resultOld) == flat(resultNew) else "  DIFFERENT RESULTS!"
+    print(f"{name:<9} {tOld:>7.2f}s => {tNew:>7.2f}s {tOld / tNew:>7.1f}x{same}")
+    mOld = dataSize(resultOld) / 2 ** 20
+    mNew = dataSize(resultNew) / 2 ** 20
+    print(f"{'':<9} {mOld:>6.1f}MB => {mNew:>6.1f}MB")
+    return resultNew
+
+
+def flat(data):
+    data = columnize(data)
+    if type(data) is tuple:
+        return tuple(flat(x) for x in data)
+    return (list(data.offsets), data.values)
+
+
+def main():
+    maxSlot = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"making a corpus with {maxSlot} slots ...")
+    (otype, oslots) = makeCorpus(maxSlot)
+    print(f"{otype[2]} nodes")
+    levelData = levels(quiet, quiet, otype, oslots, {})
+    orderData = order(quiet, quiet, otype, oslots, levelData)
+    rankData = rank(quiet, quiet, otype, orderData)
+
+    levUpData = compare("levUp", levUpOld, levUp, quiet, quiet, otype, oslots, rankData)
+    compare("levDown", levDownOld, levDown, quiet, quiet, otype, levUpData, rankData)
+    compare("boundary", boundaryOld, boundary, quiet, quiet, otype, oslots, rankData)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""Material shared by the benchmarks in this directory and the tests in `test/generic`.
+
+*   a synthetic corpus with nested, overlapping, coinciding and gapped nodes,
+    in memory (`makeCorpus`) and saved as TF files (`saveCorpus`, `saveWords`,
+    `saveLinks`);
+*   a minimal API on such a corpus, without loading it (`Api`);
+*   the computations that Text-Fabric used before, to check the current ones
+    against (`orderOld`, `rankOld`, `levUpOld`, `levDownOld`, `boundaryOld`,
+    `uOld`, `dOld`);
+*   timing (`timed`).
+"""
+
+import gc
+import time
+import random
+import functools
+from array import array
+
+from tf.fabric import Fabric
+from tf.core.api import addOtype
+from tf.core.columns import columnize
+from tf.core.oslotsfeature import OslotsFeature
+from tf.core.otypefeature import OtypeFeature
+from tf.core.prepare import levels, order, rank, levUp, levDown
+
+
+SECTIONS = ("book", "chapter", "verse")
+
+
+def quiet(msg, tm=True):
+    """Stands in for the `info` and `error` functions of the precomputation."""
+
+    pass
+
+
+def timed(task):
+    """Runs a task without garbage collection and returns its result and time."""
+
+    gc.collect()
+    gc.disable()
+    start = time.perf_counter()
+    result = task()
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    return (result, elapsed)
+
+
+def makeCorpus(maxSlot):
+    """Makes the `otype` and `oslots` data of a synthetic corpus.
+
+    There are books, chapters and verses that chop the slots into pieces,
+    and phrases in the verses.
+    About one phrase in five has a gap, and some of those have a sibling phrase
+    with the same first slots.
+    There are clauses on the same slots as a phrase, and clauses that overlap
+    the next phrase.
+
+    Parameters
+    ----------
+    maxSlot: int
+        The number of slots
+
+    Returns
+    -------
+    tuple
+        The `otype` and `oslots` data, as `tf.core.data.Data` holds them
+        after reading the corpus.
+    """
+
+    random.seed(42)
+    nodes = []
+
+    def chop(tp, b, e, minLen, maxLen):
+        parts = []
+        while b <= e:
+            n = min(random.randint(minLen, maxLen), e - b + 1)
+            parts.append((b, b + n - 1, len(nodes)))
+            nodes.append((tp, list(range(b, b + n))))
+            b += n
+        return parts
+
+    for (bb, be, i) in chop("book", 1, maxSlot, 5000, 20000):
+        for (cb, ce, i) in chop("chapter", bb, be, 300, 800):
+            for (vb, ve, i) in chop("verse", cb, ce, 10, 30):
+                for (pb, pe, i) in chop("phrase", vb, ve, 1, 6):
+                    slots = nodes[i][1]
+                    r = random.random()
+                    if len(slots) > 3 and r < 0.2:
+                        # a gap, sometimes a sibling with the same first run
+                        del slots[random.randrange(1, len(slots) - 1)]
+                        if r < 0.05:
+                            nodes.append(("phrase", slots[0:-1]))
+                    elif r < 0.3:
+                        # a node of another type on the same slots
+                        nodes.append(("clause", list(slots)))
+                    elif r < 0.35:
+                        # overlapping the next phrase
+                        nodes.append(("clause", list(range(pb, min(pe + 3, ve) + 1))))
+
+    types = ("book", "chapter", "verse", "clause", "phrase")
+    nodes.sort(key=lambda x: types.index(x[0]))
+    otype = (tuple(x[0] for x in nodes), maxSlot, maxSlot + len(nodes), "word")
+    oslots = (
+        tuple(array("I", x[1]) for x in nodes),
+        maxSlot,
+        maxSlot + len(nodes),
+    )
+    return (otype, oslots)
+
+
+def saveCorpus(location, otype, oslots):
+    """Saves a corpus made by `makeCorpus` as TF files, with sections."""
+
+    (types, maxSlot, maxNode, slotType) = otype
+    nodeFeatures = dict(
+        otype={n: slotType for n in range(1, maxSlot + 1)},
+        **{tp: {} for tp in SECTIONS},
+    )
+    edgeFeatures = dict(oslots={})
+    seqs = {tp: 0 for tp in SECTIONS}
+    for (i, (tp, slots)) in enumerate(zip(types, oslots[0])):
+        n = maxSlot + 1 + i
+        nodeFeatures["otype"][n] = tp
+        edgeFeatures["oslots"][n] = set(slots)
+        if tp in seqs:
+            seqs[tp] += 1
+            nodeFeatures[tp][n] = f"{tp}{seqs[tp]}" if tp == "book" else seqs[tp]
+    metaData = {
+        "": dict(createdBy="helpers.py"),
+        "otype": dict(valueType="str"),
+        "oslots": dict(valueType="str"),
+        "otext": dict(
+            sectionTypes=",".join(SECTIONS),
+            sectionFeatures=",".join(SECTIONS),
+            **{"fmt:text-orig-full": "{otype} "},
+        ),
+        "book": dict(valueType="str"),
+        "chapter": dict(valueType="int"),
+        "verse": dict(valueType="int"),
+    }
+    TF = Fabric(locations=location, silent="deep")
+    TF.save(nodeFeatures=nodeFeatures, edgeFeatures=edgeFeatures, metaData=metaData)
+
+
+def saveWords(location, maxSlot):
+    """Saves features on the slots of a saved corpus.
+
+    `lex` has 5000 distinct string values with a Zipfian distribution,
+    `freq` has integer values between 1 and 1000.
+    """
+
+    random.seed(42)
+    vocabulary = [f"v{i}" for i in range(5000)]
+    weights = [1 / (i + 1) for i in range(len(vocabulary))]
+    lex = dict(
+        zip(
+            range(1, maxSlot + 1),
+            random.choices(vocabulary, weights=weights, k=maxSlot),
+        )
+    )
+    freq = {n: random.randrange(1, 1000) for n in range(1, maxSlot + 1)}
+    TF = Fabric(locations=location, silent="deep")
+    TF.save(
+        nodeFeatures=dict(lex=lex, freq=freq),
+        metaData=dict(lex=dict(valueType="str"), freq=dict(valueType="int")),
+    )
+
+
+def saveLinks(location, otype):
+    """Saves an edge feature `link` from the phrases to one to three random slots."""
+
+    (types, maxSlot, maxNode, slotType) = otype
+    random.seed(42)
+    link = {}
+    for (i, tp) in enumerate(types):
+        if tp == "phrase":
+            link[maxSlot + 1 + i] = {
+                random.randrange(1, maxSlot + 1) for j in range(random.randint(1, 3))
+            }
+    TF = Fabric(locations=location, silent="deep")
+    TF.save(edgeFeatures=dict(link=link), metaData=dict(link=dict(valueType="str")))
+
+
+class Computed(object):
+    def __init__(self, data):
+        self.data = data
+
+
+class Members(object):
+    pass
+
+
+class Api(object):
+    """A minimal API on a corpus made by `makeCorpus`.
+
+    It has `F.otype`, `E.oslots` and the precomputed data in `C`,
+    which is enough for the features and `tf.core.locality.Locality`.
+    """
+
+    def __init__(self, otype, oslots):
+        C = Members()
+        C.levels = Computed(levels(quiet, quiet, otype, oslots, {}))
+        C.order = Computed(order(quiet, quiet, otype, oslots, C.levels.data))
+        C.rank = Computed(rank(quiet, quiet, otype, C.order.data))
+        C.levUp = Computed(
+            columnize(levUp(quiet, quiet, otype, oslots, C.rank.data))
+        )
+        C.levDown = Computed(
+            columnize(levDown(quiet, quiet, otype, C.levUp.data, C.rank.data))
+        )
+        self.C = C
+        self.F = Members()
+        self.F.otype = OtypeFeature(self, {}, columnize(otype))
+        self.E = Members()
+        self.E.oslots = OslotsFeature(self, {}, columnize(oslots))
+        addOtype(self)
+
+
+def orderOld(info, error, otype, oslots, levels):
+    """The previous computation, as it was in `tf.core.prepare.order`."""
+
+    (otype, maxSlot, maxNode, slotType) = otype
+    oslots = oslots[0]
+    otypeLevels = dict(((x[0], i) for (i, x) in enumerate(reversed(levels))))
+
+    def otypeRank(n):
+        return otypeLevels[slotType if n < maxSlot + 1 else otype[n - maxSlot - 1]]
+
+    def before(na, nb):
+        if na < maxSlot + 1:
+            a = na
+            sa = {a}
+        else:
+            a = na - maxSlot
+            sa = set(oslots[a - 1])
+        if nb < maxSlot + 1:
+            b = nb
+            sb = {b}
+        else:
+            b = nb - maxSlot
+            sb = set(oslots[b - 1])
+        oa = otypeRank(na)
+        ob = otypeRank(nb)
+        if sa == sb:
+            return (
+                (-1 if na < nb else 1 if na > nb else 0)
+                if oa == ob
+                else -1
+                if oa > ob
+                else 1
+            )
+        if sa > sb:
+            return -1
+        if sa < sb:
+            return 1
+        am = min(sa - sb)
+        bm = min(sb - sa)
+        return -1 if am < bm else 1 if bm < am else None
+
+    canonKey = functools.cmp_to_key(before)
+    nodes = sorted(range(1, maxNode + 1), key=canonKey)
+    return array("I", nodes)
+
+
+def rankOld(info, error, otype, order):
+    """The previous computation, as it was in `tf.core.prepare.rank`."""
+
+    nodesRank = dict(((n, i) for (i, n) in enumerate(order)))
+    return array("I", (nodesRank[n] for n in range(1, otype[2] + 1)))
+
+
+def levUpOld(info, error, otype, oslots, rank):
+    """The previous computation, as it was in `tf.core.prepare.levUp`."""
+
+    (otype, maxSlot, maxNode, slotType) = otype
+    oslots = oslots[0]
+    oslotsInv = {}
+    for (k, mList) in enumerate(oslots):
+        for m in mList:
+            oslotsInv.setdefault(m, set()).add(k + 1 + maxSlot)
+    embedders = []
+    for n in range(1, maxSlot + 1):
+        contentEmbedders = oslotsInv[n]
+        embedders.append(
+            tuple(
+                sorted(
+                    [m for m in contentEmbedders if m != n], key=lambda k: -rank[k - 1],
+                )
+            )
+        )
+    for n in range(maxSlot + 1, maxNode + 1):
+        mList = oslots[n - maxSlot - 1]
+        if len(mList) == 0:
+            embedders.append(tuple())
+        else:
+            contentEmbedders = functools.reduce(
+                lambda x, y: x & oslotsInv[y], mList[1:], oslotsInv[mList[0]],
+            )
+            embedders.append(
+                tuple(
+                    sorted(
+                        [m for m in contentEmbedders if m != n],
+                        key=lambda k: -rank[k - 1],
+                    )
+                )
+            )
+    seen = {}
+    embeddersx = []
+    for t in embedders:
+        if t not in seen:
+            seen[t] = array("I", t)
+        embeddersx.append(seen[t])
+    return tuple(embeddersx)
+
+
+def levDownOld(info, error, otype, levUp, rank):
+    """The previous computation, as it was in `tf.core.prepare.levDown`."""
+
+    (otype, maxSlot, maxNode, slotType) = otype
+    inverse = {}
+    for n in range(maxSlot + 1, maxNode + 1):
+        for m in levUp[n - 1]:
+            inverse.setdefault(m, set()).add(n)
+    embeddees = []
+    for n in range(maxSlot + 1, maxNode + 1):
+        embeddees.append(
+            array("I", sorted(inverse.get(n, []), key=lambda m: rank[m - 1]))
+        )
+    return tuple(embeddees)
+
+
+def boundaryOld(info, error, otype, oslots, rank):
+    """The previous computation, as it was in `tf.core.prepare.boundary`."""
+
+    (otype, maxSlot, maxNode, slotType) = otype
+    oslots = oslots[0]
+    firstSlotsD = {}
+    lastSlotsD = {}
+    for (k, mList) in enumerate(oslots):
+        firstSlotsD.setdefault(mList[0], []).append(k + 1 + maxSlot)
+        lastSlotsD.setdefault(mList[-1], []).append(k + 1 + maxSlot)
+    firstSlots = []
+    lastSlots = []
+    for n in range(1, maxSlot + 1):
+        firstSlots.append(
+            array("I", sorted(firstSlotsD.get(n, []), key=lambda k: -rank[k - 1]))
+        )
+        lastSlots.append(
+            array("I", sorted(lastSlotsD.get(n, []), key=lambda k: rank[k - 1]))
+        )
+    return (tuple(firstSlots), tuple(lastSlots))
+
+
+def uOld(api, n, otype):
+    """The previous implementation of `tf.core.locality.Locality.u`."""
+
+    fOtype = api.F.otype.v
+    levUp = api.C.levUp.data
+    return tuple(m for m in levUp[n - 1] if fOtype(m) == otype)
+
+
+def dOld(api, n, otype):
+    """The previous implementation of `tf.core.locality.Locality.d`."""
+
+    Fotype = api.F.otype
+    fOtype = Fotype.v
+    maxSlot = Fotype.maxSlot
+    if n <= maxSlot:
+        return tuple()
+    Eoslots = api.E.oslots
+    Crank = api.C.rank.data
+    levDown = api.C.levDown.data
+    if otype == Fotype.slotType:
+        return tuple(sorted(Eoslots.s(n), key=lambda m: Crank[m - 1]))
+    return tuple(m for m in levDown[n - maxSlot - 1] if fOtype(m) == otype)
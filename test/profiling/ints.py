@@ -0,0 +1,86 @@
+"""Benchmark of dense columns for integer features.
+
+Compares an integer feature stored in a `tf.core.columns.DenseColumn`
+(`tf.core.columns.encodeInts`) with the same feature in a
+`tf.core.columns.SparseColumn` and in a plain dictionary.
+
+Usage:
+
+    python ints.py [number of nodes]
+
+It makes an integer feature with a value for nearly all of the given
+number of nodes (default 1 million).
+It checks that the results are identical, and reports the sizes, and the timings
+of looking up all values, iterating over all items, and selecting the nodes
+with values in a range, node by node as the search engine did, and in bulk.
+"""
+
+import sys
+import time
+import random
+
+from tf.core.columns import DenseColumn, SparseColumn, encodeInts
+
+
+def size(data):
+    if type(data) is dict:
+        return sys.getsizeof(data) + sum(map(sys.getsizeof, data.values()))
+    if type(data) is DenseColumn:
+        return len(data.values_) * data.values_.itemsize
+    return len(data.keys_) * (data.keys_.itemsize + data.values_.itemsize)
+
+
+def main():
+    maxNode = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    random.seed(42)
+    data = {
+        n: random.randrange(1, 100_000)
+        for n in range(1, maxNode + 1)
+        if random.random() < 0.98
+    }
+    dense = encodeInts(data)
+    sparse = SparseColumn.fromIntDict(data)
+    print(f"{len(data)} values on {maxNode} nodes")
+    (lo, hi) = (1000, 5000)
+
+    results = {}
+    for (name, feature) in (("dict", data), ("sparse", sparse), ("dense", dense)):
+        mb = size(feature) / 2 ** 20
+        print(f"{name:<7} {type(feature).__name__:<13} {mb:>7.1f} MB")
+        get = feature.get
+        start = time.perf_counter()
+        values = [get(n) for n in range(1, maxNode + 1)]
+        tGet = time.perf_counter() - start
+        start = time.perf_counter()
+        items = list(feature.items())
+        tItems = time.perf_counter() - start
+        start = time.perf_counter()
+        nodes = []
+        for n in range(1, maxNode + 1):
+            v = get(n)
+            if v is not None and lo < v < hi:
+                nodes.append(n)
+        tLoop = time.perf_counter() - start
+        if name == "dict":
+            tBulk = None
+        else:
+            start = time.perf_counter()
+            bulk = feature.inRange(lo, hi)
+            tBulk = time.perf_counter() - start
+            if bulk != nodes:
+                print("  DIFFERENT RESULTS!")
+        bulkRep = "" if tBulk is None else f" range in bulk: {tBulk:>5.2f}s"
+        print(
+            f"{'':<7} get: {tGet:>5.2f}s items: {tItems:>5.2f}s"
+            f" range by node: {tLoop:>5.2f}s{bulkRep}"
+        )
+        results[name] = (values, items, nodes)
+
+    same = all(results[name] == results["dict"] for name in results)
+    if not same:
+        print("DIFFERENT RESULTS!")
+
+
+if __name__ == "__main__":
+    main()
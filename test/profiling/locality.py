@@ -0,0 +1,92 @@
+"""Benchmark of going up and down with node types.
+
+Compares `tf.core.locality.Locality.u` and `tf.core.locality.Locality.d`
+with the way Text-Fabric did this before: filtering the embedders or embeddees of a
+node on the types of all of them, and sorting the embeddees in canonical order,
+on every call.
+
+Usage:
+
+    python locality.py [number of slots]
+
+It makes the synthetic corpus of `helpers.py` with the given number of slots
+(default 1 million), and calls both methods for all nodes with each node type.
+It checks that the results are identical, and reports the timings,
+including the time to make the tables per node type.
+"""
+
+import sys
+import time
+from itertools import chain
+
+from tf.core.locality import Locality
+from helpers import Api, makeCorpus, uOld, dOld
+
+
+def dOldSet(api, n, otype):
+    Fotype = api.F.otype
+    fOtype = Fotype.v
+    maxSlot = Fotype.maxSlot
+    if n <= maxSlot:
+        return tuple()
+    Eoslots = api.E.oslots
+    Crank = api.C.rank.data
+    levDown = api.C.levDown.data
+    return tuple(
+        sorted(
+            (
+                k
+                for k in chain(levDown[n - maxSlot - 1], Eoslots.s(n))
+                if fOtype(k) in otype
+            ),
+            key=lambda m: Crank[m - 1],
+        )
+    )
+
+
+def main():
+    maxSlot = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"making a corpus with {maxSlot} slots ...")
+    (otype, oslots) = makeCorpus(maxSlot)
+    maxNode = otype[2]
+    print(f"{maxNode} nodes")
+    api = Api(otype, oslots)
+    L = Locality(api)
+    nodes = range(1, maxNode + 1)
+
+    for (name, new, old) in (
+        ("u", L.u, lambda n, tp: uOld(api, n, tp)),
+        ("d", L.d, lambda n, tp: dOld(api, n, tp)),
+    ):
+        for tp in api.F.otype.all:
+            start = time.perf_counter()
+            resultOld = [old(n, tp) for n in nodes]
+            tOld = time.perf_counter() - start
+            start = time.perf_counter()
+            new(maxNode, tp)
+            tTable = time.perf_counter() - start
+            start = time.perf_counter()
+            resultNew = [new(n, tp) for n in nodes]
+            tNew = time.perf_counter() - start
+            same = "" if resultOld == resultNew else "  DIFFERENT RESULTS!"
+            print(
+                f"L.{name}(n, {tp:<8}) {tOld:>7.2f}s => {tNew:>7.2f}s"
+                f" {tOld / tNew:>7.1f}x (table: {tTable:.2f}s){same}"
+            )
+
+    tp = {"clause", "phrase", "word"}
+    start = time.perf_counter()
+    resultOld = [dOldSet(api, n, tp) for n in nodes]
+    tOld = time.perf_counter() - start
+    start = time.perf_counter()
+    resultNew = [L.d(n, tp) for n in nodes]
+    tNew = time.perf_counter() - start
+    same = "" if resultOld == resultNew else "  DIFFERENT RESULTS!"
+    print(
+        f"L.d(n, set)      {tOld:>7.2f}s => {tNew:>7.2f}s {tOld / tNew:>7.1f}x{same}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark of sets of nodes.
+
+Compares `tf.search.nodeset.NodeSet` with the Python sets that the search engine
+used before for its yarns.
+
+Usage:
+
+    python nodeset.py [number of nodes]
+
+It makes yarns of various sizes out of the given number of nodes
+(default 1 million), and does with both kinds of sets what the search engine
+does with yarns: making them, intersecting, uniting and subtracting them,
+testing membership for all nodes (for node sets with their bitmap,
+as the search engine does), and walking through them.
+It checks that the results are identical, and reports the sizes and the timings.
+"""
+
+import sys
+import random
+
+from tf.search.nodeset import NodeSet
+from helpers import timed
+
+
+def size(yarn):
+    if type(yarn) is NodeSet:
+        return yarn.nodes.itemsize * len(yarn.nodes) + (
+            0 if yarn.mask is None else len(yarn.mask)
+        )
+    return sys.getsizeof(yarn) + sum(sys.getsizeof(n) for n in yarn)
+
+
+def main():
+    maxNode = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    random.seed(42)
+    nodes = range(1, maxNode + 1)
+    yarns = {
+        "all": list(nodes),
+        "half": random.sample(nodes, maxNode // 2),
+        "tenth": random.sample(nodes, maxNode // 10),
+        "few": random.sample(nodes, 100),
+    }
+    pairs = (("all", "half"), ("half", "tenth"), ("tenth", "few"), ("half", "few"))
+
+    results = {}
+    for kind in (set, NodeSet):
+        name = kind.__name__
+        print(f"{name}:")
+        (made, tMake) = timed(lambda: {k: kind(v) for (k, v) in yarns.items()})
+        mb = sum(size(y) for y in made.values()) / 2 ** 20
+        print(f"  make:           {tMake:>7.3f}s {mb:>7.1f} MB")
+        ops = []
+        for (label, op) in (
+            ("&", lambda a, b: a & b),
+            ("|", lambda a, b: a | b),
+            ("-", lambda a, b: a - b),
+        ):
+            tOp = 0
+            for (a, b) in pairs:
+                (result, t) = timed(lambda: op(made[a], made[b]))
+                tOp += t
+                ops.append(sorted(result))
+            print(f"  {label}:              {tOp:>7.3f}s")
+        yarn = made["half"]
+        if kind is set:
+            (members, tIn) = timed(lambda: [n for n in nodes if n in yarn])
+        else:
+            mask = yarn.bitmap()
+            end = len(mask)
+            (members, tIn) = timed(lambda: [n for n in nodes if n < end and mask[n]])
+        print(f"  in:             {tIn:>7.3f}s")
+        (walked, tWalk) = timed(lambda: sum(1 for n in yarn))
+        print(f"  walk:           {tWalk:>7.3f}s")
+        mb = sum(size(y) for y in made.values()) / 2 ** 20
+        print(f"  total size:             {mb:>7.1f} MB")
+        results[name] = (ops, members, walked)
+
+    if results["set"] != results["NodeSet"]:
+        print("DIFFERENT RESULTS!")
+
+
+if __name__ == "__main__":
+    main()
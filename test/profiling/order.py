@@ -0,0 +1,50 @@
+"""Benchmark of the computation of the canonical order.
+
+Compares `tf.core.prepare.order` with the comparison based sort
+that Text-Fabric used before.
+
+Usage:
+
+    python order.py [number of slots]
+
+It makes the synthetic corpus of `helpers.py` with the given number of slots
+(default 1 million), computes the canonical order with both methods,
+checks that the results are identical, and reports the timings.
+"""
+
+import sys
+import time
+
+from tf.core.prepare import levels, order, rank
+from helpers import makeCorpus, orderOld, rankOld, quiet
+
+
+def main():
+    maxSlot = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"making a corpus with {maxSlot} slots ...")
+    (otype, oslots) = makeCorpus(maxSlot)
+    print(f"{otype[2]} nodes")
+    levelData = levels(quiet, quiet, otype, oslots, {})
+
+    start = time.perf_counter()
+    orderO = orderOld(quiet, quiet, otype, oslots, levelData)
+    tOld = time.perf_counter() - start
+    start = time.perf_counter()
+    orderN = order(quiet, quiet, otype, oslots, levelData)
+    tNew = time.perf_counter() - start
+    same = "" if orderO == orderN else "  DIFFERENT RESULTS!"
+    print(f"order: {tOld:>7.2f}s => {tNew:>7.2f}s {tOld / tNew:>7.1f}x{same}")
+
+    start = time.perf_counter()
+    rankO = rankOld(quiet, quiet, otype, orderO)
+    tOld = time.perf_counter() - start
+    start = time.perf_counter()
+    rankN = rank(quiet, quiet, otype, orderN)
+    tNew = time.perf_counter() - start
+    same = "" if rankO == rankN else "  DIFFERENT RESULTS!"
+    print(f"rank:  {tOld:>7.2f}s => {tNew:>7.2f}s {tOld / tNew:>7.1f}x{same}")
+
+
+if __name__ == "__main__":
+    main()
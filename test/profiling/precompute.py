@@ -0,0 +1,69 @@
+"""Benchmark of the parallel precomputation.
+
+Compares preparing a new corpus with `tf.fabric.Fabric.load` without workers,
+which runs the steps of `tf.fabric.PRECOMPUTE` one after another,
+with preparing it with `workers=`, which runs them as soon as the steps they depend on
+are done, in worker processes (`tf.core.parallel.precompute`).
+
+Usage:
+
+    python precompute.py [number of slots] [number of workers]
+
+It saves the synthetic corpus of `helpers.py` with the given number of slots
+(default 1 million), with sections, twice in a temporary directory,
+and loads both copies for the first time, one without and one with
+the given number of workers (default 4).
+It checks that the precomputed data is identical, and reports the timings.
+"""
+
+import sys
+import time
+import tempfile
+
+from tf.fabric import Fabric
+from helpers import makeCorpus, saveCorpus
+
+
+def load(location, workers):
+    TF = Fabric(locations=location, silent="deep")
+    start = time.perf_counter()
+    api = TF.load("", workers=workers)
+    elapsed = time.perf_counter() - start
+    return (api, elapsed)
+
+
+def norm(data):
+    if data is None or type(data) in {str, int, float}:
+        return data
+    if type(data) is dict:
+        return {k: norm(v) for (k, v) in data.items()}
+    return [norm(x) for x in data]
+
+
+def main():
+    maxSlot = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    print(f"making a corpus with {maxSlot} slots ...")
+    (otype, oslots) = makeCorpus(maxSlot)
+    print(f"{otype[2]} nodes")
+
+    with tempfile.TemporaryDirectory() as tmpDir:
+        (locOld, locNew) = (f"{tmpDir}/old", f"{tmpDir}/new")
+        for location in (locOld, locNew):
+            saveCorpus(location, otype, oslots)
+        (apiOld, tOld) = load(locOld, None)
+        (apiNew, tNew) = load(locNew, workers)
+        same = all(
+            norm(getattr(apiOld.C, c).data) == norm(getattr(apiNew.C, c).data)
+            for c in ("levels", "order", "rank", "levUp", "levDown", "boundary")
+        )
+        sameRep = "" if same else "  DIFFERENT RESULTS!"
+        print(
+            f"first load: {tOld:>7.2f}s => {tNew:>7.2f}s with {workers} workers"
+            f" {tOld / tNew:>7.1f}x{sameRep}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Benchmark of the parser for the data in .tf files.
+
+Compares `tf.core.readtf.readDataTf` with the line-by-line parser
+that Text-Fabric used before.
+
+Usage:
+
+    python readTf.py [number of lines]
+
+It writes a few feature files with the given number of lines (default 3 million)
+in a temporary directory, parses them with both parsers,
+checks that the results are identical, and reports the timings.
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import collections
+
+from tf.core.helpers import setFromSpec, valueFromTf
+from tf.core.readtf import readDataTf
+
+
+def readOld(fh, firstI, isEdge, edgeValues, isNum):
+    """The previous parser, as it was in `tf.core.data.Data._readDataTf`."""
+
+    errors = collections.defaultdict(list)
+    i = firstI
+    implicit_node = 1
+    data = {}
+    normFields = 3 if isEdge and edgeValues else 2
+    for line in fh:
+        i += 1
+        fields = line.rstrip("\n").split("\t")
+        lfields = len(fields)
+        if lfields > normFields:
+            errors["wrongFields"].append(i)
+            continue
+        if lfields == normFields:
+            nodes = setFromSpec(fields[0])
+            if isEdge:
+                if fields[1] == "":
+                    errors["emptyNode2Spec"].append(i)
+                    continue
+                nodes2 = setFromSpec(fields[1])
+            if not isEdge or edgeValues:
+                valTf = fields[-1]
+        else:
+            if isEdge:
+                if edgeValues:
+                    if lfields == normFields - 1:
+                        nodes = {implicit_node}
+                        nodes2 = setFromSpec(fields[0])
+                        valTf = fields[-1]
+                    elif lfields == normFields - 2:
+                        nodes = {implicit_node}
+                        if fields[0] == "":
+                            errors["emptyNode2Spec"].append(i)
+                            continue
+                        nodes2 = setFromSpec(fields[0])
+                        valTf = ""
+                    else:
+                        nodes = {implicit_node}
+                        valTf = ""
+                        errors["emptyNode2Spec"].append(i)
+                        continue
+                else:
+                    if lfields == normFields - 1:
+                        nodes = {implicit_node}
+                        if fields[0] == "":
+                            errors["emptyNode2Spec"].append(i)
+                            continue
+                        nodes2 = setFromSpec(fields[0])
+                    else:
+                        nodes = {implicit_node}
+                        errors["emptyNode2Spec"].append(i)
+                        continue
+            else:
+                nodes = {implicit_node}
+                if lfields == 1:
+                    valTf = fields[0]
+                else:
+                    valTf = ""
+        implicit_node = max(nodes) + 1
+        if not isEdge or edgeValues:
+            value = (
+                int(valTf)
+                if isNum and valTf != ""
+                else None
+                if isNum
+                else ""
+                if valTf == ""
+                else valueFromTf(valTf)
+            )
+        if isEdge:
+            for n in nodes:
+                for m in nodes2:
+                    if not edgeValues:
+                        data.setdefault(n, set()).add(m)
+                    else:
+                        data.setdefault(n, {})[m] = value
+        else:
+            for n in nodes:
+                if value is not None:
+                    data[n] = value
+    return (data, dict(errors))
+
+
+def makeFiles(dirName, nLines):
+    random.seed(42)
+    words = [f"w{i}" for i in range(5000)] + ["a\\tb", "x\\\\y", ""]
+
+    def implicitStr(fh):
+        for n in range(1, nLines + 1):
+            fh.write(f"{random.choice(words)}\n")
+
+    def explicitStr(fh):
+        n = 0
+        while n < nLines:
+            n += random.choice((1, 1, 1, 2, 5))
+            sep = "-" if random.random() < 0.1 else ""
+            spec = f"{n}-{n + 3}" if sep else f"{n}"
+            n += 3 if sep else 0
+            fh.write(f"{spec}\t{random.choice(words)}\n")
+
+    def implicitInt(fh):
+        for n in range(1, nLines + 1):
+            fh.write(f"{random.randint(-100000, 100000)}\n")
+
+    def edges(fh):
+        for n in range(1, nLines + 1):
+            m = random.randint(1, nLines)
+            fh.write(f"{m}\n" if random.random() < 0.5 else f"{m}-{m + 4},{m + 9}\n")
+
+    def edgesInt(fh):
+        for n in range(1, nLines + 1):
+            fh.write(f"{random.randint(1, nLines)}\t{random.randint(0, 9)}\n")
+
+    specs = (
+        ("implicitStr", "@node\n@valueType=str\n", implicitStr, False, False, False),
+        ("explicitStr", "@node\n@valueType=str\n", explicitStr, False, False, False),
+        ("implicitInt", "@node\n@valueType=int\n", implicitInt, False, False, True),
+        ("edges", "@edge\n@valueType=str\n", edges, True, False, False),
+        (
+            "edgesInt",
+            "@edge\n@edgeValues\n@valueType=int\n",
+            edgesInt,
+            True,
+            True,
+            True,
+        ),
+    )
+    files = []
+    for (name, header, writer, isEdge, edgeValues, isNum) in specs:
+        path = f"{dirName}/{name}.tf"
+        with open(path, "w", encoding="utf8") as fh:
+            fh.write(f"{header}\n")
+            writer(fh)
+        files.append((name, path, header.count("\n") + 1, isEdge, edgeValues, isNum))
+    return files
+
+
+def parse(parser, path, firstI, isEdge, edgeValues, isNum):
+    with open(path, encoding="utf8") as fh:
+        for i in range(firstI):
+            fh.readline()
+        start = time.perf_counter()
+        result = parser(fh, firstI, isEdge, edgeValues, isNum)
+        return (time.perf_counter() - start, result)
+
+
+def main():
+    nLines = int(sys.argv[1]) if len(sys.argv) > 1 else 3_000_000
+    with tempfile.TemporaryDirectory() as dirName:
+        print(f"writing feature files with {nLines} lines each ...")
+        files = makeFiles(dirName, nLines)
+        print(f"{'file':<12} {'old':>8} {'new':>8} {'speedup':>8}")
+        for (name, path, firstI, isEdge, edgeValues, isNum) in files:
+            args = (path, firstI, isEdge, edgeValues, isNum)
+            (tOld, resultOld) = parse(readOld, *args)
+            (tNew, resultNew) = parse(readDataTf, *args)
+            same = "" if resultOld == resultNew else "  DIFFERENT RESULTS!"
+            mb = os.path.getsize(path) / 1024 / 1024
+            print(
+                f"{name:<12} {tOld:>7.2f}s {tNew:>7.2f}s {tOld / tNew:>7.1f}x"
+                f"  ({mb:.0f} MB){same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark of finding the candidate nodes of the atoms of a search template.
+
+Compares the search engine with an index of the nodes per value of a feature
+(`tf.core.columns.ValueIndex`) with the way it did this before:
+testing the feature conditions of an atom for every node of its type.
+With the index, equality conditions are looked up, regular expressions are
+matched once per distinct value, and numeric limits are looked up by bisection
+in the sorted values.
+
+Usage:
+
+    python spin.py [number of slots]
+
+It saves the synthetic corpus of `helpers.py` with the given number of slots
+(default 1 million) in a temporary directory,
+with a string feature `lex` and an integer feature `freq` on the slots,
+and loads it.
+Then it runs a few searches with and without the value index,
+checks that the results are identical, and reports the timings.
+The first search with the index includes the time to make the index.
+"""
+
+import sys
+import time
+import tempfile
+
+from tf.fabric import Fabric
+from helpers import makeCorpus, saveCorpus, saveWords
+
+
+QUERIES = (
+    "word lex=v4321",
+    "word lex=v1|v2|v3",
+    "phrase\n  word lex=v17|v4000",
+    "verse\n  word lex=v4321",
+    "word lex~^v12[0-9]$",
+    "word lex~9$",
+    "word freq>995",
+    "word freq<3",
+)
+
+
+def main():
+    maxSlot = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"making a corpus with {maxSlot} slots ...")
+    (otype, oslots) = makeCorpus(maxSlot)
+    print(f"{otype[2]} nodes")
+
+    with tempfile.TemporaryDirectory() as location:
+        saveCorpus(location, otype, oslots)
+        saveWords(location, maxSlot)
+        TF = Fabric(locations=location, silent="deep")
+        api = TF.load("lex freq", silent="deep")
+        S = api.S
+        features = (api.F.lex, api.F.freq)
+
+        for query in QUERIES:
+            indexes = [(f.index, f.indexer) for f in features]
+            for f in features:
+                (f.index, f.indexer) = (None, None)
+            start = time.perf_counter()
+            resultOld = sorted(S.search(query))
+            tOld = time.perf_counter() - start
+            for (f, (index, indexer)) in zip(features, indexes):
+                (f.index, f.indexer) = (index, indexer)
+            start = time.perf_counter()
+            resultNew = sorted(S.search(query))
+            tNew = time.perf_counter() - start
+            same = "" if resultOld == resultNew else "  DIFFERENT RESULTS!"
+            print(
+                f"{query.replace(chr(10), ' / '):<30} {len(resultNew):>6} results"
+                f" {tOld:>7.3f}s => {tNew:>7.3f}s {tOld / tNew:>7.1f}x{same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
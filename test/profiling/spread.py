@@ -0,0 +1,188 @@
+"""Benchmark of the estimation of the spreads of relations in search.
+
+Compares `tf.search.spin.estimateSpreads`, which takes the spreads of structural
+relations, edge features and value equality from the statistics of the corpus
+(`tf.core.prepare.stats`), with the way it did this before:
+testing the relations for a random sample of nodes.
+
+Usage:
+
+    python spread.py [number of slots] [number of runs]
+
+It saves the synthetic corpus of `helpers.py` with the given number of slots
+(default 100,000) in a temporary directory,
+with the features of `spin.py` and an edge feature `link` from phrases to words,
+and loads it.
+Then it studies a few searches, and estimates the spreads of their relations
+in both ways, the old way for the given number of runs (default 10).
+It reports, per search, how far the estimates are from the exact spreads,
+how many different stitch plans the estimates lead to, and the timings.
+It also checks that the results of the searches are identical.
+"""
+
+import sys
+import time
+import tempfile
+from inspect import signature
+from random import randrange
+
+from tf.fabric import Fabric
+import tf.search.spin as spin
+import tf.search.stitch as stitch
+from helpers import makeCorpus, saveCorpus, saveWords, saveLinks
+
+
+QUERIES = (
+    "verse\n  phrase\n    word lex=v1",
+    "chapter\n  c:clause\n  p:phrase\nc :: p",
+    "phrase\n  word\n  =: word\n  := word",
+    "phrase\n-link> word lex=v2",
+    "verse\n  w1:word lex=v17\n  w2:word\nw1 .lex. w2",
+)
+
+
+def estimateSpreadsOld(searchExe, both=False):
+    """The previous estimation, as it was in `tf.search.spin.estimateSpreads`."""
+
+    TRY_LIMIT_F = searchExe.perfParams["tryLimitFrom"]
+    TRY_LIMIT_T = searchExe.perfParams["tryLimitTo"]
+    qnodes = searchExe.qnodes
+    relations = searchExe.relations
+    converse = searchExe.converse
+    qedges = searchExe.qedges
+    yarns = searchExe.yarns
+
+    spreadsC = {}
+    spreads = {}
+
+    for (e, (f, rela, t)) in enumerate(qedges):
+        tasks = [(f, rela, t, 1)]
+        if both:
+            tasks.append((t, converse[rela], f, -1))
+        for (tf, trela, tt, dir) in tasks:
+            s = relations[trela]["spin"]
+            yarnF = yarns[tf]
+            yarnT = yarns[tt]
+            dest = spreads if dir == 1 else spreadsC
+            if type(s) is float:
+                dest[e] = len(yarnT) * s
+                continue
+            yarnF = list(yarnF)
+            yarnT = yarns[tt]
+            yarnFl = len(yarnF)
+            if yarnFl < TRY_LIMIT_F:
+                triesn = yarnF
+            else:
+                triesn = set(yarnF[randrange(yarnFl)] for n in range(TRY_LIMIT_F))
+
+            if len(triesn) == 0:
+                dest[e] = 0
+            else:
+                r = relations[trela]["func"](qnodes[tf][0], qnodes[tt][0])
+                nparams = len(signature(r).parameters)
+                totalSpread = 0
+                if nparams == 1:
+                    for n in triesn:
+                        mFromN = {m for m in r(n) or () if m in yarnT}
+                        totalSpread += len(mFromN)
+                else:
+                    yarnTl = len(yarnT)
+                    yarnTL = list(yarnT)
+                    for n in triesn:
+                        triesm = (
+                            yarnT
+                            if yarnTl < TRY_LIMIT_T
+                            else set(
+                                yarnTL[randrange(yarnTl)] for m in range(TRY_LIMIT_T)
+                            )
+                        )
+                        if len(triesm) == 0:
+                            thisSpread = 0
+                        else:
+                            thisSpread = 0
+                            for m in triesm:
+                                if r(n, m):
+                                    thisSpread += 1
+                            thisSpread = thisSpread / len(triesm)
+                        totalSpread += yarnTl * thisSpread
+                dest[e] = totalSpread / len(triesn)
+    searchExe.spreads = spreads
+    searchExe.spreadsC = spreadsC
+
+
+def spreadsOf(exe, estimate):
+    estimate(exe, both=True)
+    return [exe.spreads[e] for e in sorted(exe.spreads)] + [
+        exe.spreadsC[e] for e in sorted(exe.spreadsC)
+    ]
+
+
+def error(estimates, exact):
+    # the mean factor by which the estimates are off
+    factors = [
+        max(x, y) / min(x, y) if min(x, y) > 0 else 1 if x == y else float("inf")
+        for (x, y) in zip(estimates, exact)
+    ]
+    return sum(factors) / len(factors)
+
+
+def plan(exe, estimate):
+    estimate(exe, both=True)
+    stitch._stitchPlan(exe)
+    return (tuple(exe.newNodes), tuple(exe.newEdges))
+
+
+def main():
+    maxSlot = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    print(f"making a corpus with {maxSlot} slots ...")
+    (otype, oslots) = makeCorpus(maxSlot)
+    print(f"{otype[2]} nodes")
+
+    estimateSpreadsNew = spin.estimateSpreads
+
+    with tempfile.TemporaryDirectory() as location:
+        saveCorpus(location, otype, oslots)
+        saveWords(location, maxSlot)
+        saveLinks(location, otype)
+        TF = Fabric(locations=location, silent="deep")
+        api = TF.load("lex freq link", silent="deep")
+        S = api.S
+
+        for query in QUERIES:
+            print(query.replace("\n", " / "))
+            S.study(query)
+            exe = S.exe
+            perfParams = dict(exe.perfParams)
+            exe.perfParams.update(tryLimitFrom=10 ** 9, tryLimitTo=10 ** 9)
+            exact = spreadsOf(exe, estimateSpreadsOld)
+            exe.perfParams.update(perfParams)
+
+            start = time.perf_counter()
+            olds = [spreadsOf(exe, estimateSpreadsOld) for i in range(runs)]
+            tOld = (time.perf_counter() - start) / runs
+            start = time.perf_counter()
+            new = spreadsOf(exe, estimateSpreadsNew)
+            tNew = time.perf_counter() - start
+
+            errOld = sum(error(old, exact) for old in olds) / runs
+            errNew = error(new, exact)
+            plansOld = len({plan(exe, estimateSpreadsOld) for i in range(runs)})
+            plansNew = len({plan(exe, estimateSpreadsNew) for i in range(runs)})
+            print(
+                f"  estimate: {tOld:>7.4f}s => {tNew:>7.4f}s;"
+                f" off by a factor {errOld:>6.2f} => {errNew:>6.2f};"
+                f" plans {plansOld:>2} => {plansNew:>2}"
+            )
+
+            spin.estimateSpreads = stitch.estimateSpreads = estimateSpreadsOld
+            resultOld = sorted(S.search(query))
+            spin.estimateSpreads = stitch.estimateSpreads = estimateSpreadsNew
+            resultNew = sorted(S.search(query))
+            if resultOld != resultNew:
+                print("  DIFFERENT RESULTS!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark of stitching search results in parallel.
+
+Compares fetching and counting the results of searches in one process
+with doing it with `workers=`, which stitches chunks of the first yarn
+of the stitch plan in worker processes (see `tf.search.searchexe`).
+
+Usage:
+
+    python stitch.py [number of slots] [number of workers]
+
+It saves the synthetic corpus of `helpers.py` with the given number of slots
+(default 1 million) in a temporary directory, and loads it.
+Then it runs a few searches with and without the given number of workers
+(default 4), checks that the results are identical and in the same order,
+and reports the timings.
+"""
+
+import sys
+import tempfile
+
+from tf.fabric import Fabric
+from helpers import makeCorpus, saveCorpus, timed
+
+
+QUERIES = (
+    "verse\n  p1:phrase\n  p2:phrase\np1 < p2",
+    "verse\n  clause\n    word\n  phrase\n    word",
+    "phrase\n  word\n  <: word\n  <: word",
+    "verse\n  phrase\n  || clause",
+)
+
+
+def main():
+    maxSlot = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    print(f"making a corpus with {maxSlot} slots ...")
+    (otype, oslots) = makeCorpus(maxSlot)
+    print(f"{otype[2]} nodes")
+
+    with tempfile.TemporaryDirectory() as location:
+        saveCorpus(location, otype, oslots)
+        TF = Fabric(locations=location, silent="deep")
+        api = TF.load("", silent="deep")
+        S = api.S
+
+        for query in QUERIES:
+            S.study(query)
+            (resultOld, tOld) = timed(lambda: tuple(S.fetch()))
+            (resultNew, tNew) = timed(lambda: S.fetch(workers=workers))
+            same = "" if resultOld == resultNew else "  DIFFERENT RESULTS!"
+            print(
+                f"{query.replace(chr(10), ' / '):<45} {len(resultNew):>8} results"
+                f" {tOld:>7.3f}s => {tNew:>7.3f}s {tOld / tNew:>7.1f}x{same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
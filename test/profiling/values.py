@@ -0,0 +1,96 @@
+"""Benchmark of the lookup of nodes by feature value.
+
+Compares `tf.core.nodefeature.NodeFeature` with an index of the nodes per value
+(`tf.core.columns.ValueIndex`) with the way Text-Fabric did this before:
+scanning all values of the feature and sorting the matching nodes in canonical order
+on every call of `s()`, and counting all values on every call of `freqList()`.
+
+Usage:
+
+    python values.py [number of slots]
+
+It makes the synthetic corpus of `helpers.py` with the given number of slots
+(default 1 million), with a string feature on all nodes and an integer feature
+on the slots.
+It checks that the results are identical, and reports the timings of
+looking up the nodes of all values and of making frequency lists.
+"""
+
+import sys
+import time
+import random
+import hashlib
+
+from tf.core.columns import ValueIndex, encodeValues
+from tf.core.nodefeature import NodeFeature
+from helpers import Api, makeCorpus
+
+
+def makeValues(otype):
+    maxSlot = otype[1]
+    maxNode = otype[2]
+    random.seed(42)
+    vocabulary = [f"v{i}" for i in range(5000)]
+    weights = [1 / (i + 1) for i in range(len(vocabulary))]
+    lex = dict(
+        zip(
+            range(1, maxNode + 1),
+            random.choices(vocabulary, weights=weights, k=maxNode),
+        )
+    )
+    number = {n: random.randrange(1, 200) for n in range(1, maxSlot + 1)}
+    return (lex, number)
+
+
+def main():
+    maxSlot = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"making a corpus with {maxSlot} slots ...")
+    (otype, oslots) = makeCorpus(maxSlot)
+    maxNode = otype[2]
+    print(f"{maxNode} nodes")
+    api = Api(otype, oslots)
+    levelData = api.C.levels.data
+    rankData = api.C.rank.data
+    digest = hashlib.sha256(rankData).hexdigest()
+    nodeTypes = [levelData[-1][0], levelData[0][0]]
+
+    for (name, data) in zip(("lex", "number"), makeValues(otype)):
+        encoded = encodeValues(data) if name == "lex" else data
+        start = time.perf_counter()
+        index = ValueIndex.fromValues(encoded, rankData, levelData, digest)
+        tIndex = time.perf_counter() - start
+        print(f"{name:<7} indexing once: {tIndex:.2f}s")
+        old = NodeFeature(api, {}, encoded)
+        new = NodeFeature(api, {}, encoded, indexer=lambda: index)
+        vals = sorted(set(data.values()))[0:200]
+        start = time.perf_counter()
+        resultOld = [old.s(val) for val in vals]
+        tOld = time.perf_counter() - start
+        start = time.perf_counter()
+        resultNew = [new.s(val) for val in vals]
+        tNew = time.perf_counter() - start
+        same = "" if resultOld == resultNew else "  DIFFERENT RESULTS!"
+        print(
+            f"{name:<7} s:        {tOld:>7.2f}s => {tNew:>7.2f}s"
+            f" {tOld / tNew:>7.1f}x{same}"
+        )
+        for types in (None, nodeTypes):
+            start = time.perf_counter()
+            resultOld = [
+                NodeFeature(api, {}, encoded).freqList(nodeTypes=types)
+                for i in range(5)
+            ]
+            tOld = time.perf_counter() - start
+            start = time.perf_counter()
+            resultNew = [new.freqList(nodeTypes=types) for i in range(5)]
+            tNew = time.perf_counter() - start
+            same = "" if resultOld == resultNew else "  DIFFERENT RESULTS!"
+            print(
+                f"{name:<7} freqList: {tOld:>7.2f}s => {tNew:>7.2f}s"
+                f" {tOld / tNew:>7.1f}x{same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -54,6 +54,7 @@ class App:
         api=None,
         setFile="",
         silent=False,
+        lazy=False,
         **configOverrides,
     ):
         """Set up the advanced TF API.
@@ -232,6 +233,11 @@ class App:
             data, features, and the API methods.
             Error messages will still come through.
 
+        lazy: boolean, optional `False`
+            If `True`, the features of the corpus will only be loaded
+            when they are used.
+            See `tf.core.lazy`.
+
         configOverrides: key value pairs
             All values here will be used to override configuration settings
             that are specified in the app's `config.yaml` file.
@@ -296,7 +302,9 @@ class App:
                     useFeatures = [
                         f for f in loadableFeatures if f not in excludedFeatures
                     ]
-                    result = TF.load(useFeatures, add=True, silent=silent or True)
+                    result = TF.load(
+                        useFeatures, add=True, silent=silent or True, lazy=lazy
+                    )
                     if result is False:
                         self.api = None
             else:
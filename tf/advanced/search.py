@@ -12,7 +12,9 @@ def searchApi(app):
     app.search = types.MethodType(search, app)
 
 
-def search(app, query, silent=False, sets=None, shallow=False, sort=True):
+def search(
+    app, query, silent=False, sets=None, shallow=False, sort=True, workers=None
+):
     """Search with some high-level features.
 
     This function calls the lower level `tf.search.search.Search` facility aka `S`.
@@ -80,6 +82,10 @@ def search(app, query, silent=False, sets=None, shallow=False, sort=True):
 
         If it is a `False` value, no sorting will be applied.
 
+    workers: integer, optional `None`
+        If you pass a number greater than 1, the results are stitched together
+        by that many worker processes, see `tf.search.searchexe`.
+
     !!! hint "search template reference"
         See the search template reference (`tf.about.searchusage`)
 
@@ -99,7 +105,7 @@ def search(app, query, silent=False, sets=None, shallow=False, sort=True):
 
     wasSilent = isSilent()
 
-    results = S.search(query, sets=sets, shallow=shallow)
+    results = S.search(query, sets=sets, shallow=shallow, workers=workers)
     if not shallow:
         if not sort:
             results = list(results)
@@ -10,6 +10,7 @@ from .locality import Locality
 from .nodefeature import NodeFeatures
 from .edgefeature import EdgeFeatures
 from .computed import Computeds
+from .lazy import LazyFeature
 from .text import Text
 from ..search.search import Search
 
@@ -228,6 +229,8 @@ class Api(object):
         """Checks if features are loaded and if not loads them.
 
         All features in question will be made available to the core API.
+        Features that have been loaded lazily (`tf.core.lazy`),
+        but have not been used yet, will be loaded.
 
         Parameters
         ----------
@@ -256,7 +259,12 @@ class Api(object):
             if not fObj:
                 warning(f'Cannot load feature "{fName}": not in dataset')
                 continue
-            if fObj.dataLoaded and (hasattr(F, fName) or hasattr(E, fName)):
+            feature = getattr(F, fName, None) or getattr(E, fName, None)
+            if (
+                fObj.dataLoaded
+                and feature is not None
+                and not isinstance(feature, LazyFeature)
+            ):
                 loadedFeatures.add(fName)
             else:
                 needToLoad.add(fName)
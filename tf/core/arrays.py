@@ -0,0 +1,248 @@
+"""
+# Export to NumPy and SciPy
+
+For vectorized analysis and machine learning, feature data can be delivered as
+[NumPy](https://numpy.org) arrays and [SciPy](https://scipy.org) sparse matrices:
+
+*   `tf.core.nodefeature.NodeFeature.toArray`: the values of a node feature for
+    a range of nodes;
+*   `tf.core.edgefeature.EdgeFeature.toCSR`: the edges of an edge feature as an
+    adjacency matrix;
+*   `tf.core.oslotsfeature.OslotsFeature.toCSR`: the slots of the nodes;
+*   `tf.core.computed.Computed.toCSR`: the embedders (`C.levUp`) and
+    embeddees (`C.levDown`) of the nodes.
+
+The matrices are indexed by nodes in both dimensions: the entry at `(n, m)` is
+non-zero if there is an edge from `n` to `m`.
+Row and column `0` are empty, since there is no node `0`.
+
+Where the data is already stored in arrays (see `tf.core.columns`),
+the arrays are *views* on that data: it is not copied.
+That is the case for the values of integer features that are stored densely.
+Views on memory mapped data are read-only.
+The matrices own their data, so you can change them in place,
+e.g. by `sort_indices()`.
+
+!!! caution "NumPy and SciPy"
+    NumPy and SciPy are not installed with Text-Fabric.
+    If you want to use these functions, install them yourself:
+
+    ``` sh
+    pip install numpy scipy
+    ```
+"""
+
+from array import array
+
+from .columns import CodedColumn, DenseColumn, RaggedColumn, SparseColumn
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from scipy.sparse import csr_matrix
+except ImportError:
+    csr_matrix = None
+
+
+def hasNumpy(error, scipy=False):
+    """Checks whether NumPy, and optionally SciPy, can be used.
+
+    Parameters
+    ----------
+    error: function
+        To report a missing module.
+    scipy: boolean, optional False
+        Whether SciPy is needed as well.
+
+    Returns
+    -------
+    boolean
+    """
+
+    missing = [
+        name
+        for (name, module) in (("numpy", numpy), ("scipy", csr_matrix))
+        if module is None and (name == "numpy" or scipy)
+    ]
+    if missing:
+        error(f"This needs {' and '.join(missing)}: pip install {' '.join(missing)}")
+        return False
+    return True
+
+
+def nodeArray(data, b, e):
+    """The values of a node feature for a range of nodes.
+
+    Parameters
+    ----------
+    data: dict | SparseColumn | DenseColumn
+        The data of the node feature.
+    b: int
+        The first node of the range.
+    e: int
+        The last node of the range.
+
+    Returns
+    -------
+    numpy.ma.MaskedArray
+        The value of node `n` is at position `n - b`.
+        Nodes without a value are masked.
+        Integer values give an array of integers, other values
+        an array of objects.
+    """
+
+    size = e - b + 1
+    tp = type(data)
+
+    if tp is DenseColumn:
+        values = data.values_
+        first = data.first
+        coded = type(values) is CodedColumn
+        column = numpy.asarray(values.codes if coded else values)
+        # in coded columns the missing value is in the table (`encodeValues`)
+        missing = values.code(data.missing) if coded else data.missing
+        if first <= b and e < first + len(column):
+            # a view on the stored data
+            column = column[b - first : e - first + 1]
+        else:
+            result = numpy.full(size, missing, dtype=column.dtype)
+            lo = max(b, first)
+            hi = min(e, first + len(column) - 1)
+            if lo <= hi:
+                result[lo - b : hi - b + 1] = column[lo - first : hi - first + 1]
+            column = result
+        mask = column == missing
+        if coded:
+            table = numpy.empty(len(values.table), dtype=object)
+            table[:] = values.table
+            column = table[column]
+        return numpy.ma.MaskedArray(column, mask=mask)
+
+    if tp is SparseColumn:
+        keys = numpy.asarray(data.keys_)
+        values = data.values_
+        lo = numpy.searchsorted(keys, b)
+        hi = numpy.searchsorted(keys, e, side="right")
+        positions = keys[lo:hi].astype(numpy.int64) - b
+        if type(values) is CodedColumn:
+            table = numpy.empty(len(values.table), dtype=object)
+            table[:] = values.table
+            values = table[numpy.asarray(values.codes)[lo:hi]]
+        else:
+            values = numpy.asarray(values)[lo:hi]
+        result = numpy.zeros(size, dtype=values.dtype)
+        result[positions] = values
+        mask = numpy.ones(size, dtype=bool)
+        mask[positions] = False
+        return numpy.ma.MaskedArray(result, mask=mask)
+
+    values = [data.get(n, None) for n in range(b, e + 1)]
+    mask = numpy.fromiter((v is None for v in values), dtype=bool, count=size)
+    if all(type(v) is int for v in data.values()):
+        result = numpy.array(
+            [0 if v is None else v for v in values], dtype=numpy.int64
+        )
+    else:
+        result = numpy.empty(size, dtype=object)
+        result[:] = values
+    return numpy.ma.MaskedArray(result, mask=mask)
+
+
+def raggedMatrix(column, first, size, values=None, nodes=None):
+    """A sparse matrix of nodes and the nodes they are related to.
+
+    Parameters
+    ----------
+    column: RaggedColumn | tuple of array
+        For a stretch of nodes the nodes they are related to.
+    first: int
+        The node of the first member of the column.
+    size: int
+        The number of rows and columns of the matrix: the number of nodes plus one.
+    values: CodedColumn, optional None
+        The values of the relations, aligned with the flat array of `column`.
+        If `None`, all values are `True`.
+    nodes: array, optional None
+        If not `None`, the nodes of the members of the column,
+        and `first` is ignored.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix | None
+        `None` if the values are not integers.
+    """
+
+    if type(column) is not RaggedColumn:
+        column = RaggedColumn.fromSequence(column)
+    offsets = numpy.asarray(column.offsets)
+    targets = numpy.asarray(column.values)
+    n = len(targets)
+    indexType = numpy.int32 if n < 2 ** 31 and size < 2 ** 31 else numpy.int64
+
+    # the row pointers for the rows before, between, and after the members
+    # of the column have to be added, so they are copied
+    if nodes is None:
+        indptr = numpy.empty(size + 1, dtype=indexType)
+        indptr[0 : first + 1] = 0
+        end = first + len(offsets)
+        indptr[first + 1 : end] = offsets[1:]
+        indptr[end:] = n
+    else:
+        lengths = numpy.zeros(size, dtype=indexType)
+        lengths[numpy.asarray(nodes)] = numpy.diff(offsets)
+        indptr = numpy.zeros(size + 1, dtype=indexType)
+        numpy.cumsum(lengths, out=indptr[1:])
+
+    # the column indices are copied as well: a view on memory mapped data would
+    # be read-only, so that the matrix could not be changed in place,
+    # not even by sorting its indices
+    indices = targets.astype(indexType)
+
+    if values is None:
+        data = numpy.ones(n, dtype=bool)
+    else:
+        table = values.table
+        if not all(type(v) is int for v in table):
+            return None
+        data = numpy.array(table, dtype=numpy.int64)[numpy.asarray(values.codes)]
+    return csr_matrix((data, indices, indptr), shape=(size, size))
+
+
+def edgeMatrix(data, doValues, index, size):
+    """The edges of an edge feature as a sparse matrix.
+
+    Parameters
+    ----------
+    data: dict
+        The data of the edge feature.
+    doValues: boolean
+        Whether the edges have values.
+    index: EdgeIndex | None
+        The index of the edges; if `None`, the matrix is made from the data.
+    size: int
+        The number of rows and columns of the matrix: the number of nodes plus one.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix | None
+        `None` if the values are not integers.
+    """
+
+    if index is not None:
+        (first, nodes, column, values) = index.columns["f"]
+        return raggedMatrix(column, first, size, values=values, nodes=nodes)
+
+    nodes = sorted(data)
+    targets = [sorted(data[n]) for n in nodes]
+    values = (
+        CodedColumn.fromSequence(
+            data[n][m] for (n, ms) in zip(nodes, targets) for m in ms
+        )
+        if doValues
+        else None
+    )
+    column = RaggedColumn.fromSequence([array("I", ms) for ms in targets])
+    return raggedMatrix(column, 0, size, values=values, nodes=array("I", nodes))
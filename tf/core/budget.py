@@ -0,0 +1,199 @@
+"""
+# Memory budget for loaded features
+
+In a long running session features pile up: every `TF.load(..., add=True)`
+and every `tf.core.api.Api.ensureLoaded` adds features, and none are unloaded.
+
+When you pass `memoryBudget=` a number of bytes to `tf.fabric.Fabric`,
+Text-Fabric keeps track of the size of the data of each loaded feature, and of
+when it has been used for the last time.
+Whenever loading makes the total size exceed the budget,
+the features that have not been used for the longest time are unloaded,
+until the total size is within budget again.
+
+Unloaded features are replaced by the stand-ins of `tf.core.lazy`, so when you use
+them again, they are loaded again, transparently.
+
+Only features that you have loaded yourself are subject to this:
+`otype`, `oslots`, the precomputed data, and the features needed for the
+section structure and the text formats are always kept.
+Neither are the features that are loaded by the same call unloaded by that call,
+so a single big load may exceed the budget.
+
+!!! caution "References"
+    If you have stored a feature in a variable of your own, e.g.
+    `pos = F.pos`, the data of that feature cannot be freed while that variable
+    exists.
+
+!!! note "Cost"
+    To know which features have been used, every access to `F.fff` and `E.fff`
+    is recorded. That costs a little bit of time, so it only happens
+    if you have set a budget.
+"""
+
+import sys
+import collections
+from array import array
+
+from .lazy import LazyFeature
+
+# from Python 3.11 on, all objects have a default __getstate__
+OBJECT_GETSTATE = getattr(object, "__getstate__", None)
+
+class MemoryBudget(object):
+    """Keeps the loaded features within a memory budget.
+
+    Parameters
+    ----------
+    TF: object
+        The `tf.fabric.Fabric` object.
+    budget: integer
+        The maximum number of bytes of the data of the features under management.
+    """
+
+    def __init__(self, TF, budget):
+        self.TF = TF
+        self.budget = budget
+        self.sizes = collections.OrderedDict()
+        """Sizes of the features under management, least recently used first."""
+
+    def total(self):
+        """The total size of the features under management.
+        """
+
+        return sum(self.sizes.values())
+
+    def track(self, api):
+        """Lets the feature containers of an API record the use of features.
+        """
+
+        used = self.used
+        for container in (api.F, api.E):
+            cls = container.__class__
+            container.__class__ = type(
+                cls.__name__, (cls,), dict(__getattribute__=_tracker(used))
+            )
+
+    def used(self, fName):
+        """Records that a feature has been used.
+        """
+
+        sizes = self.sizes
+        if fName in sizes:
+            sizes.move_to_end(fName)
+
+    def update(self, requested, keep):
+        """Accounts for the features that are loaded now, and unloads features
+        as long as the budget is exceeded.
+
+        Parameters
+        ----------
+        requested: iterable of strings
+            The features requested by the current load.
+            They count as just used, and are not unloaded.
+        keep: set of strings
+            Features that are never unloaded.
+
+        Returns
+        -------
+        list
+            The names of the features that have been unloaded.
+        """
+
+        TF = self.TF
+        features = TF.features
+        sizes = self.sizes
+
+        for fName in list(sizes):
+            if not features[fName].dataLoaded:
+                del sizes[fName]
+        requested = [
+            fName
+            for fName in requested
+            if fName in features and fName not in keep and features[fName].dataLoaded
+        ]
+        for fName in requested:
+            if fName in sizes:
+                sizes.move_to_end(fName)
+            else:
+                fObj = features[fName]
+                sizes[fName] = dataSize((fObj.data, fObj.index))
+
+        requestedSet = set(requested)
+        unloaded = []
+        excess = self.total() - self.budget
+        for fName in list(sizes):
+            if excess <= 0:
+                break
+            if fName in requestedSet:
+                continue
+            excess -= sizes.pop(fName)
+            self._unload(fName)
+            unloaded.append(fName)
+        return unloaded
+
+    def _unload(self, fName):
+        TF = self.TF
+        api = TF.api
+        fObj = TF.features[fName]
+        container = api.E if fObj.isEdge else api.F
+        if fName in container.__dict__:
+            delattr(container, fName)
+        fObj.unload()
+        TF.featuresLazy.add(fName)
+        setattr(container, fName, LazyFeature(api, fName, fObj.metaData, fObj.isEdge))
+
+
+def _tracker(used):
+    def __getattribute__(self, name):
+        value = object.__getattribute__(self, name)
+        if name[0] != "_":
+            used(name)
+        return value
+
+    return __getattribute__
+
+
+def dataSize(data):
+    """Estimates the number of bytes occupied by feature data.
+
+    Objects that occur multiple times in the data are counted once.
+
+    Parameters
+    ----------
+    data: any
+        The data of a feature.
+
+    Returns
+    -------
+    integer
+    """
+
+    seen = set()
+    size = 0
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if type(obj) is memoryview:
+            size += obj.nbytes
+            continue
+        size += sys.getsizeof(obj)
+        if type(obj) is array:
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (tuple, list, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            # objects that define their state are measured by that state,
+            # without the views and caches they derive from it
+            getState = getattr(type(obj), "__getstate__", None)
+            if getState is None or getState is OBJECT_GETSTATE:
+                stack.extend(obj.__dict__.values())
+            else:
+                stack.append(obj.__getstate__())
+    return size
@@ -0,0 +1,1360 @@
+"""
+# Columnar storage of feature data
+
+Feature data is stored on disk in `.tfx` files, one per feature,
+in a directory `.tf/{PACK_VERSION}` next to the `.tf` files
+(see `tf.parameters.PACK_VERSION`).
+
+Big data, such as the canonical order, the ranks of the nodes, the slots of the
+nodes, and the values of integer features, are stored as fixed-width columns,
+which are *memory mapped* when they are loaded.
+That means that loading them costs next to nothing, and that the data will
+be shared through the page cache of the operating system by all processes that
+load the same data.
+
+The remaining data is pickled and compressed, as before.
+
+The column classes in this module are read-only containers that behave like the
+Python structures they replace:
+
+*   `RaggedColumn` behaves like a tuple of arrays;
+*   `CodedColumn` behaves like a tuple of values;
+*   `SparseColumn` and `DenseColumn` behave like dictionaries keyed by nodes,
+    see `encodeValues` and `encodeInts` for when each of them is used.
+
+`EdgeIndex` holds the edges of an edge feature, sorted in canonical order,
+and `ValueIndex` the nodes per value of a node feature.
+They are stored with the feature data in an `IndexedData` object.
+
+They work both on in-memory arrays and on memory mapped buffers.
+
+A `.tfx` file may carry a *label*, a short string that can be read
+without reading the data, see `readLabel`.
+It is used for the hash of the sources the data has been compiled from,
+see `tf.core.fileindex`.
+"""
+
+import os
+import io
+import sys
+import time
+import gzip
+import mmap
+import pickle
+import collections
+import collections.abc
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, chain, compress, count, repeat
+from operator import and_, eq, gt, lt, ne, sub
+
+from ..parameters import PICKLE_PROTOCOL, GZIP_LEVEL
+
+MAGIC = b"TFCOLS\x00\x02"
+"""The first bytes of a `.tfx` file in columnar format."""
+
+ALIGN = 8
+"""Columns start at offsets that are a multiple of this number."""
+
+INT_TYPES = (
+    ("b", -(2 ** 7), 2 ** 7 - 1),
+    ("h", -(2 ** 15), 2 ** 15 - 1),
+    ("i", -(2 ** 31), 2 ** 31 - 1),
+    ("q", -(2 ** 63), 2 ** 63 - 1),
+)
+"""Candidate type codes for columns of integer values, narrowest first."""
+
+CODE_TYPES = (
+    ("B", 2 ** 8),
+    ("H", 2 ** 16),
+    ("I", 2 ** 32),
+)
+"""Candidate type codes for columns of value codes, narrowest first."""
+
+
+class RaggedColumn(object):
+    """A sequence of integer arrays of varying length.
+
+    The arrays are stored in one flat array of values, and an array of offsets
+    into it: the *i*-th member consists of the values from `offsets[i]`
+    up to `offsets[i + 1]`.
+
+    Members are delivered as `array`s, also when the flat array is memory mapped:
+    then the members are copied out of the map.
+    Code that wants to work on the data without copying it can use the
+    `offsets` and `values` directly.
+    """
+
+    def __init__(self, offsets, values):
+        self.offsets = offsets
+        self.values = values
+        if type(values) is memoryview:
+            # members are copied straight from the bytes of the map
+            self.typecode = values.format
+            self.itemsize = values.itemsize
+            self.raw = values.cast("B")
+        else:
+            self.typecode = None
+
+    def __getstate__(self):
+        return (self.offsets, self.values)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.offsets) - 1
+        offsets = self.offsets
+        typecode = self.typecode
+        if typecode is None:
+            return self.values[offsets[i] : offsets[i + 1]]
+        itemsize = self.itemsize
+        member = array(typecode)
+        member.frombytes(self.raw[offsets[i] * itemsize : offsets[i + 1] * itemsize])
+        return member
+
+    def __iter__(self):
+        offsets = self.offsets
+        typecode = self.typecode
+        if typecode is None:
+            values = self.values
+            b = offsets[0]
+            for e in offsets[1:]:
+                yield values[b:e]
+                b = e
+            return
+        itemsize = self.itemsize
+        raw = self.raw
+        b = offsets[0] * itemsize
+        for e in offsets[1:]:
+            e *= itemsize
+            member = array(typecode)
+            member.frombytes(raw[b:e])
+            yield member
+            b = e
+
+    @classmethod
+    def fromSequence(cls, arrays, typecode="I"):
+        """Packs a sequence of integer sequences into a ragged column.
+
+        The offsets get the narrowest type code that can hold them.
+        """
+
+        if type(arrays) is not list and type(arrays) is not tuple:
+            arrays = list(arrays)
+        values = array(typecode, chain.from_iterable(arrays))
+        offsets = array("I" if len(values) < 2 ** 32 else "Q", [0])
+        offsets.extend(accumulate(map(len, arrays)))
+        return cls(offsets, values)
+
+
+class CodedColumn(object):
+    """A sequence of values, stored as codes into a table of distinct values.
+
+    Useful when there are many values but few distinct ones, such as the node types
+    of all nodes.
+    """
+
+    def __init__(self, codes, table):
+        self.codes = codes
+        self.table = table
+        self.index = None
+
+    def __getstate__(self):
+        return (self.codes, self.table)
+
+    def __setstate__(self, state):
+        (self.codes, self.table) = state
+        self.index = None
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.table[self.codes[i]]
+
+    def __iter__(self):
+        return map(self.table.__getitem__, self.codes)
+
+    def code(self, val):
+        """The code of a value.
+
+        Returns
+        -------
+        int | None
+            `None` if the value does not occur in the table.
+        """
+
+        index = self.index
+        if index is None:
+            index = {v: i for (i, v) in enumerate(self.table)}
+            self.index = index
+        return index.get(val, None)
+
+    def counts(self, b=0, e=None):
+        """Counts the values in a stretch of the column.
+
+        The counting is done on the codes, and only the distinct codes
+        are translated into values.
+
+        Parameters
+        ----------
+        b: int, optional 0
+            Start position of the stretch.
+        e: int, optional None
+            End position (exclusive) of the stretch; if `None`: the end of the column.
+
+        Returns
+        -------
+        collections.Counter
+            Keyed by value.
+        """
+
+        table = self.table
+        codes = self.codes if b == 0 and e is None else self.codes[b:e]
+        return collections.Counter(
+            {table[c]: k for (c, k) in collections.Counter(codes).items()}
+        )
+
+    @classmethod
+    def fromSequence(cls, values, reserve=()):
+        """Encodes a sequence of (hashable) values into a coded column.
+
+        Parameters
+        ----------
+        values: iterable
+            The values to encode.
+        reserve: tuple, optional ()
+            Values that will be placed at the start of the table,
+            whether they occur or not.
+
+        Returns
+        -------
+        CodedColumn | None
+            `None` if there are too many distinct values.
+        """
+
+        index = {v: i for (i, v) in enumerate(reserve)}
+        codes = [index.setdefault(v, len(index)) for v in values]
+        typecode = _codeType(len(index))
+        if typecode is None:
+            return None
+        return cls(array(typecode, codes), tuple(index))
+
+
+class SparseColumn(collections.abc.Mapping):
+    """A mapping from nodes to values, stored as two aligned columns.
+
+    The keys are the nodes that have a value, in ascending order.
+    The values are in a parallel column: an array of integers, or a
+    `CodedColumn`.
+
+    Lookup of a node is by bisection in the column of keys.
+    """
+
+    def __init__(self, keys, values):
+        self.keys_ = keys
+        self.values_ = values
+
+    def __len__(self):
+        return len(self.keys_)
+
+    def __iter__(self):
+        return iter(self.keys_)
+
+    def __contains__(self, n):
+        keys = self.keys_
+        i = bisect_left(keys, n)
+        return i < len(keys) and keys[i] == n
+
+    def __getitem__(self, n):
+        keys = self.keys_
+        i = bisect_left(keys, n)
+        if i < len(keys) and keys[i] == n:
+            return self.values_[i]
+        raise KeyError(n)
+
+    def get(self, n, default=None):
+        keys = self.keys_
+        i = bisect_left(keys, n)
+        if i < len(keys) and keys[i] == n:
+            return self.values_[i]
+        return default
+
+    def gets(self, nodes):
+        """The values of a sequence of nodes.
+
+        Parameters
+        ----------
+        nodes: iterable of int
+
+        Returns
+        -------
+        list
+            The value for each node, `None` for nodes without a value.
+        """
+
+        keys = self.keys_
+        values = self.values_
+        size = len(keys)
+        nodes = _sequence(nodes)
+        coded = type(values) is CodedColumn
+        if len(nodes) * 16 > size:
+            # many nodes: a dictionary pays off against bisection for every node
+            if coded:
+                values = map(values.table.__getitem__, values.codes)
+            return list(map(dict(zip(keys, values)).get, nodes))
+        positions = map(bisect_left, repeat(keys), nodes)
+        if coded:
+            table = values.table
+            codes = values.codes
+            return [
+                table[codes[i]] if i < size and keys[i] == n else None
+                for (n, i) in zip(nodes, positions)
+            ]
+        return [
+            values[i] if i < size and keys[i] == n else None
+            for (n, i) in zip(nodes, positions)
+        ]
+
+    def keys(self):
+        return self.keys_
+
+    def values(self):
+        return self.values_
+
+    def items(self):
+        return zip(self.keys_, self.values_)
+
+    def find(self, val):
+        """All nodes that have a given value.
+
+        Returns
+        -------
+        list of int
+            The nodes in ascending order.
+        """
+
+        values = self.values_
+        if type(values) is CodedColumn:
+            code = values.code(val)
+            if code is None:
+                return []
+            return list(compress(self.keys_, map(code.__eq__, values.codes)))
+        return list(compress(self.keys_, map(eq, repeat(val), values)))
+
+    def inRange(self, lo=None, hi=None):
+        """All nodes that have a value strictly between two bounds.
+
+        Parameters
+        ----------
+        lo: int, optional None
+            The values must be greater than this; if `None`: no lower bound.
+        hi: int, optional None
+            The values must be less than this; if `None`: no upper bound.
+
+        Returns
+        -------
+        list of int | None
+            The nodes in ascending order.
+            `None` if the values are not numeric.
+        """
+
+        values = self.values_
+        if type(values) is CodedColumn:
+            return None
+        return list(compress(self.keys_, _between(values, lo, hi)))
+
+    def counts(self, intervals=None):
+        """Counts the values, optionally only for nodes in given intervals.
+
+        Parameters
+        ----------
+        intervals: iterable of 2-tuple of int, optional None
+            If given, only the nodes `n` with `b <= n <= e` for a `(b, e)`
+            in `intervals` are counted.
+
+        Returns
+        -------
+        collections.Counter
+            Keyed by value.
+        """
+
+        keys = self.keys_
+        values = self.values_
+        coded = type(values) is CodedColumn
+        if intervals is None:
+            intervals = ((keys[0], keys[-1]),) if len(keys) else ()
+        result = collections.Counter()
+        for (b, e) in intervals:
+            kb = bisect_left(keys, b)
+            ke = bisect_left(keys, e + 1)
+            if kb >= ke:
+                continue
+            if coded:
+                result.update(values.counts(kb, ke))
+            else:
+                result.update(values[kb:ke])
+        return result
+
+    @classmethod
+    def fromIntDict(cls, data):
+        """Packs a dictionary of integers keyed by nodes into a sparse column.
+
+        Returns
+        -------
+        SparseColumn | None
+            `None` if the values do not fit in a 64-bit integer
+            or if the data contains values that are not integers.
+        """
+
+        if not all(type(v) is int for v in data.values()):
+            return None
+        keys = sorted(data)
+        typecode = _intType(data.values())
+        if typecode is None:
+            return None
+        return cls(array("I", keys), array(typecode, (data[n] for n in keys)))
+
+
+class DenseColumn(collections.abc.Mapping):
+    """A mapping from a range of nodes to values, stored as one column.
+
+    The column has an entry for every node from `first` onwards, up to the
+    last node that has a value. Nodes without a value have the entry `missing`.
+
+    Lookup of a node is by direct indexing in the column.
+    """
+
+    def __init__(self, first, values, missing, count):
+        self.first = first
+        self.values_ = values
+        self.missing = missing
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return compress(count(self.first), self._present())
+
+    def __contains__(self, n):
+        i = n - self.first
+        values = self.values_
+        return 0 <= i < len(values) and values[i] != self.missing
+
+    def __getitem__(self, n):
+        i = n - self.first
+        values = self.values_
+        if 0 <= i < len(values):
+            v = values[i]
+            if v != self.missing:
+                return v
+        raise KeyError(n)
+
+    def get(self, n, default=None):
+        i = n - self.first
+        values = self.values_
+        if 0 <= i < len(values):
+            v = values[i]
+            if v != self.missing:
+                return v
+        return default
+
+    def gets(self, nodes):
+        """The values of a sequence of nodes.
+
+        See `SparseColumn.gets`.
+        """
+
+        values = self.values_
+        missing = self.missing
+        size = len(values)
+        positions = map(sub, nodes, repeat(self.first))
+        if type(values) is CodedColumn:
+            table = values.table
+            codes = values.codes
+            result = [table[codes[i]] if 0 <= i < size else None for i in positions]
+        else:
+            result = [values[i] if 0 <= i < size else None for i in positions]
+        if missing is not None:
+            result = [None if v == missing else v for v in result]
+        return result
+
+    def items(self):
+        return compress(zip(count(self.first), self.values_), self._present())
+
+    def _present(self):
+        # for every entry whether it is not missing, compared on the codes if coded
+        values = self.values_
+        missing = self.missing
+        if type(values) is CodedColumn:
+            missing = values.code(missing)
+            values = values.codes
+            if missing is None:
+                return repeat(True, len(values))
+        return map(ne, repeat(missing), values)
+
+    def find(self, val):
+        """All nodes that have a given value.
+
+        Returns
+        -------
+        list of int
+            The nodes in ascending order.
+        """
+
+        if val == self.missing:
+            return []
+        values = self.values_
+        first = self.first
+        nodes = range(first, first + len(values))
+        if type(values) is CodedColumn:
+            code = values.code(val)
+            if code is None:
+                return []
+            return list(compress(nodes, map(code.__eq__, values.codes)))
+        return list(compress(nodes, map(eq, repeat(val), values)))
+
+    def inRange(self, lo=None, hi=None):
+        """All nodes that have a value strictly between two bounds.
+
+        See `SparseColumn.inRange`.
+        """
+
+        values = self.values_
+        if type(values) is CodedColumn:
+            return None
+        missing = self.missing
+        first = self.first
+        nodes = range(first, first + len(values))
+        # the missing value is below all values, so it fails a lower bound
+        lo = missing if lo is None or lo < missing else lo
+        return list(compress(nodes, _between(values, lo, hi)))
+
+    def counts(self, intervals=None):
+        """Counts the values, optionally only for nodes in given intervals.
+
+        See `SparseColumn.counts`.
+        """
+
+        values = self.values_
+        first = self.first
+        coded = type(values) is CodedColumn
+        if intervals is None:
+            intervals = ((first, first + len(values) - 1),)
+        result = collections.Counter()
+        for (b, e) in intervals:
+            kb = max(b - first, 0)
+            ke = min(e + 1 - first, len(values))
+            if kb >= ke:
+                continue
+            if coded:
+                result.update(values.counts(kb, ke))
+            else:
+                result.update(values[kb:ke])
+        result.pop(self.missing, None)
+        return result
+
+
+class EdgeIndex(object):
+    """The edges of an edge feature per node, in canonical order.
+
+    There are three directions: `f` for the edges *from* a node,
+    `t` for the edges *to* a node, and `b` for *both*.
+    For each direction we store a `RaggedColumn` with, for each node that has
+    edges in that direction, the nodes at the other side of the edges,
+    in canonical order (`tf.core.nodes`), and, if the edges have values,
+    a `CodedColumn` with the corresponding values.
+
+    Just as with `DenseColumn` and `SparseColumn`, the column has either a member
+    for every node in the range of nodes with edges, which are then looked up
+    by direct indexing, or only members for the nodes with edges,
+    which are then looked up by bisection in a column of those nodes.
+
+    The canonical order depends on the whole corpus, so the index records
+    a digest of the canonical order for which it has been made.
+    """
+
+    def __init__(self, digest, columns):
+        self.digest = digest
+        self.columns = columns
+
+    def getter(self, kind):
+        """A function that delivers the edges of a node in a direction.
+
+        Parameters
+        ----------
+        kind: string
+            `f`, `t` or `b`.
+
+        Returns
+        -------
+        function
+            It takes a node and returns a tuple of the nodes at the other side
+            of its edges, or, if the edges have values, the pairs of those nodes
+            and the values.
+        """
+
+        (first, nodes, column, values) = self.columns[kind]
+        offsets = column.offsets
+        targets = column.values
+        if nodes is None:
+            end = len(offsets) - 1 + first
+
+            def position(n):
+                return n - first if first <= n < end else None
+
+        else:
+            # a dictionary is much faster than bisection in a memory mapped column
+            positions = dict(zip(nodes, range(len(nodes))))
+            position = positions.get
+
+        if values is None:
+
+            def get(n):
+                i = position(n)
+                if i is None:
+                    return ()
+                return tuple(targets[offsets[i] : offsets[i + 1]])
+
+        else:
+            table = values.table
+            codes = values.codes
+
+            def get(n):
+                i = position(n)
+                if i is None:
+                    return ()
+                b = offsets[i]
+                e = offsets[i + 1]
+                return tuple(zip(targets[b:e], map(table.__getitem__, codes[b:e])))
+
+        return get
+
+    def count(self, kind, b, e):
+        """The number of edges of the nodes in a range, in a direction.
+
+        The nodes of a type form a range, so this gives the number of edges
+        from or to the nodes of a type.
+
+        Parameters
+        ----------
+        kind: string
+            `f`, `t` or `b`.
+        b: int
+            The first node of the range.
+        e: int
+            The last node of the range.
+
+        Returns
+        -------
+        int
+        """
+
+        (first, nodes, column, values) = self.columns[kind]
+        offsets = column.offsets
+        if nodes is None:
+            end = len(offsets) - 1 + first
+            i = min(max(b, first), end) - first
+            j = min(max(e + 1, first), end) - first
+        else:
+            i = bisect_left(nodes, b)
+            j = bisect_right(nodes, e)
+        return offsets[j] - offsets[i] if j > i else 0
+
+    @classmethod
+    def fromEdges(cls, data, doValues, rank, digest):
+        """Indexes the edges of an edge feature.
+
+        Parameters
+        ----------
+        data: dict
+            The data of the edge feature: for each node the set of nodes
+            it has edges to, or, if the edges have values, the dictionary of
+            those nodes with the values.
+        doValues: boolean
+            Whether the edges have values.
+        rank: array
+            The data of the *rank* precompute step.
+        digest: string
+            The digest of the canonical order.
+
+        Returns
+        -------
+        EdgeIndex
+        """
+
+        # an edge from n to m is represented by one integer that sorts
+        # first on n and then on the rank of m
+        width = len(rank)
+        canonical = array("I", [0]) * width
+        for (i, r) in enumerate(rank):
+            canonical[r] = i + 1
+        fKeys = []
+        tKeys = []
+        for (n, ms) in data.items():
+            nKey = (n - 1) * width
+            nRank = rank[n - 1]
+            for m in ms:
+                fKeys.append(nKey + rank[m - 1])
+                tKeys.append((m - 1) * width + nRank)
+        bKeys = set(fKeys)
+        bKeys.update(tKeys)
+        bKeys = list(bKeys)
+
+        if doValues:
+
+            def fValue(n, m):
+                return data[n][m]
+
+            def tValue(n, m):
+                return data[m][n]
+
+            def bValue(n, m):
+                vals = data.get(n, None)
+                return vals[m] if vals is not None and m in vals else data[m][n]
+
+        else:
+            fValue = tValue = bValue = None
+
+        columns = {}
+        for (kind, keys, getValue) in (
+            ("f", fKeys, fValue),
+            ("t", tKeys, tValue),
+            ("b", bKeys, bValue),
+        ):
+            keys.sort()
+            nodes = array("I")
+            starts = []
+            prev = None
+            for (i, key) in enumerate(keys):
+                n = key // width
+                if n != prev:
+                    nodes.append(n + 1)
+                    starts.append(i)
+                    prev = n
+            starts.append(len(keys))
+            first = nodes[0] if nodes else 1
+            span = nodes[-1] - first + 1 if nodes else 0
+            if span <= 2 * len(nodes):
+                # dense: empty members for the nodes without edges
+                lengths = [0] * span
+                for (i, n) in enumerate(nodes):
+                    lengths[n - first] = starts[i + 1] - starts[i]
+                offsets = [0]
+                offsets.extend(accumulate(lengths))
+                nodes = None
+            else:
+                offsets = starts
+            column = RaggedColumn(
+                array("I" if len(keys) < 2 ** 32 else "Q", offsets),
+                array("I", (canonical[key % width] for key in keys)),
+            )
+            values = (
+                None
+                if getValue is None
+                else CodedColumn.fromSequence(
+                    getValue(key // width + 1, canonical[key % width]) for key in keys
+                )
+            )
+            columns[kind] = (first, nodes, column, values)
+        return cls(digest, columns)
+
+
+class ValueIndex(object):
+    """The nodes per value of a node feature, in canonical order.
+
+    There is a table of the distinct values, and a `RaggedColumn`
+    with for each value the nodes that have that value, in canonical order
+    (`tf.core.nodes`).
+
+    For each node type there are two columns: the positions in the table of the
+    values that occur for nodes of that type, and how often they occur.
+
+    The canonical order and the node types depend on the whole corpus,
+    so the index records a digest of them.
+    """
+
+    def __init__(self, digest, table, nodes, typeCounts):
+        self.digest = digest
+        self.table = table
+        self.nodes = nodes
+        self.typeCounts = typeCounts
+        self.positions = None
+        self.sortedTable = None
+
+    def __getstate__(self):
+        return (self.digest, self.table, self.nodes, self.typeCounts)
+
+    def __setstate__(self, state):
+        (self.digest, self.table, self.nodes, self.typeCounts) = state
+        self.positions = None
+        self.sortedTable = None
+
+    def find(self, val):
+        """All nodes that have a given value.
+
+        Returns
+        -------
+        tuple of int
+            The nodes in canonical order.
+        """
+
+        i = self._positions().get(val, None)
+        return () if i is None else tuple(self.nodes[i])
+
+    def findSet(self, vals):
+        """All nodes that have one of given values.
+
+        Parameters
+        ----------
+        vals: iterable
+            The values in question.
+
+        Returns
+        -------
+        set of int
+        """
+
+        positions = self._positions()
+        return self._union(
+            i for i in map(positions.get, vals, repeat(None)) if i is not None
+        )
+
+    def findWhere(self, condition):
+        """All nodes whose value satisfies a condition.
+
+        The condition is evaluated once for every distinct value,
+        not for every node.
+
+        Parameters
+        ----------
+        condition: function
+            Called with a value, should return whether it is satisfied.
+
+        Returns
+        -------
+        set of int
+        """
+
+        return self._union(i for (i, val) in enumerate(self.table) if condition(val))
+
+    def findRange(self, lo, hi):
+        """All nodes with an integer value in a range.
+
+        The values are looked up by bisection in the sorted distinct values.
+
+        Parameters
+        ----------
+        lo: int | None
+            The values must be greater than this, if it is not `None`.
+        hi: int | None
+            The values must be less than this, if it is not `None`.
+
+        Returns
+        -------
+        set of int | None
+            `None` if not all values are integers.
+        """
+
+        sortedTable = self.sortedTable
+        if sortedTable is None:
+            table = self.table
+            if not all(type(val) is int for val in table):
+                return None
+            positions = sorted(range(len(table)), key=table.__getitem__)
+            sortedTable = ([table[i] for i in positions], positions)
+            self.sortedTable = sortedTable
+        (values, positions) = sortedTable
+        b = 0 if lo is None else bisect_right(values, lo)
+        e = len(values) if hi is None else bisect_left(values, hi)
+        return self._union(positions[b:e])
+
+    def _union(self, positions):
+        nodes = self.nodes
+        result = set()
+        for i in positions:
+            result.update(nodes[i])
+        return result
+
+    def _positions(self):
+        positions = self.positions
+        if positions is None:
+            positions = dict(zip(self.table, range(len(self.table))))
+            self.positions = positions
+        return positions
+
+    def counts(self, nodeTypes=None):
+        """Counts the values, optionally only for nodes of given types.
+
+        Parameters
+        ----------
+        nodeTypes: iterable of string, optional None
+            If given, only the nodes of these types are counted.
+
+        Returns
+        -------
+        collections.Counter
+            Keyed by value.
+        """
+
+        table = self.table
+        if nodeTypes is None:
+            offsets = self.nodes.offsets
+            return collections.Counter(
+                {table[i]: offsets[i + 1] - offsets[i] for i in range(len(table))}
+            )
+        result = collections.Counter()
+        for nodeType in nodeTypes:
+            typeCounts = self.typeCounts.get(nodeType, None)
+            if typeCounts is None:
+                continue
+            (codes, counts) = typeCounts
+            result.update(dict(zip(map(table.__getitem__, codes), counts)))
+        return result
+
+    @classmethod
+    def fromValues(cls, data, rank, levels, digest):
+        """Indexes the values of a node feature.
+
+        Parameters
+        ----------
+        data: dict | SparseColumn | DenseColumn
+            The data of the node feature.
+        rank: array
+            The data of the *rank* precompute step.
+        levels: tuple
+            The data of the *levels* precompute step.
+        digest: string
+            The digest of the canonical order and the node types.
+
+        Returns
+        -------
+        ValueIndex
+        """
+
+        # a node n with value v is represented by one integer that sorts
+        # first on the position of v in the table and then on the rank of n
+        width = len(rank)
+        canonical = array("I", [0]) * width
+        for (i, r) in enumerate(rank):
+            canonical[r] = i + 1
+        starts = sorted((x[2], x[3], x[0]) for x in levels)
+        firsts = [x[0] for x in starts]
+        positions = {}
+        keys = []
+        typeCounts = {}
+        for (n, v) in data.items():
+            i = positions.setdefault(v, len(positions))
+            keys.append(i * width + rank[n - 1])
+            (first, last, nodeType) = starts[bisect_right(firsts, n) - 1]
+            if first <= n <= last:
+                counts = typeCounts.setdefault(nodeType, {})
+                counts[i] = counts.get(i, 0) + 1
+        keys.sort()
+        lengths = [0] * len(positions)
+        for (i, k) in collections.Counter(key // width for key in keys).items():
+            lengths[i] = k
+        offsets = array("I", [0])
+        offsets.extend(accumulate(lengths))
+        nodes = RaggedColumn(
+            offsets, array("I", (canonical[key % width] for key in keys))
+        )
+        typeCounts = {
+            nodeType: (
+                array(_codeType(len(positions)), sorted(counts)),
+                array("I", (counts[i] for i in sorted(counts))),
+            )
+            for (nodeType, counts) in typeCounts.items()
+        }
+        return cls(digest, tuple(positions), nodes, typeCounts)
+
+
+class IndexedData(object):
+    """The data of a feature together with its index, as stored in a `.tfx` file.
+
+    The index is an `EdgeIndex` or a `ValueIndex`.
+    """
+
+    def __init__(self, data, index):
+        self.data = data
+        self.index = index
+
+
+def encodeValues(data):
+    """Dictionary-encodes the values of a node feature.
+
+    The distinct values are stored in a table, and for every node the code
+    of its value in that table is stored in a narrow integer column.
+
+    If the nodes with a value are dense enough in the range of nodes
+    that they span, the codes are stored in a `DenseColumn`, indexed by node.
+    Otherwise in a `SparseColumn`, next to the nodes.
+    The dense column takes one code per node in the range,
+    the sparse column takes a code plus a node per node with a value,
+    we choose the one that takes the least space.
+
+    Parameters
+    ----------
+    data: dict
+        The feature data, keyed by node.
+
+    Returns
+    -------
+    DenseColumn | SparseColumn | None
+        `None` if there are too many distinct values, or no values at all.
+    """
+
+    if not data:
+        return None
+    keys = sorted(data)
+    first = keys[0]
+    span = keys[-1] - first + 1
+    coded = CodedColumn.fromSequence((data[n] for n in keys), reserve=(None,))
+    if coded is None:
+        return None
+    itemsize = coded.codes.itemsize
+    if span * itemsize <= len(keys) * (itemsize + array("I").itemsize):
+        codes = array(coded.codes.typecode, bytes(span * itemsize))
+        for (n, c) in zip(keys, coded.codes):
+            codes[n - first] = c
+        return DenseColumn(first, CodedColumn(codes, coded.table), None, len(keys))
+    return SparseColumn(array("I", keys), coded)
+
+
+def encodeInts(data):
+    """Packs the values of an integer node feature into a column.
+
+    If the nodes with a value are dense enough in the range of nodes
+    that they span, the values are stored in a `DenseColumn`, indexed by node,
+    with a value below all values for the nodes without a value.
+    Otherwise in a `SparseColumn`, next to the nodes.
+    As in `encodeValues`, we choose the one that takes the least space.
+
+    Parameters
+    ----------
+    data: dict
+        The feature data, keyed by node.
+
+    Returns
+    -------
+    DenseColumn | SparseColumn | None
+        `None` if the values do not fit in a 64-bit integer, or if the data
+        contains values that are not integers, or no values at all.
+    """
+
+    if not data or not all(type(v) is int for v in data.values()):
+        return None
+    lo = min(data.values())
+    hi = max(data.values())
+    typecode = _intType((lo - 1, hi))
+    if typecode is None:
+        return SparseColumn.fromIntDict(data)
+    keys = sorted(data)
+    first = keys[0]
+    span = keys[-1] - first + 1
+    itemsize = array(typecode).itemsize
+    if span * itemsize > len(keys) * (itemsize + array("I").itemsize):
+        return SparseColumn.fromIntDict(data)
+    missing = next(tlo for (tc, tlo, thi) in INT_TYPES if tc == typecode)
+    values = array(typecode, [missing]) * span
+    for n in keys:
+        values[n - first] = data[n]
+    return DenseColumn(first, values, missing, len(keys))
+
+
+def columnize(data):
+    """Converts feature data into columnar data where that pays off.
+
+    The conversion is shallow: only the data itself and the members of
+    tuples at the top levels are considered.
+
+    *   tuples of arrays become `RaggedColumn`s;
+    *   tuples of strings become `CodedColumn`s.
+
+    Parameters
+    ----------
+    data: any
+        The data of a feature or of a precomputed component.
+
+    Returns
+    -------
+    any
+        Data that is equivalent to the original data.
+    """
+
+    return _columnize(data, 0)
+
+
+def _columnize(data, depth):
+    if type(data) is not tuple or len(data) == 0:
+        return data
+    first = data[0]
+    if type(first) is array and all(type(x) is array for x in data):
+        return RaggedColumn.fromSequence(data, typecode=first.typecode)
+    if type(first) is str and len(data) > 1 and all(type(x) is str for x in data):
+        coded = CodedColumn.fromSequence(data)
+        return data if coded is None else coded
+    if depth >= 2:
+        return data
+    return tuple(_columnize(x, depth + 1) for x in data)
+
+
+def _sequence(nodes):
+    # nodes that can be iterated over more than once
+    if type(nodes) in {list, tuple, range, array}:
+        return nodes
+    return list(nodes)
+
+
+def _between(values, lo, hi):
+    # for every value whether it is strictly between lo and hi
+    # comparisons are mapped over the whole column, not done node by node
+    if lo is None and hi is None:
+        return repeat(True, len(values))
+    if hi is None:
+        return map(lt, repeat(lo), values)
+    if lo is None:
+        return map(gt, repeat(hi), values)
+    if type(lo) is int and type(hi) is int:
+        return map(range(lo + 1, hi).__contains__, values)
+    return map(and_, map(lt, repeat(lo), values), map(gt, repeat(hi), values))
+
+
+def _intType(values):
+    if not values:
+        return INT_TYPES[0][0]
+    lo = min(values)
+    hi = max(values)
+    for (typecode, tlo, thi) in INT_TYPES:
+        if tlo <= lo and hi <= thi:
+            return typecode
+    return None
+
+
+def _codeType(n):
+    for (typecode, limit) in CODE_TYPES:
+        if n <= limit:
+            return typecode
+    return None
+
+
+class _Packer(pickle.Pickler):
+    def __init__(self, fh, columns):
+        super().__init__(fh, protocol=PICKLE_PROTOCOL)
+        self.columns = columns
+
+    def persistent_id(self, obj):
+        tp = type(obj)
+        if tp is array:
+            typecode = obj.typecode
+        elif tp is memoryview:
+            typecode = obj.format
+        else:
+            return None
+        columns = self.columns
+        columns.append((typecode, obj))
+        return len(columns) - 1
+
+
+class _Unpacker(pickle.Unpickler):
+    def __init__(self, fh, columns):
+        super().__init__(fh)
+        self.columns = columns
+
+    def persistent_load(self, pid):
+        return self.columns[pid]
+
+
+def writeColumns(path, data, label=""):
+    """Writes data to a `.tfx` file in columnar format.
+
+    All arrays in the data are written as raw columns, the rest is pickled
+    and compressed.
+
+    The file is written under a temporary name first, and then moved into place.
+    In that way, processes that have the previous version of the file memory mapped
+    are not affected.
+
+    Parameters
+    ----------
+    path: string
+        The path of the file to write.
+    data: any
+        The data to write.
+    label: string, optional ""
+        A label to write in front of the data, see `readLabel`.
+    """
+
+    tmpPath = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmpPath, "wb") as fh:
+            _writePacked(fh, data, label)
+        os.replace(tmpPath, path)
+    finally:
+        if os.path.exists(tmpPath):
+            os.unlink(tmpPath)
+
+
+def packColumns(data):
+    """Packs data in columnar format in memory.
+
+    The result is what `writeColumns` would write to a file.
+
+    Parameters
+    ----------
+    data: any
+        The data to pack.
+
+    Returns
+    -------
+    memoryview
+    """
+
+    fh = io.BytesIO()
+    _writePacked(fh, data, "")
+    return fh.getbuffer()
+
+
+def _writePacked(fh, data, label):
+    label = label.encode("utf8")
+    columns = []
+    sink = io.BytesIO()
+    with gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=GZIP_LEVEL) as gz:
+        _Packer(gz, columns).dump(data)
+    header = sink.getvalue()
+
+    specs = []
+    offset = _aligned(len(MAGIC) + 8 + len(label) + 8 + len(header))
+    for (typecode, col) in columns:
+        nbytes = len(col) * col.itemsize
+        specs.append((typecode, offset, len(col)))
+        offset = _aligned(offset + nbytes)
+    specsPickled = pickle.dumps((sys.byteorder, specs), protocol=PICKLE_PROTOCOL)
+
+    fh.write(MAGIC)
+    fh.write(len(label).to_bytes(8, "little"))
+    fh.write(label)
+    fh.write(len(header).to_bytes(8, "little"))
+    fh.write(header)
+    for ((typecode, col), (tc, colOffset, n)) in zip(columns, specs):
+        fh.write(bytes(colOffset - fh.tell()))
+        fh.write(memoryview(col).cast("B"))
+    fh.write(bytes(_aligned(fh.tell()) - fh.tell()))
+    fh.write(specsPickled)
+    fh.write(len(specsPickled).to_bytes(8, "little"))
+
+
+def readLabel(path):
+    """Reads the label of a `.tfx` file, without reading the data.
+
+    Parameters
+    ----------
+    path: string
+        The path of the file.
+
+    Returns
+    -------
+    string | None
+        The label, possibly empty.
+        `None` if the file does not exist or is not in the current columnar format.
+    """
+
+    lMagic = len(MAGIC)
+    try:
+        with open(path, "rb") as fh:
+            if fh.read(lMagic) != MAGIC:
+                return None
+            lLabel = int.from_bytes(fh.read(8), "little")
+            label = fh.read(lLabel)
+    except OSError:
+        return None
+    return label.decode("utf8") if len(label) == lLabel else None
+
+
+def readColumns(path, stats=None):
+    """Reads data from a `.tfx` file in columnar format.
+
+    The columns are not read, but memory mapped.
+
+    Parameters
+    ----------
+    path: string
+        The path of the file to read.
+    stats: dict, optional `None`
+        If given, statistics of the reading will be added to it,
+        see `unpackColumns`.
+
+    Returns
+    -------
+    any
+        The data as it has been written, except that arrays have been replaced
+        by `memoryview`s on the memory mapped file.
+
+    Raises
+    ------
+    ValueError
+        If the file is not in columnar format or has been written on a machine
+        with a different byte order.
+    """
+
+    with open(path, "rb") as fh:
+        buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    return unpackColumns(buffer, stats=stats)
+
+
+def unpackColumns(buffer, stats=None):
+    """Reconstructs data from a buffer with the contents of a `.tfx` file.
+
+    Parameters
+    ----------
+    buffer: buffer
+        Typically a memory mapped file.
+    stats: dict, optional `None`
+        If given, the following amounts will be added to its members:
+
+        *   `bytes`: the size of the buffer;
+        *   `decompress`: the time spent on decompressing the pickled part;
+        *   `unpickle`: the time spent on unpickling it.
+
+    Returns
+    -------
+    any
+        See `readColumns`.
+    """
+
+    mv = memoryview(buffer)
+    lMagic = len(MAGIC)
+    if bytes(mv[0:lMagic]) != MAGIC:
+        raise ValueError("not a columnar TF data file")
+    b = lMagic + 8 + int.from_bytes(mv[lMagic : lMagic + 8], "little")
+    lHeader = int.from_bytes(mv[b : b + 8], "little")
+    start = time.perf_counter()
+    header = gzip.decompress(mv[b + 8 : b + 8 + lHeader])
+    decompressed = time.perf_counter()
+    lSpecs = int.from_bytes(mv[-8:], "little")
+    (byteorder, specs) = pickle.loads(mv[-8 - lSpecs : -8])
+    if byteorder != sys.byteorder:
+        raise ValueError(f"data has been written with byte order {byteorder}")
+
+    columns = []
+    for (typecode, offset, n) in specs:
+        itemsize = array(typecode).itemsize
+        columns.append(mv[offset : offset + n * itemsize].cast(typecode))
+    data = _Unpacker(io.BytesIO(header), columns).load()
+    if stats is not None:
+        stats["bytes"] = stats.get("bytes", 0) + len(mv)
+        stats["decompress"] = stats.get("decompress", 0) + decompressed - start
+        stats["unpickle"] = (
+            stats.get("unpickle", 0) + time.perf_counter() - decompressed
+        )
+    return data
+
+
+def _aligned(n):
+    return n + (-n % ALIGN)
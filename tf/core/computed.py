@@ -27,6 +27,12 @@ so we have made it accessible in the `tf.core.computed.Computeds`-api.
 """
 
 
+from array import array
+
+from .arrays import hasNumpy, raggedMatrix
+from .columns import RaggedColumn
+
+
 class Computeds(object):
     pass
 
@@ -40,3 +46,44 @@ class Computed(object):
     def __init__(self, api, data):
         self.api = api
         self.data = data
+
+    def toCSR(self):
+        """Get the data as a SciPy sparse matrix.
+
+        This works for the data that has, for every node or for every non-slot node,
+        a sequence of related nodes, such as the embedders in `C.levUp` and
+        the embeddees in `C.levDown`.
+        See `tf.core.arrays`.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix | None
+            The entry at `(n, m)` is `True` if `m` is related to `n`.
+            `None` if NumPy or SciPy are not installed, or if the data is not
+            of the required shape.
+        """
+
+        api = self.api
+        error = api.TF.error
+        if not hasNumpy(error, scipy=True):
+            return None
+        Fotype = api.F.otype
+        maxSlot = Fotype.maxSlot
+        maxNode = Fotype.maxNode
+        data = self.data
+        if type(data) is not RaggedColumn and not (
+            type(data) is tuple and all(type(x) is array for x in data)
+        ):
+            error("This data cannot be represented as a matrix of nodes")
+            return None
+        first = (
+            1
+            if len(data) == maxNode
+            else maxSlot + 1
+            if len(data) == maxNode - maxSlot
+            else None
+        )
+        if first is None:
+            error("This data does not have a member for every node")
+            return None
+        return raggedMatrix(data, first, maxNode + 1)
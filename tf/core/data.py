@@ -1,23 +1,44 @@
 import os
-import pickle
-import gzip
-import collections
-from array import array
+import hashlib
 import time
 from datetime import datetime
-from ..parameters import PACK_VERSION, PICKLE_PROTOCOL, GZIP_LEVEL
+from ..parameters import PACK_VERSION
 from .helpers import (
-    setFromSpec,
-    valueFromTf,
     tfFromValue,
     specFromRanges,
     rangesFromSet,
     check32,
     console,
+    memoryUsage,
+)
+from .timestamp import Timestamp
+from .readtf import readDataTf
+from .columns import (
+    EdgeIndex,
+    IndexedData,
+    RaggedColumn,
+    ValueIndex,
+    columnize,
+    encodeInts,
+    encodeValues,
+    readColumns,
+    writeColumns,
 )
 
 ERROR_CUTOFF = 20
 
+HASH_ABSENT = ":absent"
+"""The hash of a dependency that is not present, such as a missing `otext` feature.
+
+See `tf.core.fileindex`, content hashes.
+"""
+
+INDEX_UNSAVED = set()
+"""The directories where indexes of features could not be saved.
+
+See `tf.core.data.Data.indexEdges` and `tf.core.data.Data.indexValues`.
+"""
+
 WARP = (
     "otype",
     "oslots",
@@ -54,6 +75,8 @@ class Data(object):
         metaData={},
         method=None,
         dependencies=None,
+        fileIndex=None,
+        profile=None,
     ):
         (dirName, baseName) = os.path.split(path)
         (fileName, extension) = os.path.splitext(baseName)
@@ -64,16 +87,27 @@ class Data(object):
         self.extension = extension
         self.binDir = f"{dirName}/.tf/{PACK_VERSION}"
         self.binPath = f"{self.binDir}/{self.fileName}.tfx"
+        self.localBinPath = self.binPath
         self.edgeValues = edgeValues
         self.isEdge = isEdge
         self.isConfig = isConfig
         self.metaData = metaData
         self.method = method
         self.dependencies = dependencies
+        self.fileIndex = (
+            fileIndex if fileIndex is not None and fileIndex.covers(path) else None
+        )
         self.data = data
+        self.index = None
         self.dataLoaded = False
         self.dataError = False
         self.dataType = "str"
+        self.preloaded = None
+        self.sourceHash = None
+        self.binHashOk = None
+        self.dataHash = None
+        self.profile = profile
+        self.stats = {}
 
     def load(self, metaOnly=False, silent=None):
         tmObj = self.tmObj
@@ -87,6 +121,9 @@ class Data(object):
             wasSilent = isSilent()
             setSilent(silent)
         indent(level=1, reset=True)
+        if not self.preloaded:
+            self._startStats()
+        self._resolveBin()
         origTime = self._getModified()
         binTime = self._getModified(bin=True)
         sourceRep = (
@@ -96,6 +133,7 @@ class Data(object):
         )
         msgFormat = "{:<1} {:<20} from {}"
         actionRep = ""
+        elapsed = None
         good = True
 
         if self.dataError:
@@ -104,13 +142,15 @@ class Data(object):
             actionRep = "E"
             good = False
         elif self.dataLoaded and (
-            self.isConfig
-            or (
-                (not origTime or self.dataLoaded >= origTime)
-                and (not binTime or self.dataLoaded >= binTime)
-            )
+            self.isConfig or self._loadedIsCurrent(origTime, binTime)
         ):
             actionRep = "="  # loaded and up to date
+            if self.preloaded:
+                # loaded in parallel, see tf.core.parallel
+                (actionRep, elapsed) = self.preloaded
+                self.preloaded = None
+                if elapsed is not None:
+                    msgFormat += f" in {elapsed:.2f}s"
         elif not origTime and not binTime:
             actionRep = "X"  # no source and no binary present
             good = False
@@ -119,7 +159,7 @@ class Data(object):
                 if not origTime:
                     actionRep = "b"
                     good = self._readDataBin()
-                elif not binTime or origTime > binTime:
+                elif self._binIsStale(origTime, binTime):
                     actionRep = "C" if self.method else "T"
                     good = (
                         self._compute(metaOnly=metaOnly)
@@ -142,9 +182,13 @@ class Data(object):
             except MemoryError:
                 console(MEM_MSG)
                 good = False
-        if self.isConfig:
+        if self.isConfig and self._getMtime(self.binPath) is not None:
             self.cleanDataBin()
+        if actionRep != "=":
+            self._addProfile(actionRep, good, elapsed=elapsed)
         if good:
+            if actionRep in "bBCT":
+                self.dataHash = self.sourceHash
             if actionRep != "=" and not (
                 actionRep == "M" or (actionRep == "B" and self.method)
             ):
@@ -161,10 +205,169 @@ class Data(object):
             setSilent(wasSilent)
         return good
 
+    def needsCompile(self):
+        """Whether the binary data of this feature must be (re)compiled from source.
+
+        Only for features that are read from `.tf` files,
+        not for precomputed data.
+        """
+
+        if self.method or self.dataLoaded or self.dataError:
+            return False
+        if not os.path.exists(self.path):
+            return False
+        self._resolveBin()
+        return self._binIsStale(self._getModified(), self._getModified(bin=True))
+
+    def needsCompute(self):
+        """Whether the binary data of this precomputed data must be (re)computed.
+
+        Only for precomputed data, not for features that are read from `.tf` files.
+        """
+
+        if not self.method or self.dataLoaded or self.dataError:
+            return False
+        self._resolveBin()
+        return self._binIsStale(self._getModified(), self._getModified(bin=True))
+
+    def preload(self, actionRep=None, elapsed=0):
+        """Loads up-to-date binary data without reporting.
+
+        The next call to `load()` will find the data loaded and will make the report.
+
+        This method does not load anything if the binary data is missing
+        or outdated, nor if the feature is a config feature.
+        Nor does it report errors: it leaves the feature unloaded,
+        and the next call to `load()` will redo the job and report the errors.
+
+        Parameters
+        ----------
+        actionRep: string, optional `None`
+            The action to report. If `None`, it is `B` or `b`,
+            depending on whether there is source data.
+        elapsed: float, optional 0
+            Time already spent on this feature, e.g. by compiling it in a
+            worker process. It will be added to the reported time.
+
+        Returns
+        -------
+        boolean
+            Whether the data has been loaded.
+        """
+
+        start = time.time()
+        if self.dataLoaded or self.dataError or self.isConfig:
+            return False
+        self._resolveBin()
+        origTime = self._getModified()
+        binTime = self._getModified(bin=True)
+        if not binTime or (origTime and self._binIsStale(origTime, binTime)):
+            return False
+        if actionRep is None:
+            actionRep = "B" if origTime else "b"
+
+        self._startStats()
+        tmObj = self.tmObj
+        self.tmObj = Timestamp()
+        self.tmObj.setSilent("deep")
+        self.tmObj.indent(level=0, _verbose=0)
+        try:
+            good = True if self.method else self._readTf(metaOnly=True)
+            good = good and not self.isConfig and self._readDataBin()
+        except Exception:
+            good = False
+        finally:
+            self.tmObj = tmObj
+        if not good:
+            self.data = None
+            self.dataLoaded = False
+            return False
+        self.dataHash = self.sourceHash
+        self.preloaded = (actionRep, elapsed + time.time() - start)
+        return True
+
+    def attach(self, info):
+        """Takes data that another process has published in shared memory.
+
+        The next call to `load()` will find the data loaded and will report it,
+        unless the data on disk has changed in the meantime.
+        See `tf.core.sharedmem`.
+
+        Parameters
+        ----------
+        info: dict
+            The data and information about it, as found in shared memory.
+        """
+
+        if self.dataLoaded or self.dataError or self.isConfig:
+            return
+        self.data = info["data"]
+        self.index = info["index"]
+        self.dataLoaded = info["dataLoaded"]
+        self.dataHash = info["dataHash"]
+        self.metaData = info["metaData"]
+        self.isEdge = info["isEdge"]
+        self.edgeValues = info["edgeValues"]
+        self.dataType = info["dataType"]
+        self._startStats()
+        self.preloaded = ("S", None)
+
     def unload(self):
         self.data = None
+        self.index = None
         self.dataLoaded = False
 
+    def indexEdges(self, rank, digest):
+        """Makes sure that the edges of an edge feature are indexed.
+
+        The index is made if there is none, or if it has been made for
+        another canonical order, and then it is saved with the binary data,
+        if possible, so that it is loaded from there next time.
+        See `tf.core.columns.EdgeIndex`.
+
+        Parameters
+        ----------
+        rank: array
+            The data of the *rank* precompute step.
+        digest: string
+            The digest of the canonical order and the node types.
+        """
+
+        index = self.index
+        if not self.isEdge or (index is not None and index.digest == digest):
+            return
+        self.index = EdgeIndex.fromEdges(self.data, self.edgeValues, rank, digest)
+        self._writeIndexBin()
+
+    def indexValues(self, rank, levels, digest):
+        """Makes sure that the values of a node feature are indexed.
+
+        Like `indexEdges`, but for the nodes per value of a node feature.
+        See `tf.core.columns.ValueIndex`.
+
+        Parameters
+        ----------
+        rank: array
+            The data of the *rank* precompute step.
+        levels: tuple
+            The data of the *levels* precompute step.
+        digest: string
+            The digest of the canonical order and the node types.
+
+        Returns
+        -------
+        ValueIndex | None
+            `None` if the feature is not loaded.
+        """
+
+        if not self.dataLoaded or self.isEdge:
+            return None
+        index = self.index
+        if index is None or index.digest != digest:
+            self.index = ValueIndex.fromValues(self.data, rank, levels, digest)
+            self._writeIndexBin()
+        return self.index
+
     def save(self, overwrite=False, nodeRanges=False, silent=None):
         tmObj = self.tmObj
         isSilent = tmObj.isSilent
@@ -204,9 +407,19 @@ class Data(object):
         error = tmObj.error
 
         path = self.path
-        if not os.path.exists(path):
+        if self._getMtime(path) is None:
             error(f'TF reading: feature file "{path}" does not exist')
             return False
+        fileIndex = self.fileIndex
+        if fileIndex is not None:
+            info = fileIndex.getMeta(path)
+            if info is not None and (metaOnly or info["isConfig"]):
+                self.metaData = dict(info["metaData"])
+                self.isEdge = info["isEdge"]
+                self.isConfig = info["isConfig"]
+                self.edgeValues = info["edgeValues"]
+                self._setDataType()
+                return True
         fh = open(path, encoding="utf8")
         i = 0
         self.metaData = {}
@@ -242,8 +455,19 @@ class Data(object):
                 else:
                     break
         self._setDataType()
+        if fileIndex is not None:
+            fileIndex.putMeta(
+                path,
+                dict(
+                    metaData=dict(self.metaData),
+                    isEdge=self.isEdge,
+                    isConfig=self.isConfig,
+                    edgeValues=self.edgeValues,
+                ),
+            )
         good = True
         if not metaOnly and not self.isConfig:
+            self.stats["bytes"] += os.fstat(fh.fileno()).st_size
             good = self._readDataTf(fh, i)
         fh.close()
         return good
@@ -252,90 +476,11 @@ class Data(object):
         tmObj = self.tmObj
         error = tmObj.error
 
-        errors = collections.defaultdict(list)
-        i = firstI
-        implicit_node = 1
-        data = {}
         isEdge = self.isEdge
         edgeValues = self.edgeValues
-        normFields = 3 if isEdge and edgeValues else 2
-        isNum = self.dataType == "int"
-        for line in fh:
-            i += 1
-            fields = line.rstrip("\n").split("\t")
-            lfields = len(fields)
-            if lfields > normFields:
-                errors["wrongFields"].append(i)
-                continue
-            if lfields == normFields:
-                nodes = setFromSpec(fields[0])
-                if isEdge:
-                    if fields[1] == "":
-                        errors["emptyNode2Spec"].append(i)
-                        continue
-                    nodes2 = setFromSpec(fields[1])
-                if not isEdge or edgeValues:
-                    valTf = fields[-1]
-            else:
-                if isEdge:
-                    if edgeValues:
-                        if lfields == normFields - 1:
-                            nodes = {implicit_node}
-                            nodes2 = setFromSpec(fields[0])
-                            valTf = fields[-1]
-                        elif lfields == normFields - 2:
-                            nodes = {implicit_node}
-                            if fields[0] == "":
-                                errors["emptyNode2Spec"].append(i)
-                                continue
-                            nodes2 = setFromSpec(fields[0])
-                            valTf = ""
-                        else:
-                            nodes = {implicit_node}
-                            valTf = ""
-                            errors["emptyNode2Spec"].append(i)
-                            continue
-                    else:
-                        if lfields == normFields - 1:
-                            nodes = {implicit_node}
-                            if fields[0] == "":
-                                errors["emptyNode2Spec"].append(i)
-                                continue
-                            nodes2 = setFromSpec(fields[0])
-                        else:
-                            nodes = {implicit_node}
-                            errors["emptyNode2Spec"].append(i)
-                            continue
-                else:
-                    nodes = {implicit_node}
-                    if lfields == 1:
-                        valTf = fields[0]
-                    else:
-                        valTf = ""
-            implicit_node = max(nodes) + 1
-            if not isEdge or edgeValues:
-                value = (
-                    int(valTf)
-                    if isNum and valTf != ""
-                    else None
-                    if isNum
-                    else ""
-                    if valTf == ""
-                    else valueFromTf(valTf)
-                )
-            if isEdge:
-                for n in nodes:
-                    for m in nodes2:
-                        if not edgeValues:
-                            data.setdefault(n, set()).add(m)
-                        else:
-                            data.setdefault(n, {})[
-                                m
-                            ] = value  # even if the value is None
-            else:
-                for n in nodes:
-                    if value is not None:
-                        data[n] = value
+        (data, errors) = readDataTf(
+            fh, firstI, isEdge, edgeValues, self.dataType == "int"
+        )
         for kind in errors:
             lnk = len(errors[kind])
             error(
@@ -346,6 +491,7 @@ class Data(object):
             if lnk > ERROR_CUTOFF:
                 error(f"\t and {lnk - ERROR_CUTOFF} more cases", tm=False)
         self.data = data
+        self.index = None
         if not errors:
             if self.fileName == WARP[0]:
                 slotType = data[1]
@@ -376,10 +522,8 @@ class Data(object):
                     # so the min and max values of these keys must differ at least as much
                     # is the number of those keys
                     pass
-                oslots = []
-                for n in nodeList:
-                    oslots.append(array("I", sorted(data[n])))
-                self.data = (tuple(oslots), maxSlot, maxNode)
+                oslots = RaggedColumn.fromSequence(sorted(data[n]) for n in nodeList)
+                self.data = (oslots, maxSlot, maxNode)
             elif isEdge:
                 seen = {}
                 datax = {}
@@ -398,14 +542,6 @@ class Data(object):
                             seen[msx] = msx
                         datax[n] = seen[msx]
                 self.data = datax
-            else:
-                seen = {}
-                datax = {}
-                for (n, ms) in data.items():
-                    if ms not in seen:
-                        seen[ms] = ms
-                    datax[n] = seen[ms]
-                self.data = datax
 
         return not errors
 
@@ -420,6 +556,8 @@ class Data(object):
         if not good:
             return False
 
+        # the loading of the dependencies has been profiled separately
+        self._startStats()
         tmObj = self.tmObj
 
         def info(msg, tm=True):
@@ -609,17 +747,45 @@ class Data(object):
         tmObj = self.tmObj
         error = tmObj.error
 
-        if not os.path.exists(self.binPath):
+        if self._getMtime(self.binPath) is None:
             error(f'TF reading: feature file "{self.binPath}" does not exist')
             return False
-        with gzip.open(self.binPath, "rb") as f:
-            self.data = pickle.load(f)
+        try:
+            data = readColumns(self.binPath, stats=self.stats)
+        except Exception as e:
+            error(f'TF reading: feature file "{self.binPath}" is unreadable: {str(e)}')
+            return False
+        # features may have been saved together with an index
+        (self.data, self.index) = (
+            (data.data, data.index) if type(data) is IndexedData else (data, None)
+        )
         self.dataLoaded = time.time()
         return True
 
     def cleanDataBin(self):
+        # never remove binary data from the shared cache
+        self.binPath = self.localBinPath
         if os.path.exists(self.binPath):
             os.unlink(self.binPath)
+            if self.fileIndex is not None:
+                self.fileIndex.update(self.binPath)
+
+    def registerBin(self):
+        """Records that the binary data has been (re)written.
+
+        In content hash mode, the hash of the sources is recorded for it,
+        and the binary data is copied to the shared cache, if there is one.
+        See `tf.core.fileindex`.
+        """
+
+        fileIndex = self.fileIndex
+        if fileIndex is None:
+            return
+        fileIndex.update(self.binPath)
+        if self.sourceHash is not None:
+            fileIndex.putBinHash(self.binPath, self.sourceHash)
+            fileIndex.publish(self.binPath, self.fileName, self.sourceHash)
+            self.binHashOk = True
 
     def _writeDataBin(self):
         tmObj = self.tmObj
@@ -634,9 +800,15 @@ class Data(object):
                 good = False
         if not good:
             return False
+        self.data = self._columnize()
+        self.binPath = self.localBinPath
         try:
-            with gzip.open(self.binPath, "wb", compresslevel=GZIP_LEVEL) as f:
-                pickle.dump(self.data, f, protocol=PICKLE_PROTOCOL)
+            writeColumns(
+                self.binPath,
+                self.data if self.index is None else IndexedData(self.data, self.index),
+                label=self.sourceHash or "",
+            )
+            self.registerBin()
         except Exception as e:
             error(f'Cannot write to file "{self.binPath}" because: {str(e)}')
             self.cleanDataBin()
@@ -644,11 +816,46 @@ class Data(object):
         self.dataLoaded = time.time()
         return True
 
+    def _writeIndexBin(self):
+        """Saves the binary data together with a new index, if possible.
+
+        Saving the index only speeds up later loads. So if it cannot be saved,
+        e.g. because the corpus is on a read-only file system,
+        the index is kept in memory, the existing binary data is left as it is,
+        and a warning is given, once per directory.
+        """
+
+        path = self.localBinPath
+        try:
+            os.makedirs(self.binDir, exist_ok=True)
+            writeColumns(
+                path, IndexedData(self.data, self.index), label=self.sourceHash or ""
+            )
+            self.binPath = path
+            self.registerBin()
+        except Exception as e:
+            if self.binDir not in INDEX_UNSAVED:
+                INDEX_UNSAVED.add(self.binDir)
+                self.tmObj.warning(
+                    f'Cannot save indexes in "{self.binDir}" because: {str(e)}'
+                )
+                self.tmObj.warning("The indexes will be made again next time")
+            return False
+        return True
+
+    def _columnize(self):
+        data = self.data
+        if type(data) is dict and not self.method and not self.isEdge:
+            colData = (
+                encodeInts(data) if self.dataType == "int" else encodeValues(data)
+            )
+            if colData is not None:
+                return colData
+        return columnize(data)
+
     def _getModified(self, bin=False):
         if bin:
-            return (
-                os.path.getmtime(self.binPath) if os.path.exists(self.binPath) else None
-            )
+            return self._getMtime(self.binPath)
         else:
             if self.method:
                 depsInfo = [dep._getModified() for dep in self.dependencies]
@@ -656,14 +863,107 @@ class Data(object):
                 depsModified = None if len(depsModifieds) == 0 else max(depsModifieds)
                 if depsModified is not None:
                     return depsModified
-                elif os.path.exists(self.binPath):
-                    return os.path.getmtime(self.binPath)
                 else:
-                    return None
+                    return self._getMtime(self.binPath)
             else:
-                if os.path.exists(self.path):
-                    return os.path.getmtime(self.path)
-                elif os.path.exists(self.binPath):
-                    return os.path.getmtime(self.binPath)
+                mtime = self._getMtime(self.path)
+                if mtime is not None:
+                    return mtime
                 else:
-                    return None
+                    return self._getMtime(self.binPath)
+
+    def _startStats(self):
+        self.stats = dict(
+            start=time.time(),
+            memory=memoryUsage(),
+            bytes=0,
+            decompress=0,
+            unpickle=0,
+        )
+
+    def _addProfile(self, actionRep, good, elapsed=None):
+        # see tf.fabric.Fabric.loadProfile
+        profile = self.profile
+        if profile is None:
+            return
+        stats = self.stats
+        parallel = elapsed is not None
+        memory = None if parallel else memoryUsage()
+        memoryStart = stats.get("memory", None)
+        profile.append(
+            dict(
+                feature=self.fileName,
+                action=actionRep,
+                good=good,
+                parallel=parallel,
+                time=elapsed
+                if parallel
+                else (time.time() - stats["start"])
+                if "start" in stats
+                else None,
+                bytes=stats.get("bytes", None),
+                decompress=stats.get("decompress", None),
+                unpickle=stats.get("unpickle", None),
+                memory=None
+                if memory is None or memoryStart is None
+                else memory - memoryStart,
+            )
+        )
+
+    def _resolveBin(self):
+        # see tf.core.fileindex, content hashes
+        fileIndex = self.fileIndex
+        if fileIndex is None or not fileIndex.contentHash:
+            return
+        self.sourceHash = self._getHash()
+        self.binPath = self.localBinPath
+        self.binHashOk = None
+        if self.sourceHash is None:
+            # no hashable sources: fall back to modification times
+            return
+        if fileIndex.getBinHash(self.binPath) == self.sourceHash:
+            self.binHashOk = True
+            return
+        self.binHashOk = False
+        sharedPath = fileIndex.sharedPath(self.fileName, self.sourceHash)
+        if sharedPath is not None and os.path.exists(sharedPath):
+            self.binPath = sharedPath
+            self.binHashOk = True
+
+    def _getHash(self):
+        if self.method:
+            depHashes = [
+                HASH_ABSENT
+                if dep is None or not dep.method and dep._getMtime(dep.path) is None
+                else dep._getHash()
+                for dep in self.dependencies
+            ]
+            if None in depHashes:
+                return None
+            h = hashlib.sha256(f"{PACK_VERSION}:{self.fileName}".encode("utf8"))
+            for depHash in depHashes:
+                h.update(f":{depHash}".encode("utf8"))
+            return h.hexdigest()
+        fileIndex = self.fileIndex
+        return None if fileIndex is None else fileIndex.getHash(self.path)
+
+    def _binIsStale(self, origTime, binTime):
+        if not binTime:
+            return True
+        if self.binHashOk is not None:
+            return not self.binHashOk
+        return origTime > binTime
+
+    def _loadedIsCurrent(self, origTime, binTime):
+        if self.sourceHash is not None:
+            return self.dataHash == self.sourceHash
+        return (not origTime or self.dataLoaded >= origTime) and (
+            not binTime or self.dataLoaded >= binTime
+        )
+
+    def _getMtime(self, path):
+        # see tf.core.fileindex
+        fileIndex = self.fileIndex
+        if fileIndex is not None and fileIndex.covers(path):
+            return fileIndex.mtime(path)
+        return os.path.getmtime(path) if os.path.exists(path) else None
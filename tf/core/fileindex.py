@@ -0,0 +1,306 @@
+"""
+# Index of feature files
+
+Before Text-Fabric loads a feature, it compares the modification times of
+its `.tf` file and its `.tfx` file, and it reads the metadata from the
+`.tf` file.
+When there are many features, and especially on network file systems,
+these many small operations add up.
+
+Therefore Text-Fabric keeps, per directory with `.tf` files, a `FileIndex`:
+
+*   it gets the modification times of all `.tf` files and all `.tfx` files
+    in one `os.scandir` pass over the directory and over its
+    `.tf/{PACK_VERSION}` directory;
+*   it keeps the metadata of the `.tf` files in a *sidecar* file
+    `__meta__.pickle` in that `.tf/{PACK_VERSION}` directory.
+    Metadata is only taken from the sidecar if the `.tf` file has still the same
+    modification time and size as when the metadata was read from it.
+
+So when all binary data is up-to-date, loading features does not open
+any `.tf` file.
+
+The index is refreshed at the start of every `tf.fabric.Fabric.load`.
+
+## Content hashes
+
+Normally, the binary data of a feature is considered outdated if its `.tf` file
+is newer. But modification times change for other reasons than changes in the
+content: a `git checkout`, an `rsync`, the building of a container image.
+
+If you pass `contentHash=True` to `tf.fabric.Fabric`,
+Text-Fabric will look at the contents instead:
+
+*   the *hash* of a `.tf` file is the SHA-256 digest of its contents;
+*   the hash of precomputed data (`__levels__`, `__order__`, ...)
+    is computed from the hashes of the features it depends on;
+    an optional feature that is not present, such as `otext`, counts with
+    a fixed hash;
+*   each binary file carries in its header the hash of the data it has
+    been compiled from; the binary is outdated if that hash differs from the
+    current hash of its sources.
+    So binary files stay valid when they are copied or touched.
+    The sidecar file keeps these hashes as well, so that the headers are only read
+    for binary files whose modification time or size has changed.
+
+Hashes of `.tf` files are also kept in the sidecar,
+and are only recomputed if the modification time or size of the file has changed.
+
+In this mode you can also pass `sharedCache=directory` to `tf.fabric.Fabric`.
+Binary data is then also looked up in that directory, under a name that contains
+the hash of its source, so that its validity does not depend on any
+bookkeeping.
+That makes the directory safe to share between machines, and it may be read-only.
+Newly compiled data is written to the shared cache as well, if it is writable.
+"""
+
+import os
+import pickle
+import shutil
+import hashlib
+
+from ..parameters import PACK_VERSION, PICKLE_PROTOCOL
+from .columns import readLabel
+
+META_FILE = "__meta__.pickle"
+"""Name of the sidecar file with metadata."""
+
+
+class FileIndex(object):
+    """Modification times and metadata of the feature files in a directory.
+
+    Parameters
+    ----------
+    dirName: string
+        The directory with `.tf` files.
+    contentHash: boolean, optional `False`
+        Whether binary data is validated by the hashes of the sources,
+        instead of by modification times.
+    sharedCache: string, optional `None`
+        A directory with binary data, shared between machines.
+        Only used if `contentHash` is `True`.
+    """
+
+    def __init__(self, dirName, contentHash=False, sharedCache=None):
+        dirName = os.path.normpath(dirName)
+        self.dirName = dirName
+        self.binDir = f"{dirName}/.tf/{PACK_VERSION}"
+        self.metaPath = f"{self.binDir}/{META_FILE}"
+        self.contentHash = contentHash
+        self.sharedDir = (
+            f"{os.path.expanduser(sharedCache)}/{PACK_VERSION}"
+            if contentHash and sharedCache
+            else None
+        )
+        self.stats = {}
+        self.meta = None
+        self.metaDirty = False
+        self.scan()
+
+    def scan(self):
+        """Gets the modification times of all feature files in one pass.
+        """
+
+        stats = {}
+        for (dirName, ext) in ((self.dirName, ".tf"), (self.binDir, ".tfx")):
+            try:
+                sd = os.scandir(dirName)
+            except OSError:
+                continue
+            with sd:
+                for e in sd:
+                    if e.name.endswith(ext) and e.is_file():
+                        st = e.stat()
+                        stats[f"{dirName}/{e.name}"] = (st.st_mtime, st.st_size)
+        self.stats = stats
+
+    def tfFiles(self):
+        """The names of the `.tf` files in the directory.
+        """
+
+        prefix = f"{self.dirName}/"
+        lPrefix = len(prefix)
+        return tuple(
+            path[lPrefix:]
+            for path in self.stats
+            if path.endswith(".tf") and path.startswith(prefix)
+        )
+
+    def covers(self, path):
+        """Whether a file is in one of the directories of this index.
+        """
+
+        dirName = os.path.dirname(os.path.normpath(path))
+        return dirName == self.dirName or dirName == self.binDir
+
+    def mtime(self, path):
+        """The modification time of a file, or `None` if it does not exist.
+        """
+
+        stat = self.stats.get(os.path.normpath(path), None)
+        return None if stat is None else stat[0]
+
+    def update(self, path):
+        """Records the current state of a file that has been (re)written or deleted.
+        """
+
+        key = os.path.normpath(path)
+        if os.path.exists(path):
+            st = os.stat(path)
+            self.stats[key] = (st.st_mtime, st.st_size)
+        else:
+            self.stats.pop(key, None)
+
+    def getMeta(self, path):
+        """Gets the stored metadata of a `.tf` file, if it is still valid.
+
+        Returns
+        -------
+        dict | None
+        """
+
+        return self._getEntry("meta", path)
+
+    def putMeta(self, path, info):
+        """Stores the metadata of a `.tf` file.
+        """
+
+        self._putEntry("meta", path, info)
+
+    def getHash(self, path):
+        """Gets the content hash of a `.tf` file.
+
+        The hash is computed if the file has changed since the last time,
+        as far as its modification time and size tell.
+
+        Returns
+        -------
+        string | None
+            `None` if the file does not exist.
+        """
+
+        digest = self._getEntry("hashes", path)
+        if digest is None:
+            if self.mtime(path) is None:
+                return None
+            h = hashlib.sha256()
+            with open(path, "rb") as fh:
+                for chunk in iter(lambda: fh.read(1 << 20), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            self._putEntry("hashes", path, digest)
+        return digest
+
+    def getBinHash(self, binPath):
+        """Gets the hash of the sources from which a binary file has been compiled.
+
+        The hash is read from the header of the binary file
+        if the file has changed since the last time,
+        as far as its modification time and size tell.
+
+        Returns
+        -------
+        string | None
+            `None` if the binary file does not exist or if the hash is not known.
+        """
+
+        digest = self._getEntry("binHashes", binPath)
+        if digest is None:
+            if self.mtime(binPath) is None:
+                return None
+            digest = readLabel(binPath) or None
+            if digest is not None:
+                self._putEntry("binHashes", binPath, digest)
+        return digest
+
+    def putBinHash(self, binPath, digest):
+        """Records the hash of the sources from which a binary file has been compiled.
+        """
+
+        self._putEntry("binHashes", binPath, digest)
+
+    def sharedPath(self, fileName, digest):
+        """The path of a binary file in the shared cache.
+
+        Returns
+        -------
+        string | None
+            `None` if there is no shared cache.
+        """
+
+        if self.sharedDir is None:
+            return None
+        return f"{self.sharedDir}/{fileName}-{digest}.tfx"
+
+    def publish(self, binPath, fileName, digest):
+        """Copies a binary file to the shared cache, if it is writable.
+        """
+
+        sharedPath = self.sharedPath(fileName, digest)
+        if sharedPath is None or os.path.exists(sharedPath):
+            return
+        tmpPath = f"{sharedPath}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.sharedDir, exist_ok=True)
+            shutil.copyfile(binPath, tmpPath)
+            os.replace(tmpPath, sharedPath)
+        except Exception:
+            if os.path.exists(tmpPath):
+                os.unlink(tmpPath)
+
+    def save(self):
+        """Writes the metadata to the sidecar file, if there is new metadata.
+
+        Failure to write is not an error: the metadata will then be read
+        from the `.tf` files next time.
+        """
+
+        if not self.metaDirty:
+            return
+        tmpPath = f"{self.metaPath}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.binDir, exist_ok=True)
+            with open(tmpPath, "wb") as fh:
+                pickle.dump(self.meta, fh, protocol=PICKLE_PROTOCOL)
+            os.replace(tmpPath, self.metaPath)
+            self.metaDirty = False
+        except Exception:
+            if os.path.exists(tmpPath):
+                os.unlink(tmpPath)
+
+    def clear(self):
+        """Removes the sidecar file.
+        """
+
+        if os.path.exists(self.metaPath):
+            os.unlink(self.metaPath)
+        self.meta = None
+        self.metaDirty = False
+
+    def _getEntry(self, kind, path):
+        if self.meta is None:
+            self._readMeta()
+        entry = self.meta[kind].get(os.path.basename(path), None)
+        if entry is None:
+            return None
+        (stat, value) = entry
+        return value if stat == self.stats.get(os.path.normpath(path), None) else None
+
+    def _putEntry(self, kind, path, value):
+        if self.meta is None:
+            self._readMeta()
+        stat = self.stats.get(os.path.normpath(path), None)
+        if stat is None:
+            return
+        self.meta[kind][os.path.basename(path)] = (stat, value)
+        self.metaDirty = True
+
+    def _readMeta(self):
+        try:
+            with open(self.metaPath, "rb") as fh:
+                meta = pickle.load(fh)
+        except Exception:
+            meta = {}
+        for kind in ("meta", "hashes", "binHashes"):
+            meta.setdefault(kind, {})
+        self.meta = meta
@@ -134,6 +134,25 @@ def check32():
     return (on32, warn, msg)
 
 
+def memoryUsage():
+    """The resident memory of the current process in bytes.
+
+    Returns `None` if it cannot be determined on this platform.
+    """
+
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
 def console(*msg, error=False, newline=True):
     msg = " ".join(m if type(m) is str else repr(m) for m in msg)
     msg = unexpanduser(msg)
@@ -199,8 +218,7 @@ def setFromSpec(spec):
             e = int(bounds[1])
             if e < b:
                 (b, e) = (e, b)
-            for n in range(b, e + 1):
-                covered.add(n)
+            covered.update(range(b, e + 1))
     return covered
 
 
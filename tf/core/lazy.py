@@ -0,0 +1,77 @@
+"""
+# Lazy loading of features
+
+When `tf.fabric.Fabric.load` is called with `lazy=True`, the requested features
+are not loaded. Only their metadata is read, and in the core API
+they are represented by stand-ins: `F.fff` and `E.fff` are `LazyFeature`
+objects.
+
+As soon as you use such a stand-in, e.g. by `F.fff.v(n)`
+or `Fs("fff").s(value)`, the feature is loaded and the stand-in is replaced
+by the real thing: `tf.core.nodefeature.NodeFeature` or
+`tf.core.edgefeature.EdgeFeature`.
+
+So lazy loading does not change what you can do with features,
+only when their data is loaded.
+The metadata of a feature, `F.fff.meta`, is available without loading it.
+
+The features that are needed by the core API itself, such as the
+section features and the features for the text formats,
+are always loaded directly.
+"""
+
+
+class LazyFeature(object):
+    """Stands in for a feature that has not been loaded yet.
+
+    Parameters
+    ----------
+    api: object
+        The core API.
+    fName: string
+        The name of the feature.
+    metaData: dict
+        The metadata of the feature.
+    isEdge: boolean
+        Whether the feature is an edge feature.
+    """
+
+    def __init__(self, api, fName, metaData, isEdge):
+        self.api = api
+        self.fName = fName
+        self.isEdge = isEdge
+        self.meta = metaData
+        """Metadata of the feature.
+
+        This is the information found in the lines starting with `@`
+        in the `.tf` feature file.
+        """
+
+    def __getattr__(self, name):
+        # only called for attributes not found in the stand-in itself
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def load(self):
+        """Loads the feature and puts it in place of the stand-in.
+
+        Returns
+        -------
+        object
+            The loaded feature.
+
+        Raises
+        ------
+        AttributeError
+            If the feature could not be loaded.
+        """
+
+        api = self.api
+        fName = self.fName
+        container = api.E if self.isEdge else api.F
+        api.ensureLoaded(fName)
+        feature = getattr(container, fName, None)
+        if feature is None or feature is self:
+            raise AttributeError(f'Feature "{fName}" could not be loaded')
+        return feature
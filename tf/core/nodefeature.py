@@ -14,11 +14,39 @@ a dictionary underneath.
 
 But you can still iterate over the data of a feature as if it were a
 dictionary: `tf.core.nodefeature.NodeFeature.items`
+
+!!! note "Dictionary encoding"
+    String features are stored dictionary-encoded: there is a table of the
+    distinct values of the feature, and every node with a value gets the
+    position of its value in that table, in a narrow array of integers.
+    See `tf.core.columns.encodeValues`.
+
+    Integer features are stored in a typed array of values.
+    If nearly all nodes in the range of nodes with a value have a value,
+    that array is indexed by node, with a special value for the missing values.
+    See `tf.core.columns.encodeInts`.
+
+    The methods below work directly on those arrays.
+
+!!! note "Value index"
+    `NodeFeature.s` and `NodeFeature.freqList` use an index of the nodes
+    per value, with the nodes already in canonical order,
+    and the frequencies of the values per node type.
+    It is made when the feature is loaded, as the index of an edge feature is,
+    and stored with the binary data of the feature, if possible,
+    so that using the feature never writes to disk.
+    If the corpus is read-only, the index is only kept in memory.
+    See `tf.core.columns.ValueIndex`.
+
+    The search engine uses the same index to find the nodes for feature conditions
+    like `fff=a|b` (`tf.search.spin`).
 """
 
 
 import collections
 
+from .arrays import hasNumpy, nodeArray
+
 
 class NodeFeatures(object):
     pass
@@ -30,7 +58,7 @@ class NodeFeature(object):
     For feature `fff` it is the result of `F.fff` or `Fs('fff')`.
     """
 
-    def __init__(self, api, metaData, data):
+    def __init__(self, api, metaData, data, index=None):
         self.api = api
         self.meta = metaData
         """Metadata of the feature.
@@ -40,6 +68,8 @@ class NodeFeature(object):
         """
 
         self.data = data
+        self.index = index
+        self.freqLists = {}
 
     def items(self):
         """A generator that yields the items of the feature, seen as a mapping.
@@ -71,9 +101,67 @@ class NodeFeature(object):
             The value of the feature for that node, if it is defined, else `None`.
         """
 
-        if n in self.data:
-            return self.data[n]
-        return None
+        return self.data.get(n, None)
+
+    def vs(self, nodes):
+        """Get the values of a feature for a bunch of nodes.
+
+        Does the same as `v` for each node, but in one go,
+        which is much faster than calling `v` for every node.
+
+        Parameters
+        ----------
+        nodes: iterable of integer
+            The nodes in question, e.g. a tuple, a range, or an array.
+
+        Returns
+        -------
+        list of (integer | string | None)
+            The values of the feature for those nodes, in the same order,
+            with `None` for the nodes where the feature is not defined.
+        """
+
+        data = self.data
+        if type(data) is dict:
+            return list(map(data.get, nodes))
+        return data.gets(nodes)
+
+    def toArray(self, nodeType=None):
+        """Get the values of a feature as a NumPy array.
+
+        See `tf.core.arrays`.
+
+        Parameters
+        ----------
+        nodeType: string, optional None
+            If given, only the nodes of this type are included,
+            otherwise all nodes.
+
+        Returns
+        -------
+        numpy.ma.MaskedArray | None
+            The values of the nodes, in the order of the nodes,
+            where nodes without a value are masked.
+            For a node type with first node `b`, the value of node `n` is at
+            position `n - b`; without node type the value of node `n` is at
+            position `n - 1`.
+            `None` if NumPy is not installed or the node type does not exist.
+        """
+
+        api = self.api
+        error = api.TF.error
+        if not hasNumpy(error):
+            return None
+        Fotype = api.F.otype
+        if nodeType is None:
+            (b, e) = (1, Fotype.maxNode)
+        else:
+            interval = Fotype.sInterval(nodeType)
+            if not interval:
+                error(f'No such node type: "{nodeType}"')
+                return None
+            (b, e) = interval
+        return nodeArray(self.data, b, e)
 
     def s(self, val):
         """Query all nodes having a specified feature value.
@@ -94,13 +182,17 @@ class NodeFeature(object):
             (`tf.core.nodes`)
         """
 
+        index = self.index
+        if index is not None:
+            return index.find(val)
+
         Crank = self.api.C.rank.data
-        return tuple(
-            sorted(
-                [n for n in self.data if self.data[n] == val],
-                key=lambda n: Crank[n - 1],
-            )
-        )
+        data = self.data
+        if type(data) is dict:
+            nodes = [n for n in data if data[n] == val]
+        else:
+            nodes = data.find(val)
+        return tuple(sorted(nodes, key=lambda n: Crank[n - 1]))
 
     def freqList(self, nodeTypes=None):
         """Frequency list of the values of this feature.
@@ -109,8 +201,8 @@ class NodeFeature(object):
 
         Parameters
         ----------
-        nodeTypes: set of string, optional `None`
-            If you pass a set of nodeTypes, only the values for nodes
+        nodeTypes: string | set of string, optional `None`
+            If you pass a node type or a set of node types, only the values for nodes
             within those types will be counted.
 
         Returns
@@ -121,13 +213,38 @@ class NodeFeature(object):
 
         """
 
-        fql = collections.Counter()
-        if nodeTypes is None:
-            for n in self.data:
-                fql[self.data[n]] += 1
+        key = (
+            None
+            if nodeTypes is None
+            else frozenset((nodeTypes,))
+            if type(nodeTypes) is str
+            else frozenset(nodeTypes)
+        )
+        freqLists = self.freqLists
+        if key in freqLists:
+            return freqLists[key]
+
+        index = self.index
+        data = self.data
+        if index is not None:
+            fql = index.counts(key)
+        elif type(data) is dict:
+            fql = collections.Counter()
+            if nodeTypes is None:
+                for n in data:
+                    fql[data[n]] += 1
+            else:
+                fOtype = self.api.F.otype.v
+                for n in data:
+                    if fOtype(n) in key:
+                        fql[data[n]] += 1
+        elif nodeTypes is None:
+            fql = data.counts()
         else:
-            fOtype = self.api.F.otype.v
-            for n in self.data:
-                if fOtype(n) in nodeTypes:
-                    fql[self.data[n]] += 1
-        return tuple(sorted(fql.items(), key=lambda x: (-x[1], x[0])))
+            sInterval = self.api.F.otype.sInterval
+            fql = data.counts(
+                sInterval(nodeType) for nodeType in key if sInterval(nodeType)
+            )
+        result = tuple(sorted(fql.items(), key=lambda x: (-x[1], x[0])))
+        freqLists[key] = result
+        return result
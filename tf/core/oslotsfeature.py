@@ -4,8 +4,14 @@
 In general, features are stored as dictionaries, but this specific feature
 has an optimized representation. Since it is a large feature and present
 in any TF dataset, this pays off.
+
+The slots of all non-slot nodes are kept in a `tf.core.columns.RaggedColumn`:
+one flat array of slots and one array of offsets into it.
+When loaded from the binary data, both arrays are memory mapped.
 """
 
+from .arrays import hasNumpy, raggedMatrix
+
 
 class OslotsFeature(object):
     def __init__(self, api, metaData, data):
@@ -44,10 +50,12 @@ class OslotsFeature(object):
 
         Returns
         -------
-        tuple
+        array | tuple
             The slot nodes of the node in question, in canonical order.
             (`tf.core.nodes`)
 
+            For non-slot nodes it is an `array` of integers,
+            copied out of the memory mapped data.
             For slot nodes `n` it is the tuple `(n,)`.
 
             All non-slot nodes are linked to at least one slot.
@@ -61,3 +69,20 @@ class OslotsFeature(object):
         if m <= len(self.data):
             return self.data[m - 1]
         return ()
+
+    def toCSR(self):
+        """Get the slots of all nodes as a SciPy sparse matrix.
+
+        See `tf.core.arrays`.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix | None
+            The entry at `(n, s)` is `True` if `s` is a slot of the non-slot node `n`.
+            `None` if NumPy or SciPy are not installed.
+        """
+
+        if not hasNumpy(self.api.TF.error, scipy=True):
+            return None
+        maxSlot = self.maxSlot
+        return raggedMatrix(self.data, maxSlot + 1, self.maxNode + 1)
@@ -5,8 +5,12 @@ In general, features are stored as dictionaries, but this specific feature
 has an optimized representation. Since it is a large feature and present
 in any TF dataset, this pays off.
 
+When loaded from the binary data, the node types of the non-slot nodes are kept in a
+`tf.core.columns.CodedColumn`.
 """
 
+from .columns import CodedColumn
+
 
 class OtypeFeature(object):
     def __init__(self, api, metaData, data):
@@ -73,6 +77,35 @@ class OtypeFeature(object):
             return self.data[m - 1]
         return None
 
+    def vs(self, nodes):
+        """Get the node types of a bunch of nodes.
+
+        As in `tf.core.nodefeature.NodeFeature.vs`.
+        """
+
+        slotType = self.slotType
+        maxSlot = self.maxSlot
+        data = self.data
+        size = len(data)
+        # look up the codes of the node types, and decode each distinct one once
+        if type(data) is CodedColumn:
+            table = data.table + (slotType, None)
+            data = data.codes
+        else:
+            table = data + (slotType, None)
+            data = range(len(data))
+        slotCode = len(table) - 2
+        return [
+            table[
+                -1
+                if n <= 0 or n - maxSlot > size
+                else slotCode
+                if n <= maxSlot
+                else data[n - maxSlot - 1]
+            ]
+            for n in nodes
+        ]
+
     def s(self, val):
         """Query all nodes having a specified node type.
 
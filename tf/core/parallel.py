@@ -0,0 +1,199 @@
+"""
+# Parallel loading of features
+
+When `tf.fabric.Fabric.load` is called with `workers=` a number greater than 1,
+the features are loaded in parallel before the normal, sequential loading
+takes place:
+
+*   features whose `.tf` files have to be compiled are compiled in
+    worker processes, each of which writes the resulting `.tfx` file;
+*   features whose `.tfx` files are up-to-date (including the ones just
+    compiled) are read in threads.
+
+After that, the sequential loading finds these features already loaded,
+and only reports on them, including the time spent on each feature.
+Features that could not be loaded in parallel for whatever reason,
+are loaded by the sequential loader as usual,
+which also reports any errors.
+
+Precomputed data that is out of date is computed in worker processes as well,
+see `precompute`.
+The steps of `tf.fabric.PRECOMPUTE` are scheduled according to their dependencies:
+a step starts as soon as the steps it depends on are done,
+so independent steps, such as `__levDown__` and `__boundary__`, run at the same time.
+Workers do not send their results back through a pipe:
+each step writes its `.tfx` file, and the steps that depend on it
+read that file, just as the main process does afterwards.
+
+So the result of a parallel load is identical to the result of a sequential load.
+"""
+
+import os
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+
+from .data import Data, WARP
+from .timestamp import Timestamp
+
+
+def preload(dataObjs, workers):
+    """Loads features in parallel.
+
+    Parameters
+    ----------
+    dataObjs: iterable of `tf.core.data.Data`
+        The features to load.
+    workers: integer
+        The maximum number of threads and the maximum number of processes.
+    """
+
+    dataObjs = list(dataObjs)
+    toCompile = [d for d in dataObjs if d.needsCompile()]
+    compileSet = set(toCompile)
+    toRead = [d for d in dataObjs if d not in compileSet]
+
+    with ThreadPoolExecutor(max_workers=workers) as threads:
+        reading = [threads.submit(d.preload) for d in toRead]
+
+        if toCompile:
+            nProcesses = min(workers, len(toCompile))
+            with ProcessPoolExecutor(max_workers=nProcesses) as processes:
+                compiling = {
+                    processes.submit(_compile, d.path): d for d in toCompile
+                }
+                for future in as_completed(compiling):
+                    try:
+                        (good, elapsed) = future.result()
+                    except Exception:
+                        good = False
+                    if good:
+                        d = compiling[future]
+                        d.registerBin()
+                        reading.append(threads.submit(d.preload, "T", elapsed))
+
+        for future in reading:
+            future.result()
+
+
+def precompute(dataObjs, workers):
+    """Computes precomputed data in parallel.
+
+    Parameters
+    ----------
+    dataObjs: iterable of `tf.core.data.Data`
+        The precomputation steps, in the order of `tf.fabric.PRECOMPUTE`,
+        so that every step comes after the steps it depends on.
+        Their dependencies that are not precomputed must have been loaded.
+    workers: integer
+        The maximum number of threads and the maximum number of processes.
+    """
+
+    steps = list(dataObjs)
+    toCompute = set()
+    for d in steps:
+        if d.dataLoaded or d.dataError:
+            continue
+        if d.needsCompute() or any(dep in toCompute for dep in d.dependencies):
+            toCompute.add(d)
+    if not toCompute:
+        return
+
+    waiting = [d for d in steps if d in toCompute]
+    done = set()
+    failed = set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as threads:
+        reading = []
+        nProcesses = min(workers, len(toCompute))
+        with ProcessPoolExecutor(max_workers=nProcesses) as processes:
+            while waiting or running:
+                for d in list(waiting):
+                    deps = [dep for dep in d.dependencies if dep in toCompute]
+                    if any(dep in failed for dep in deps):
+                        waiting.remove(d)
+                        failed.add(d)
+                    elif all(dep in done for dep in deps):
+                        waiting.remove(d)
+                        sources = _sources(d)
+                        if sources is None:
+                            failed.add(d)
+                        else:
+                            future = processes.submit(
+                                _compute, d.path, d.method, sources
+                            )
+                            running[future] = d
+                if not running:
+                    break
+
+                finished = wait(running, return_when=FIRST_COMPLETED).done
+                for future in finished:
+                    d = running.pop(future)
+                    try:
+                        (good, elapsed) = future.result()
+                    except Exception:
+                        good = False
+                    if good:
+                        d.binPath = d.localBinPath
+                        d.registerBin()
+                        done.add(d)
+                        reading.append(threads.submit(d.preload, "C", elapsed))
+                    else:
+                        failed.add(d)
+
+        for future in reading:
+            future.result()
+
+
+def _sources(d):
+    # where a worker finds the data that a precomputation step depends on:
+    # the metadata of the text configuration, and the binary files of the others
+    sources = []
+    for dep in d.dependencies:
+        if dep.fileName == WARP[2]:
+            sources.append((dep.path, None, None, dep.metaData))
+            continue
+        if not dep.method and not dep.dataLoaded:
+            return None
+        if not os.path.exists(dep.binPath):
+            return None
+        sources.append((dep.path, dep.binPath, dep.method, None))
+    return sources
+
+
+def _compute(path, method, sources):
+    start = time.time()
+    tmObj = Timestamp()
+    # stay quiet: failures will be reported by the sequential loader
+    tmObj.setSilent("deep")
+    tmObj.indent(level=0, _verbose=0)
+    depData = []
+    for (depPath, binPath, depMethod, metaData) in sources:
+        if binPath is None:
+            depData.append(metaData)
+            continue
+        dep = Data(depPath, tmObj, method=depMethod)
+        dep.binPath = binPath
+        if not dep._readDataBin():
+            return (False, time.time() - start)
+        depData.append(dep.data)
+    d = Data(path, tmObj, method=method)
+    d.data = method(tmObj.info, tmObj.error, *depData)
+    good = d.data is not None and d._writeDataBin()
+    return (good, time.time() - start)
+
+
+def _compile(path):
+    start = time.time()
+    tmObj = Timestamp()
+    # stay quiet: failures will be reported by the sequential loader
+    tmObj.setSilent("deep")
+    tmObj.indent(level=0, _verbose=0)
+    good = Data(path, tmObj).load()
+    return (good, time.time() - start)
@@ -12,9 +12,10 @@ The functions in this module implement those tasks.
 """
 
 from array import array
+from bisect import bisect_left, bisect_right
 import collections
-import functools
 from .helpers import itemize
+from .columns import RaggedColumn
 
 
 def levels(info, error, otype, oslots, otext):
@@ -151,45 +152,96 @@ def order(info, error, otype, oslots, levels):
     oslots = oslots[0]
     info("assigning otype levels to nodes")
     otypeLevels = dict(((x[0], i) for (i, x) in enumerate(reversed(levels))))
+    nLevels = len(otypeLevels)
+    # bigger node types come first
+    typeKey = {ntp: nLevels - 1 - lv for (ntp, lv) in otypeLevels.items()}
+
+    # The canonical order compares the sorted slot lists of nodes
+    # lexicographically, where a list comes before its prefixes.
+    # When the slots of a node are described as runs of consecutive slots,
+    # that is the order of the tuples (b1, -e1, b2, -e2, ..., sentinel),
+    # where the runs are b1-e1, b2-e2, ... and the sentinel exceeds all slots.
+    # Most nodes consist of a single run, and for them we pack the whole sort key
+    # into a single integer:
+    #   first slot, negative last slot, single run or not, type rank, node.
+    # Nodes with gaps get the same first part, with `not single run`, so that they
+    # come before all single run nodes with the same first run.
+    # After sorting, we sort the groups of nodes with gaps that have the
+    # same first run by their full keys.
+
+    width = maxSlot + 2
+    sentinel = maxSlot + 1
+    nodeMult = maxNode + 1
+    levelMult = nLevels * nodeMult
+
+    def packed(b, e, single, level, n):
+        return ((b * width + width - 1 - e) * 2 + single) * levelMult + (
+            level * nodeMult + n
+        )
 
-    def otypeRank(n):
-        return otypeLevels[slotType if n < maxSlot + 1 else otype[n - maxSlot - 1]]
-
-    def before(na, nb):
-        if na < maxSlot + 1:
-            a = na
-            sa = {a}
-        else:
-            a = na - maxSlot
-            sa = set(oslots[a - 1])
-        if nb < maxSlot + 1:
-            b = nb
-            sb = {b}
+    info("computing sort keys")
+    slotLevel = typeKey[slotType]
+    keys = [packed(n, n, 1, slotLevel, n) for n in range(1, maxSlot + 1)]
+    gapped = {}
+    for (k, slots) in enumerate(oslots):
+        n = k + maxSlot + 1
+        nSlots = len(slots)
+        if nSlots == 0:
+            keys.append(packed(sentinel, width - 1, 1, typeKey[otype[k]], n))
+            continue
+        b = slots[0]
+        e = slots[-1]
+        if e - b + 1 == nSlots:
+            keys.append(packed(b, e, 1, typeKey[otype[k]], n))
         else:
-            b = nb - maxSlot
-            sb = set(oslots[b - 1])
-        oa = otypeRank(na)
-        ob = otypeRank(nb)
-        if sa == sb:
-            return (
-                (-1 if na < nb else 1 if na > nb else 0)
-                if oa == ob
-                else -1
-                if oa > ob
-                else 1
-            )
-        if sa > sb:
-            return -1
-        if sa < sb:
-            return 1
-        am = min(sa - sb)
-        bm = min(sb - sa)
-        return -1 if am < bm else 1 if bm < am else None
-
-    canonKey = functools.cmp_to_key(before)
+            runs = _runs(slots)
+            keys.append(packed(runs[0], -runs[1], 0, 0, n))
+            gapped[n] = tuple(
+                width - 1 + r if i % 2 else r for (i, r) in enumerate(runs)
+            ) + (sentinel, typeKey[otype[k]], n)
+
     info("sorting nodes")
-    nodes = sorted(range(1, maxNode + 1), key=canonKey)
-    return array("I", nodes)
+    keys.sort()
+    nodes = array("I", (key % nodeMult for key in keys))
+
+    if gapped:
+        info(f"sorting {len(gapped)} nodes with gaps")
+        i = 0
+        nNodes = len(nodes)
+        while i < nNodes:
+            if nodes[i] not in gapped:
+                i += 1
+                continue
+            group = keys[i] // levelMult
+            j = i + 1
+            while j < nNodes and keys[j] // levelMult == group:
+                j += 1
+            if j - i > 1:
+                nodes[i:j] = array("I", sorted(nodes[i:j], key=gapped.__getitem__))
+            i = j
+    return nodes
+
+
+def _runs(slots):
+    """Describes a sorted list of slots as runs of consecutive slots.
+
+    Returns
+    -------
+    list
+        The first and the negative last slot of every run:
+        `[b1, -e1, b2, -e2, ...]`.
+    """
+
+    runs = []
+    b = slots[0]
+    prev = b
+    for s in slots[1:]:
+        if s != prev + 1:
+            runs.extend((b, -prev))
+            b = s
+        prev = s
+    runs.extend((b, -prev))
+    return runs
 
 
 def rank(info, error, otype, order):
@@ -222,8 +274,10 @@ def rank(info, error, otype, order):
 
     (otype, maxSlot, maxNode, slotType) = otype
     info("ranking nodes")
-    nodesRank = dict(((n, i) for (i, n) in enumerate(order)))
-    return array("I", (nodesRank[n] for n in range(1, maxNode + 1)))
+    nodesRank = array("I", bytes(maxNode * array("I").itemsize))
+    for (i, n) in enumerate(order):
+        nodesRank[n - 1] = i
+    return nodesRank
 
 
 def levUp(info, error, otype, oslots, rank):
@@ -249,15 +303,16 @@ def levUp(info, error, otype, oslots, rank):
 
     Returns
     -------
-    tuple
+    RaggedColumn
         The n-th member is an array of the embedder nodes of n.
         Those arrays are sorted in canonical order (`tf.core.nodes`).
 
     Notes
     -----
     !!! hint "Memory efficiency"
-        Many nodes have the same array of embedders.
-        Those embedder arrays will be reused for those nodes.
+        The embedders of all nodes are stored in one flat array,
+        with an array of offsets into it (`tf.core.columns.RaggedColumn`),
+        instead of in millions of small arrays.
 
     Warnings
     --------
@@ -270,46 +325,82 @@ def levUp(info, error, otype, oslots, rank):
 
     (otype, maxSlot, maxNode, slotType) = otype
     oslots = oslots[0]
-    info("making inverse of edge feature oslots")
-    oslotsInv = {}
-    for (k, mList) in enumerate(oslots):
-        for m in mList:
-            oslotsInv.setdefault(m, set()).add(k + 1 + maxSlot)
+
+    # We sweep over the slots, keeping track of the open nodes:
+    # the nodes that have started at or before the current slot and end at
+    # or after it.
+    # The embedders of a slot are the open nodes that contain it;
+    # the embedders of a node are among the open nodes at its first slot:
+    # for a node without gaps it suffices that it ends at or after the last
+    # slot of the embedded node, only for nodes with gaps we have to check
+    # all slots.
+
+    info("collecting nodes by first and last slot")
+    starts = {}
+    ends = set()
+    lastSlot = {}
+    gapped = {}
+    for m in _canonical(rank):
+        if m <= maxSlot:
+            continue
+        slots = oslots[m - maxSlot - 1]
+        nSlots = len(slots)
+        if nSlots == 0:
+            continue
+        b = slots[0]
+        e = slots[-1]
+        starts.setdefault(b, []).append(m)
+        ends.add(e)
+        lastSlot[m] = e
+        if e - b + 1 != nSlots:
+            gapped[m] = set(slots)
+    gappedNodes = gapped.keys()
+
+    # Nodes that start at a slot come after all nodes that start earlier
+    # in the canonical order.
+    # So if we add the nodes that start at a slot in canonical order to the
+    # open nodes, the open nodes stay in canonical order.
+    # The embedders must be in reverse canonical order.
+
     info("listing embedders of all nodes")
     embedders = []
-    for n in range(1, maxSlot + 1):
-        contentEmbedders = oslotsInv[n]
-        embedders.append(
-            tuple(
-                sorted(
-                    [m for m in contentEmbedders if m != n], key=lambda k: -rank[k - 1],
-                )
-            )
+    nodeEmbedders = {}
+    opened = []
+    openedGapped = False
+    slotEmbedders = ()
+    for s in range(1, maxSlot + 1):
+        new = starts.get(s, None)
+        if s - 1 in ends:
+            opened = [m for m in opened if lastSlot[m] >= s]
+        elif new is None and not openedGapped:
+            # the same open nodes as for the previous slot
+            embedders.append(slotEmbedders)
+            continue
+        if new is not None:
+            opened.extend(new)
+        openedGapped = not gappedNodes.isdisjoint(opened)
+        slotEmbedders = (
+            tuple([m for m in opened if m not in gapped or s in gapped[m]][::-1])
+            if openedGapped
+            else tuple(opened[::-1])
         )
-    for n in range(maxSlot + 1, maxNode + 1):
-        mList = oslots[n - maxSlot - 1]
-        if len(mList) == 0:
-            embedders.append(tuple())
-        else:
-            contentEmbedders = functools.reduce(
-                lambda x, y: x & oslotsInv[y], mList[1:], oslotsInv[mList[0]],
-            )
-            embedders.append(
-                tuple(
-                    sorted(
-                        [m for m in contentEmbedders if m != n],
-                        key=lambda k: -rank[k - 1],
-                    )
+        embedders.append(slotEmbedders)
+        if new is not None:
+            for n in new:
+                e = lastSlot[n]
+                slots = oslots[n - maxSlot - 1]
+                nodeEmbedders[n] = tuple(
+                    [
+                        m
+                        for m in opened
+                        if m != n
+                        and lastSlot[m] >= e
+                        and (m not in gapped or gapped[m].issuperset(slots))
+                    ][::-1]
                 )
-            )
-    # reuse embedder tuples, because lots of nodes share embedders
-    seen = {}
-    embeddersx = []
-    for t in embedders:
-        if t not in seen:
-            seen[t] = array("I", t)
-        embeddersx.append(seen[t])
-    return tuple(embeddersx)
+    for n in range(maxSlot + 1, maxNode + 1):
+        embedders.append(nodeEmbedders.get(n, ()))
+    return RaggedColumn.fromSequence(embedders)
 
 
 def levDown(info, error, otype, levUp, rank):
@@ -335,13 +426,13 @@ def levDown(info, error, otype, levUp, rank):
 
     Returns
     -------
-    tuple
+    RaggedColumn
         The *n*-th member is an array of the embedded nodes of *n + maxSlot*.
         Those arrays are sorted in canonical order (`tf.core.nodes`).
 
     !!! hint "Memory efficiency"
         Slot nodes do not have embedded nodes, so they do not have to occupy
-        space in this tuple. Hence the first member are the embedded nodes
+        space in this column. Hence the first member are the embedded nodes
         of node *maxSlot + 1*.
 
     !!! caution "Use with care"
@@ -354,17 +445,13 @@ def levDown(info, error, otype, levUp, rank):
 
     (otype, maxSlot, maxNode, slotType) = otype
     info("inverting embedders")
-    inverse = {}
-    for n in range(maxSlot + 1, maxNode + 1):
-        for m in levUp[n - 1]:
-            inverse.setdefault(m, set()).add(n)
-    info("turning embeddees into list")
-    embeddees = []
-    for n in range(maxSlot + 1, maxNode + 1):
-        embeddees.append(
-            array("I", sorted(inverse.get(n, []), key=lambda m: rank[m - 1]))
-        )
-    return tuple(embeddees)
+    # by walking in canonical order, the embeddees arrive in canonical order
+    embeddees = [[] for n in range(maxSlot + 1, maxNode + 1)]
+    for n in _canonical(rank):
+        if n > maxSlot:
+            for m in levUp[n - 1]:
+                embeddees[m - maxSlot - 1].append(n)
+    return RaggedColumn.fromSequence(embeddees)
 
 
 def boundary(info, error, otype, oslots, rank):
@@ -394,10 +481,10 @@ def boundary(info, error, otype, oslots, rank):
     Returns
     -------
     tuple
-        *   first: tuple of array
+        *   first: RaggedColumn
             The *n*-th member is the array of nodes that start at slot *n*,
             ordered in *reversed* canonical order (`tf.core.nodes`);
-        *   last: tuple of array
+        *   last: RaggedColumn
             The *n*-th member is the array of nodes that end at slot *n*,
             ordered in canonical order;
 
@@ -409,21 +496,133 @@ def boundary(info, error, otype, oslots, rank):
 
     (otype, maxSlot, maxNode, slotType) = otype
     oslots = oslots[0]
-    firstSlotsD = {}
-    lastSlotsD = {}
-    for (k, mList) in enumerate(oslots):
-        firstSlotsD.setdefault(mList[0], []).append(k + 1 + maxSlot)
-        lastSlotsD.setdefault(mList[-1], []).append(k + 1 + maxSlot)
-    firstSlots = []
-    lastSlots = []
-    for n in range(1, maxSlot + 1):
-        firstSlots.append(
-            array("I", sorted(firstSlotsD.get(n, []), key=lambda k: -rank[k - 1]))
-        )
-        lastSlots.append(
-            array("I", sorted(lastSlotsD.get(n, []), key=lambda k: rank[k - 1]))
-        )
-    return (tuple(firstSlots), tuple(lastSlots))
+    # by walking in canonical order, the nodes arrive in canonical order
+    firstSlots = [[] for n in range(maxSlot)]
+    lastSlots = [[] for n in range(maxSlot)]
+    for n in _canonical(rank):
+        if n > maxSlot:
+            mList = oslots[n - maxSlot - 1]
+            if len(mList):
+                firstSlots[mList[0] - 1].append(n)
+                lastSlots[mList[-1] - 1].append(n)
+    for nodes in firstSlots:
+        nodes.reverse()
+    return (
+        RaggedColumn.fromSequence(firstSlots),
+        RaggedColumn.fromSequence(lastSlots),
+    )
+
+
+def stats(info, error, otype, oslots, levUp, levels):
+    """Computes statistics of the node types and the structural relations.
+
+    The search engine uses these statistics to estimate how many nodes are related
+    to a node, see `tf.search.spin.estimateSpreads`.
+
+    Parameters
+    ----------
+    info: function
+        Method to write informational messages to the console.
+    error: function
+        Method to write error messages to the console.
+    otype: iterable
+        The data of the *otype* feature.
+    oslots: iterable
+        The data of the *oslots* feature.
+    levUp: iterable
+        The data of the *levUp* precompute step.
+    levels: tuple
+        The data of the *levels* precompute step.
+
+    Returns
+    -------
+    dict
+        *   `counts`: for each node type, the number of nodes of that type;
+        *   `embed`: for each pair of node types `(A, B)`, the number of pairs
+            of nodes `(n, m)` where `n` has type `A`, `m` has type `B`,
+            and `n` embeds `m`;
+        *   `start`, `end` and `boundary`: likewise, the number of pairs of nodes
+            that start at the same slot, end at the same slot, and both.
+            Here slots start and end at themselves,
+            and nodes are paired with themselves as well.
+    """
+
+    (otype, maxSlot, maxNode, slotType) = otype
+    oslots = oslots[0]
+    ranges = sorted((x[2], x[3], x[0]) for x in levels)
+    counts = {nType: last - first + 1 for (first, last, nType) in ranges}
+
+    info("counting embedders per node type")
+    # the nodes of a type form a range, so do their embedders in levUp;
+    # we sort the embedders chunk by chunk and count them per type by bisection
+    offsets = levUp.offsets
+    embedders = levUp.values
+    chunkSize = 1 << 20
+    embed = collections.Counter()
+    for (first, last, nType) in ranges:
+        b = offsets[first - 1]
+        e = offsets[last]
+        for cb in range(b, e, chunkSize):
+            chunk = sorted(embedders[cb : min(cb + chunkSize, e)])
+            for (eFirst, eLast, eType) in ranges:
+                k = bisect_right(chunk, eLast) - bisect_left(chunk, eFirst)
+                if k:
+                    embed[(eType, nType)] += k
+
+    info("counting nodes with the same boundaries per node type")
+    starts = [(s, slotType) for s in range(1, maxSlot + 1)]
+    ends = list(starts)
+    boundaries = [((s, s), slotType) for s in range(1, maxSlot + 1)]
+    for (nType, slots) in zip(otype, oslots):
+        if len(slots):
+            starts.append((slots[0], nType))
+            ends.append((slots[-1], nType))
+            boundaries.append(((slots[0], slots[-1]), nType))
+
+    return dict(
+        counts=counts,
+        embed=dict(embed),
+        start=_pairs(starts),
+        end=_pairs(ends),
+        boundary=_pairs(boundaries),
+    )
+
+
+def _pairs(keys):
+    """Counts the pairs of nodes with the same key per pair of node types.
+
+    Parameters
+    ----------
+    keys: iterable of tuple
+        For each node its key and its type.
+
+    Returns
+    -------
+    dict
+        Keyed by pairs of node types.
+    """
+
+    perKey = {}
+    for ((key, nType), k) in collections.Counter(keys).items():
+        perKey.setdefault(key, {})[nType] = k
+    # many keys have the same number of nodes of each type
+    profiles = collections.Counter(tuple(sorted(p.items())) for p in perKey.values())
+    pairs = collections.Counter()
+    for (profile, k) in profiles.items():
+        for (tA, cA) in profile:
+            for (tB, cB) in profile:
+                pairs[(tA, tB)] += k * cA * cB
+    return dict(pairs)
+
+
+def _canonical(rank):
+    """All nodes in canonical order, derived from their ranks.
+    """
+
+    nodes = array("I", [0]) * len(rank)
+    for (i, r) in enumerate(rank):
+        nodes[r] = i + 1
+    return nodes
 
 
 def sections(info, error, otype, oslots, otext, levUp, levels, *sFeats):
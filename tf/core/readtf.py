@@ -0,0 +1,206 @@
+"""
+# Parsing the data in `.tf` files
+
+This is the parser that is used when features are compiled from their
+`.tf` files (action `T` in the loading log).
+
+It is a streaming parser: it reads the data in big chunks and splits each chunk
+into lines in one go.
+
+Node features spend most of their lines on the layout of one value per
+line for consecutive nodes, with no node specification at all.
+Chunks in which all lines have that layout are handled without looking at the
+individual lines.
+
+In all cases, the values of node features are collected as strings first,
+and converted afterwards: integers by a single `map(int, ...)`,
+and strings by sharing the objects of equal values.
+
+For a comparison with the previous, line-by-line parser, see the benchmark in
+`test/profiling/readTf.py` in the Text-Fabric repository.
+"""
+
+from .helpers import setFromSpec, valueFromTf
+
+CHUNK_SIZE = 1 << 22
+"""Number of characters that is read in one go."""
+
+
+def readDataTf(fh, firstI, isEdge, edgeValues, isNum):
+    """Reads the data part of a `.tf` file.
+
+    Parameters
+    ----------
+    fh: file handle
+        Opened for reading, positioned after the blank line that ends the metadata.
+    firstI: integer
+        The number of lines that have been read already.
+    isEdge: boolean
+        Whether the data is of an edge feature.
+    edgeValues: boolean
+        Whether the edges have values.
+    isNum: boolean
+        Whether the values are integers.
+
+    Returns
+    -------
+    tuple
+        `(data, errors)` where `data` is the feature data as dictionary,
+        keyed by node, and `errors` is a dictionary keyed by kind of error,
+        with lists of line numbers as values.
+        The values of the data are sets of nodes for edge features without values,
+        and dictionaries from nodes to values for edge features with values.
+    """
+
+    if isEdge:
+        return _readEdges(fh, firstI, edgeValues, isNum)
+    return _readNodes(fh, firstI, isNum)
+
+
+def _readNodes(fh, firstI, isNum):
+    errors = {}
+    i = firstI
+    implicit = 1
+    nodes = []
+    vals = []
+    escapes = False
+
+    for (lines, hasTabs, hasEscapes) in _chunks(fh):
+        escapes = escapes or hasEscapes
+
+        if not hasTabs:
+            # one value per line, for consecutive nodes
+            nLines = len(lines)
+            nodes.extend(range(implicit, implicit + nLines))
+            vals.extend(lines)
+            implicit += nLines
+            i += nLines
+            continue
+
+        for line in lines:
+            i += 1
+            if "\t" not in line:
+                nodes.append(implicit)
+                vals.append(line)
+                implicit += 1
+                continue
+            fields = line.split("\t")
+            if len(fields) > 2:
+                errors.setdefault("wrongFields", []).append(i)
+                continue
+            (spec, val) = fields
+            if spec.isdigit():
+                n = int(spec)
+                nodes.append(n)
+                vals.append(val)
+                implicit = n + 1
+            else:
+                theseNodes = setFromSpec(spec)
+                nodes.extend(theseNodes)
+                vals.extend(val for n in theseNodes)
+                implicit = max(theseNodes) + 1
+
+    if isNum:
+        if "" in vals:
+            # empty values do not count as values
+            pairs = [(n, v) for (n, v) in zip(nodes, vals) if v != ""]
+            nodes = [p[0] for p in pairs]
+            vals = [p[1] for p in pairs]
+        vals = map(int, vals)
+    else:
+        if escapes:
+            vals = [valueFromTf(v) if "\\" in v else v for v in vals]
+        seen = {}
+        vals = map(seen.setdefault, vals, vals)
+
+    return (dict(zip(nodes, vals)), errors)
+
+
+def _readEdges(fh, firstI, edgeValues, isNum):
+    errors = {}
+    i = firstI
+    implicit = 1
+    data = {}
+    normFields = 3 if edgeValues else 2
+
+    for (lines, hasTabs, hasEscapes) in _chunks(fh):
+        for line in lines:
+            i += 1
+            fields = line.split("\t")
+            lFields = len(fields)
+            if lFields > normFields:
+                errors.setdefault("wrongFields", []).append(i)
+                continue
+
+            if lFields == normFields:
+                spec = fields[0]
+                if spec.isdigit():
+                    n = int(spec)
+                    theseNodes = (n,)
+                    nextImplicit = n + 1
+                else:
+                    theseNodes = setFromSpec(spec)
+                    nextImplicit = max(theseNodes) + 1
+                spec2 = fields[1]
+                if spec2 == "":
+                    errors.setdefault("emptyNode2Spec", []).append(i)
+                    continue
+            else:
+                theseNodes = (implicit,)
+                nextImplicit = implicit + 1
+                spec2 = fields[0]
+                if spec2 == "" and (lFields == 1 or not edgeValues):
+                    errors.setdefault("emptyNode2Spec", []).append(i)
+                    continue
+
+            nodes2 = {int(spec2)} if spec2.isdigit() else setFromSpec(spec2)
+            implicit = nextImplicit
+
+            if edgeValues:
+                val = fields[-1] if lFields > 1 else ""
+                value = (
+                    (None if val == "" else int(val))
+                    if isNum
+                    else valueFromTf(val)
+                    if "\\" in val
+                    else val
+                )
+                for n in theseNodes:
+                    dest = data.setdefault(n, {})
+                    for m in nodes2:
+                        dest[m] = value  # even if the value is None
+            elif len(theseNodes) == 1:
+                n = theseNodes[0] if type(theseNodes) is tuple else min(theseNodes)
+                if n in data:
+                    data[n] |= nodes2
+                else:
+                    data[n] = nodes2
+            else:
+                for n in theseNodes:
+                    data.setdefault(n, set()).update(nodes2)
+
+    return (data, errors)
+
+
+def _chunks(fh):
+    """Reads a file in chunks of whole lines.
+
+    Yields
+    ------
+    tuple
+        A list of lines, and whether the lines contain tabs or backslashes.
+        If a line without newline is pending, a chunk may report tabs or
+        backslashes that are not in its lines.
+    """
+
+    rest = ""
+    while True:
+        chunk = fh.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        text = rest + chunk
+        lines = text.split("\n")
+        rest = lines.pop()
+        yield (lines, "\t" in text, "\\" in text)
+    if rest:
+        yield ([rest], "\t" in rest, "\\" in rest)
@@ -0,0 +1,131 @@
+"""
+# Sharing the core data between processes
+
+When several processes work with the same corpus on the same machine,
+each of them normally holds its own copy of the core data:
+`otype`, `oslots` and the precomputed data such as `__rank__`, `__levUp__`,
+`__levDown__` and `__boundary__`.
+
+With `tf.fabric.Fabric.publish` a process that has loaded a corpus copies that
+data into one block of *shared memory*, in the same columnar format as the
+`.tfx` files (see `tf.core.columns`).
+
+Other processes call `tf.fabric.Fabric.attach` with the name of that block,
+before loading features. The next `tf.fabric.Fabric.load` then takes the shared
+data without copying it, and without reading any file for it;
+the loading log reports these features with action `S`.
+All other features are loaded as usual.
+
+The shared data is read-only.
+If the data on disk has changed after it has been published, the changed features
+are loaded from disk as usual, so attaching never gives outdated results.
+
+```
+# in the first process
+TF = Fabric(locations=...)
+api = TF.load("")
+name = TF.publish()
+
+# in other processes
+TF = Fabric(locations=...)
+TF.attach(name)
+api = TF.load("")
+```
+
+The first process should call `tf.fabric.Fabric.unpublish` when the other
+processes no longer need the data; the block is also removed when the
+first process terminates.
+
+!!! caution "Python 3.8"
+    Shared memory needs Python 3.8 or higher.
+"""
+
+from .columns import packColumns, unpackColumns
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+
+    class _AttachedMemory(SharedMemory):
+        def close(self):
+            # the data is used until the process terminates,
+            # and closing it with data in use would fail
+            pass
+
+
+except ImportError:
+    SharedMemory = None
+
+
+def publish(dataObjs, name=None):
+    """Copies the data of features into a new block of shared memory.
+
+    Parameters
+    ----------
+    dataObjs: iterable of `tf.core.data.Data`
+        The features to publish. Features that are not loaded are skipped.
+    name: string, optional `None`
+        The name of the block. If `None`, a unique name will be chosen.
+
+    Returns
+    -------
+    object
+        The `multiprocessing.shared_memory.SharedMemory` object.
+        Its `name` attribute is what other processes need to attach to it.
+    """
+
+    contents = {}
+    for d in dataObjs:
+        if not d.dataLoaded or d.dataError or d.isConfig:
+            continue
+        contents[d.fileName] = dict(
+            data=d.data,
+            index=d.index,
+            dataLoaded=d.dataLoaded,
+            dataHash=d.dataHash,
+            metaData=d.metaData,
+            isEdge=d.isEdge,
+            edgeValues=d.edgeValues,
+            dataType=d.dataType,
+        )
+    packed = packColumns(contents)
+    size = len(packed)
+    # the block may be bigger than requested, so we record the size of the data
+    shm = SharedMemory(name=name, create=True, size=8 + size)
+    shm.buf[0:8] = size.to_bytes(8, "little")
+    shm.buf[8 : 8 + size] = packed
+    return shm
+
+
+def attach(name):
+    """Attaches to a block of shared memory made by `publish`.
+
+    Parameters
+    ----------
+    name: string
+        The name of the block.
+
+    Returns
+    -------
+    tuple
+        The `multiprocessing.shared_memory.SharedMemory` object,
+        which must be kept as long as the data is in use,
+        and a dictionary keyed by feature name with the data and
+        information about the data of each feature.
+    """
+
+    try:
+        shm = _AttachedMemory(name=name, track=False)
+    except TypeError:
+        # before Python 3.13 attaching processes also register the block
+        # for removal when they terminate, which is not what we want
+        shm = _AttachedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+    buf = shm.buf.toreadonly()
+    size = int.from_bytes(buf[0:8], "little")
+    contents = unpackColumns(buf[8 : 8 + size])
+    return (shm, contents)
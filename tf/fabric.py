@@ -20,10 +20,13 @@ It is responsible for feature data loading and saving.
 """
 
 import os
+import json
+import hashlib
 
 import collections
 from .parameters import VERSION, NAME, APIREF, LOCATIONS
 from .core.data import Data, WARP, WARP2_DEFAULT, MEM_MSG
+from .core.fileindex import FileIndex
 from .core.helpers import (
     itemize,
     setDir,
@@ -42,13 +45,18 @@ from .core.prepare import (
     levUp,
     levDown,
     boundary,
+    stats,
     sections,
     structure,
 )
+from .core.parallel import preload, precompute
+from .core import sharedmem
 from .core.computed import Computed
 from .core.nodefeature import NodeFeature
 from .core.edgefeature import EdgeFeature
 from .core.otypefeature import OtypeFeature
+from .core.lazy import LazyFeature
+from .core.budget import MemoryBudget
 from .core.oslotsfeature import OslotsFeature
 from .core.api import (
     Api,
@@ -68,6 +76,7 @@ PRECOMPUTE = (
     (False, "__levUp__", levUp, WARP[0:2] + ("__rank__",)),
     (False, "__levDown__", levDown, (WARP[0], "__levUp__", "__rank__")),
     (False, "__boundary__", boundary, WARP[0:2] + ("__rank__",)),
+    (False, "__stats__", stats, WARP[0:2] + ("__levUp__", "__levels__")),
     (True, "__sections__", sections, WARP + ("__levUp__", "__levels__")),
     (
         True,
@@ -165,6 +174,24 @@ class Fabric(object):
         If `'deep'` is passed, all informational and warning messages are suppressed.
         Errors still pass through.
 
+    contentHash: boolean, optional `False`
+        If `True`, compiled feature data is considered up-to-date as long as
+        the *contents* of its `.tf` files are unchanged, regardless of their
+        modification times.
+        See `tf.core.fileindex`.
+
+    sharedCache: string, optional `None`
+        A directory, possibly read-only, with compiled feature data that
+        can be shared between machines.
+        Only used if `contentHash` is `True`.
+        See `tf.core.fileindex`.
+
+    memoryBudget: integer, optional `None`
+        If given, the maximum number of bytes that the features you load
+        may occupy. When loading exceeds it, the least recently used features
+        are unloaded, and loaded again when they are used.
+        See `tf.core.budget`.
+
     !!! note "otext@ in modules"
         If modules contain features with a name starting with `otext@`, then the format
         definitions in these features will be added to the format definitions in the
@@ -178,9 +205,19 @@ class Fabric(object):
         An object from which you can call up all the of methods of the core API.
     """
 
-    def __init__(self, locations=None, modules=None, silent=False):
+    def __init__(
+        self,
+        locations=None,
+        modules=None,
+        silent=False,
+        contentHash=False,
+        sharedCache=None,
+        memoryBudget=None,
+    ):
 
         self.silent = silent
+        self.contentHash = contentHash
+        self.sharedCache = sharedCache
         tmObj = Timestamp()
         self.tmObj = tmObj
         setSilent = tmObj.setSilent
@@ -230,6 +267,33 @@ Api reference : {APIREF}
             "\n\t".join(f"{lc}/{f}" for f in self.modules) for lc in self.locations
         )
         self.featuresRequested = []
+        self.featuresLazy = set()
+        self.published = None
+        self.attached = []
+        self.coreDigest = None
+        self.budget = None if memoryBudget is None else MemoryBudget(self, memoryBudget)
+        self.loadProfile = []
+        """Measurements of the loading of features and the computing of data.
+
+        There is one dictionary per feature that has been loaded or computed
+        since the last `Fabric.load` without `add=True`, with these keys:
+
+        *   `feature`: the name of the feature or precomputed data;
+        *   `action`: the action, as in the loading log:
+            `T` compiled from `.tf`, `C` computed, `B` or `b` loaded from binary,
+            `M` metadata only, `S` from shared memory (`Fabric.attach`),
+            `X` or `E` failed;
+        *   `good`: whether the action succeeded;
+        *   `parallel`: whether it has been done in parallel (`tf.core.parallel`);
+        *   `time`: wall clock time in seconds;
+        *   `bytes`: the size of the `.tf` file read or the `.tfx` file mapped;
+        *   `decompress`: time spent on decompressing binary data;
+        *   `unpickle`: time spent on unpickling binary data;
+        *   `memory`: increase of the resident memory of the process in bytes,
+            `None` for parallel actions or if it cannot be determined.
+
+        Use `Fabric.dumpLoadProfile` to get it as JSON.
+        """
         self.features = {}
         """Dictionary of all features that TF has found, whether loaded or not.
 
@@ -255,7 +319,7 @@ Api reference : {APIREF}
 
         self._makeIndex()
 
-    def load(self, features, add=False, silent=None):
+    def load(self, features, add=False, silent=None, workers=None, lazy=False):
         """Loads features from disk into RAM memory.
 
         Parameters
@@ -278,6 +342,16 @@ Api reference : {APIREF}
             so that you know what Text-Fabric is doing.
             If `True` is passed, all informational messages will be suppressed.
             This is handy I you want to load data as part of other methods, on-the-fly.
+        workers: integer, optional `None`
+            If you pass a number greater than 1, features will be loaded,
+            and precomputed data will be computed,
+            in parallel, by at most that many threads and processes.
+            The result is the same as when loading sequentially.
+            See `tf.core.parallel`.
+        lazy: boolean, optional `False`
+            If `True`, the requested features will not be loaded until
+            they are used. Only their metadata is read.
+            See `tf.core.lazy`.
 
         Returns
         -------
@@ -301,6 +375,9 @@ Api reference : {APIREF}
             setSilent(silent)
         indent(level=0, reset=True)
         info("loading features ...")
+        if not add:
+            self.loadProfile.clear()
+        self._scanFileIndexes()
         self.sectionsOK = True
         self.structureOK = True
         self.good = True
@@ -312,6 +389,15 @@ Api reference : {APIREF}
                 self.featuresRequested += featuresRequested
             else:
                 self.featuresRequested = featuresRequested
+                self.featuresLazy = set()
+            if lazy:
+                self.featuresLazy |= set(featuresRequested)
+            else:
+                self.featuresLazy -= set(featuresRequested)
+            if workers is not None and workers > 1:
+                self._preload(
+                    list(WARP[0:2]) + ([] if lazy else featuresRequested), workers
+                )
             for fName in list(WARP):
                 self._loadFeature(fName, optional=fName == WARP[2])
         if self.good:
@@ -359,6 +445,8 @@ Api reference : {APIREF}
 
                 self.textFeatures |= set(self.formatFeats)
 
+                if workers is not None and workers > 1:
+                    self._preload(self.textFeatures, workers)
                 for fName in self.textFeatures:
                     self._loadFeature(fName)
 
@@ -367,10 +455,16 @@ Api reference : {APIREF}
                 self.structureOK = False
 
         if self.good:
-            self._precompute()
+            self._precompute(workers=workers)
         if self.good:
             for fName in self.featuresRequested:
-                self._loadFeature(fName)
+                self._loadFeature(
+                    fName,
+                    metaOnly=fName in self.featuresLazy
+                    and fName not in WARP
+                    and fName not in self.textFeatures,
+                )
+        self._saveFileIndexes()
         if not self.good:
             indent(level=0)
             error("Not all features could be loaded/computed")
@@ -388,6 +482,15 @@ Api reference : {APIREF}
             except MemoryError:
                 console(MEM_MSG)
                 result = False
+        if self.good and self.budget is not None:
+            unloaded = self.budget.update(
+                featuresRequested, set(WARP) | self.textFeatures
+            )
+            if unloaded:
+                info(
+                    f"Unloaded {len(unloaded)} features to stay within memory budget: "
+                    + ", ".join(unloaded)
+                )
         if silent is not None:
             setSilent(wasSilent)
         if not add:
@@ -471,7 +574,7 @@ Api reference : {APIREF}
                 )
             )
 
-    def loadAll(self, silent=None):
+    def loadAll(self, silent=None, workers=None, lazy=False):
         """Load all loadable features.
 
         Parameters
@@ -480,12 +583,18 @@ Api reference : {APIREF}
             TF is silent if you specified `silent=True` in a preceding
             `TF=Fabric()` call.
             But if you did not, you can also pass `silent=True` to this call.
+        workers: integer, optional `None`
+            See `tf.fabric.Fabric.load`.
+        lazy: boolean, optional `False`
+            See `tf.fabric.Fabric.load`.
         """
 
-        api = self.load("", silent=silent)
+        api = self.load("", silent=silent, workers=workers)
         allFeatures = self.explore(silent=silent or True, show=True)
         loadableFeatures = allFeatures["nodes"] + allFeatures["edges"]
-        self.load(loadableFeatures, add=True, silent=silent)
+        self.load(
+            loadableFeatures, add=True, silent=silent, workers=workers, lazy=lazy
+        )
         return api
 
     def clearCache(self):
@@ -512,6 +621,126 @@ Api reference : {APIREF}
 
         for (fName, fObj) in self.features.items():
             fObj.cleanDataBin()
+        for fileIndex in self.fileIndexes.values():
+            fileIndex.clear()
+
+    def dumpLoadProfile(self, path=None):
+        """Delivers the measurements of the loading of features as JSON.
+
+        See `Fabric.loadProfile`.
+
+        Parameters
+        ----------
+        path: string, optional `None`
+            If given, the JSON is also written to this file.
+
+        Returns
+        -------
+        string
+            The JSON text.
+        """
+
+        text = json.dumps(self.loadProfile, indent=1)
+        if path is not None:
+            with open(path, "w", encoding="utf8") as fh:
+                fh.write(text)
+        return text
+
+    def publish(self, name=None, features=()):
+        """Publishes the core data of the loaded corpus in shared memory.
+
+        Other processes on the same machine can then use that data
+        without loading it, see `Fabric.attach`.
+
+        Parameters
+        ----------
+        name: string, optional `None`
+            The name of the block of shared memory.
+            If `None`, a unique name is chosen.
+        features: iterable of strings, optional `()`
+            Additional loaded features to publish.
+            By default, only `otype`, `oslots` and the precomputed data are published.
+
+        Returns
+        -------
+        string | None
+            The name of the block of shared memory, or `None` if nothing
+            could be published.
+
+        See Also
+        --------
+        tf.core.sharedmem
+        """
+
+        tmObj = self.tmObj
+        info = tmObj.info
+        error = tmObj.error
+
+        self.unpublish()
+        fNames = list(WARP[0:2]) + [x[0] for x in self.precomputeList] + [
+            fName for fName in features if fName in self.features
+        ]
+        try:
+            shm = sharedmem.publish(self.features[fName] for fName in fNames)
+        except Exception as e:
+            error(f"Cannot publish data in shared memory: {str(e)}")
+            return None
+        self.published = shm
+        info(f"Data published in shared memory {shm.name} ({shm.size} bytes)")
+        return shm.name
+
+    def unpublish(self):
+        """Removes the data that has been published by `Fabric.publish`.
+
+        Processes that have attached to it and loaded it,
+        can continue to use it.
+        """
+
+        shm = self.published
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+            self.published = None
+
+    def attach(self, name):
+        """Attaches to data that another process has published in shared memory.
+
+        Call this before `Fabric.load` or `Fabric.loadAll`.
+        Those will then take the features found in shared memory without loading
+        them, unless they have changed on disk after they have been published.
+
+        Parameters
+        ----------
+        name: string
+            The name returned by `Fabric.publish` in the other process.
+
+        Returns
+        -------
+        boolean
+            Whether the shared data could be attached.
+
+        See Also
+        --------
+        tf.core.sharedmem
+        """
+
+        tmObj = self.tmObj
+        info = tmObj.info
+        error = tmObj.error
+
+        try:
+            (shm, contents) = sharedmem.attach(name)
+        except Exception as e:
+            error(f"Cannot attach to shared memory {name}: {str(e)}")
+            return False
+        for (fName, fInfo) in contents.items():
+            fObj = self.features.get(fName, None)
+            if fObj is not None:
+                fObj.attach(fInfo)
+        # the block must stay open as long as its data is used
+        self.attached.append(shm)
+        info(f"Attached to {len(contents)} features in shared memory {name}")
+        return True
 
     def save(
         self,
@@ -825,7 +1054,7 @@ Api reference : {APIREF}
                 nodeFeatures=nodeFeatures, edgeFeatures=edgeFeatures, metaData=metaData
             )
 
-    def _loadFeature(self, fName, optional=False):
+    def _loadFeature(self, fName, optional=False, metaOnly=False):
         if not self.good:
             return False
 
@@ -840,9 +1069,28 @@ Api reference : {APIREF}
                 self.good = False
         else:
             # if not self.features[fName].load(silent=silent or (fName not in self.featuresRequested)):
-            if not self.features[fName].load(silent=silent):
+            fObj = self.features[fName]
+            if metaOnly and fObj.dataLoaded:
+                return
+            if not fObj.load(metaOnly=metaOnly, silent=silent):
                 self.good = False
 
+    def _preload(self, fNames, workers):
+        features = self.features
+        dataObjs = [features[fName] for fName in fNames if fName in features]
+        dataObjs.extend(
+            features[fName] for (fName, dep2) in self.precomputeList if not dep2
+        )
+        preload(dataObjs, workers)
+
+    def _scanFileIndexes(self):
+        for fileIndex in self.fileIndexes.values():
+            fileIndex.scan()
+
+    def _saveFileIndexes(self):
+        for fileIndex in self.fileIndexes.values():
+            fileIndex.save()
+
     def _makeIndex(self):
         tmObj = self.tmObj
         info = tmObj.info
@@ -850,25 +1098,35 @@ Api reference : {APIREF}
 
         self.features = {}
         self.featuresIgnored = {}
+        self.fileIndexes = {}
         tfFiles = {}
         for loc in self.locations:
             for mod in self.modules:
                 dirF = f"{loc}/{mod}"
                 if not os.path.exists(dirF):
                     continue
-                with os.scandir(dirF) as sd:
-                    files = tuple(
-                        e.name for e in sd if e.is_file() and e.name.endswith(".tf")
+                fileIndex = self.fileIndexes.get(dirF, None)
+                if fileIndex is None:
+                    fileIndex = FileIndex(
+                        dirF,
+                        contentHash=self.contentHash,
+                        sharedCache=self.sharedCache,
                     )
-                for fileF in files:
+                    self.fileIndexes[dirF] = fileIndex
+                for fileF in sorted(fileIndex.tfFiles()):
                     (fName, ext) = os.path.splitext(fileF)
-                    tfFiles.setdefault(fName, []).append(f"{dirF}/{fileF}")
+                    tfFiles.setdefault(fName, []).append((dirF, f"{dirF}/{fileF}"))
         for (fName, featurePaths) in sorted(tfFiles.items()):
-            chosenFPath = featurePaths[-1]
-            for featurePath in sorted(set(featurePaths[0:-1])):
+            (chosenDir, chosenFPath) = featurePaths[-1]
+            for featurePath in sorted(set(x[1] for x in featurePaths[0:-1])):
                 if featurePath != chosenFPath:
                     self.featuresIgnored.setdefault(fName, []).append(featurePath)
-            self.features[fName] = Data(chosenFPath, self.tmObj)
+            self.features[fName] = Data(
+                chosenFPath,
+                self.tmObj,
+                fileIndex=self.fileIndexes[chosenDir],
+                profile=self.loadProfile,
+            )
         self._getWriteLoc()
         info(
             "{} features found and {} ignored".format(
@@ -899,6 +1157,7 @@ Api reference : {APIREF}
                     good = False
             elif fName == WARP[2]:
                 self._loadFeature(fName, optional=True)
+        self._saveFileIndexes()
         if not good:
             return False
         self.warpDir = self.features[WARP[0]].dirName
@@ -925,6 +1184,8 @@ Api reference : {APIREF}
                 self.tmObj,
                 method=method,
                 dependencies=[self.features.get(dep, None) for dep in dependencies],
+                fileIndex=self.features[WARP[0]].fileIndex,
+                profile=self.loadProfile,
             )
             self.precomputeList.append((fName, dep2))
         self.good = good
@@ -950,17 +1211,38 @@ Api reference : {APIREF}
             else f"{writeLoc}/{writeMod}"
         )
 
-    def _precompute(self):
+    def _precompute(self, workers=None):
+        fNames = [
+            fName
+            for (fName, dep2) in self.precomputeList
+            if not dep2 or getattr(self, f'{fName.strip("_")}OK', False)
+        ]
+        if workers is not None and workers > 1:
+            precompute([self.features[fName] for fName in fNames], workers)
         good = True
-        for (fName, dep2) in self.precomputeList:
-            ok = getattr(self, f'{fName.strip("_")}OK', False)
-            if dep2 and not ok:
-                continue
+        for fName in fNames:
             if not self.features[fName].load():
                 good = False
                 break
         self.good = good
 
+    def _addLazy(self, api):
+        for fName in sorted(self.featuresLazy):
+            fObj = self.features.get(fName, None)
+            if (
+                fObj is None
+                or fObj.dataLoaded
+                or fObj.dataError
+                or fObj.isConfig
+                or fObj.method
+            ):
+                continue
+            ap = api.E if fObj.isEdge else api.F
+            if not hasattr(ap, fName):
+                setattr(
+                    ap, fName, LazyFeature(api, fName, fObj.metaData, fObj.isEdge)
+                )
+
     def _makeApi(self):
         if not self.good:
             return None
@@ -972,6 +1254,8 @@ Api reference : {APIREF}
 
         silent = isSilent()
         api = Api(self)
+        if self.budget is not None:
+            self.budget.track(api)
 
         w0info = self.features[WARP[0]]
         w1info = self.features[WARP[1]]
@@ -999,17 +1283,9 @@ Api reference : {APIREF}
                         if fName in WARP:
                             continue
                         elif fObj.isEdge:
-                            setattr(
-                                api.E,
-                                fName,
-                                EdgeFeature(
-                                    api, fObj.metaData, fObj.data, fObj.edgeValues
-                                ),
-                            )
+                            setattr(api.E, fName, self._edgeFeature(api, fObj))
                         else:
-                            setattr(
-                                api.F, fName, NodeFeature(api, fObj.metaData, fObj.data)
-                            )
+                            setattr(api.F, fName, self._nodeFeature(api, fObj))
                     else:
                         if fName in WARP or fName in self.textFeatures:
                             continue
@@ -1020,6 +1296,7 @@ Api reference : {APIREF}
                             if hasattr(api.F, fName):
                                 delattr(api.F, fName)
                         fObj.unload()
+        self._addLazy(api)
         addOtype(api)
         addNodes(api)
         addLocality(api)
@@ -1030,6 +1307,33 @@ Api reference : {APIREF}
         self.api = api
         return api
 
+    def _digest(self):
+        # the indexes of features depend on the canonical order and the node types
+        rankObj = self.features["__rank__"]
+        levelsObj = self.features["__levels__"]
+        key = (rankObj.dataLoaded, levelsObj.dataLoaded)
+        if self.coreDigest is None or self.coreDigest[0] != key:
+            h = hashlib.sha256(rankObj.data)
+            h.update(repr(levelsObj.data).encode("utf8"))
+            self.coreDigest = (key, h.hexdigest())
+        return self.coreDigest[1]
+
+    def _edgeFeature(self, api, fObj):
+        fObj.indexEdges(self.features["__rank__"].data, self._digest())
+        return EdgeFeature(
+            api, fObj.metaData, fObj.data, fObj.edgeValues, index=fObj.index
+        )
+
+    def _nodeFeature(self, api, fObj):
+        rankObj = self.features["__rank__"]
+        levelsObj = self.features["__levels__"]
+        index = (
+            fObj.indexValues(rankObj.data, levelsObj.data, self._digest())
+            if rankObj.dataLoaded and levelsObj.dataLoaded
+            else None
+        )
+        return NodeFeature(api, fObj.metaData, fObj.data, index=index)
+
     def _updateApi(self):
         if not self.good:
             return None
@@ -1048,12 +1352,10 @@ Api reference : {APIREF}
                         if fName in WARP:
                             continue
                         elif fObj.isEdge:
-                            apiFobj = EdgeFeature(
-                                api, fObj.metaData, fObj.data, fObj.edgeValues
-                            )
+                            apiFobj = self._edgeFeature(api, fObj)
                             setattr(api.E, fName, apiFobj)
                         else:
-                            apiFobj = NodeFeature(api, fObj.metaData, fObj.data)
+                            apiFobj = self._nodeFeature(api, fObj)
                             setattr(api.F, fName, apiFobj)
                     else:
                         if fName in WARP or fName in self.textFeatures:
@@ -1065,5 +1367,6 @@ Api reference : {APIREF}
                             if hasattr(api.F, fName):
                                 delattr(api.F, fName)
                         fObj.unload()
+        self._addLazy(api)
         indent(level=0)
         info("All additional features loaded - for details use loadLog()")
@@ -19,11 +19,13 @@ NAME = "Text-Fabric"
 """The name of the game: this program.
 """
 
-PACK_VERSION = "2"
+PACK_VERSION = "4"
 """Data serialization version.
 
 Plain text feature files will be compressed to zipped, pickled datastructures
 that load must faster.
+Large, regular parts of the data are stored as fixed-width columns
+that will be memory mapped when loaded, see `tf.core.columns`.
 
 These methods evolve, sometimes in incompatible ways.
 In those cases we bump this version number.
@@ -64,7 +66,10 @@ App requirement lower than TF API version
 """
 
 GZIP_LEVEL = 2
-"""Compression level when compressing tf files."""
+"""Compression level when compressing tf files.
+
+Only the non-columnar part of the data is compressed.
+"""
 
 PICKLE_PROTOCOL = 4
 """Pickle protocol level when pickling tf files."""
@@ -0,0 +1,146 @@
+"""
+# Sets of nodes
+
+The search engine keeps the candidate nodes of each atom of a search template
+in a *yarn* (see `tf.about.searchdesign`).
+Yarns can have millions of members, and they are intersected, united and
+subtracted many times while the search space is being constrained.
+
+A yarn is a `NodeSet`: the nodes are stored in a sorted array of 4 byte integers,
+instead of in a Python `set`, which takes about ten times as much memory.
+The set operations work on whole arrays at once.
+For membership tests a bitmap is made when it is needed:
+an array of bytes indexed by node, with a `1` for every node in the set.
+
+A `NodeSet` behaves as a read-only Python set: it supports `len`, `in`,
+iteration (in the order of the nodes), `&`, `|`, `-`, and comparisons,
+also with ordinary sets. The operations deliver new node sets.
+
+You can pass node sets to `tf.search.search.Search.search` in the
+`sets` parameter, next to ordinary sets of nodes.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Set
+from itertools import chain, compress, filterfalse, repeat
+
+
+class NodeSet(Set):
+    """A read-only set of nodes, stored as a sorted array.
+
+    Parameters
+    ----------
+    nodes: iterable of int, optional ()
+        The nodes of the set, in any order, duplicates allowed.
+    """
+
+    __slots__ = ("nodes", "mask")
+
+    def __init__(self, nodes=()):
+        tp = type(nodes)
+        if tp is NodeSet:
+            self.nodes = nodes.nodes
+            self.mask = nodes.mask
+            return
+        if tp is range and nodes.step == 1:
+            self.nodes = array("I", nodes)
+        else:
+            self.nodes = array(
+                "I", sorted(nodes if tp in {set, frozenset} else set(nodes))
+            )
+        self.mask = None
+
+    @classmethod
+    def _fromSorted(cls, nodes):
+        # an array of nodes that is already sorted and without duplicates
+        nodeSet = cls.__new__(cls)
+        nodeSet.nodes = nodes if type(nodes) is array else array("I", nodes)
+        nodeSet.mask = None
+        return nodeSet
+
+    @classmethod
+    def _from_iterable(cls, it):
+        # used by the methods inherited from collections.abc.Set
+        return cls(it)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __contains__(self, n):
+        mask = self.mask
+        if mask is None:
+            mask = self.bitmap()
+        return type(n) is int and 0 < n < len(mask) and mask[n] == 1
+
+    def __eq__(self, other):
+        if type(other) is NodeSet:
+            return self.nodes == other.nodes
+        return Set.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"NodeSet({self.nodes.tolist()})"
+
+    def bitmap(self):
+        """The nodes of the set as a bitmap.
+
+        Returns
+        -------
+        bytearray
+            At position `n` there is a `1` if node `n` is in the set,
+            else a `0`. The bitmap extends to the last node of the set,
+            so before looking up node `n` you have to check that `n` is less than
+            its length.
+        """
+
+        mask = self.mask
+        if mask is None:
+            nodes = self.nodes
+            mask = bytearray(nodes[-1] + 1 if nodes else 0)
+            deque(map(mask.__setitem__, nodes, repeat(1)), maxlen=0)
+            self.mask = mask
+        return mask
+
+    def __and__(self, other):
+        nodes = self.nodes
+        if type(other) is NodeSet:
+            if len(other) < len(self):
+                (nodes, other) = (other.nodes, self)
+            mask = other.bitmap()
+            nodes = nodes[0 : bisect_left(nodes, len(mask))]
+            return NodeSet._fromSorted(
+                array("I", compress(nodes, map(mask.__getitem__, nodes)))
+            )
+        if not isinstance(other, (set, frozenset)):
+            other = set(other)
+        return NodeSet._fromSorted(array("I", filter(other.__contains__, nodes)))
+
+    __rand__ = __and__
+
+    def __or__(self, other):
+        if not other:
+            return self
+        return NodeSet(chain(self.nodes, other))
+
+    __ror__ = __or__
+
+    def __sub__(self, other):
+        nodes = self.nodes
+        if type(other) is NodeSet:
+            mask = other.bitmap()
+            cut = bisect_left(nodes, len(mask))
+            result = array("I", filterfalse(mask.__getitem__, nodes[0:cut]))
+            result.extend(nodes[cut:])
+            return NodeSet._fromSorted(result)
+        if not isinstance(other, (set, frozenset)):
+            other = set(other)
+        return NodeSet._fromSorted(array("I", filterfalse(other.__contains__, nodes)))
+
+    def __rsub__(self, other):
+        return NodeSet(n for n in other if n not in self)
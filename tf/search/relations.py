@@ -10,6 +10,7 @@ from itertools import chain
 
 from ..core.data import WARP
 from ..core.helpers import makeIndex
+from .nodeset import NodeSet
 from .syntax import reTp
 
 # LOW-LEVEL NODE RELATIONS SEMANTICS ###
@@ -74,6 +75,9 @@ def basicRelations(searchExe, api):
             if nType in setInfo:
                 return setInfo[nType]
             nodes = sets[nType]
+            if type(nodes) is NodeSet and nodes:
+                # the nodes are sorted, so the first and last node tell it all
+                nodes = (nodes.nodes[0], nodes.nodes[-1])
             allSlots = all(n < maxSlotP for n in nodes)
             if allSlots:
                 setInfo[nType] = True
@@ -90,7 +94,7 @@ def basicRelations(searchExe, api):
 
     def spinEqual(fTp, tTp):
         def doyarns(yF, yT):
-            x = set(yF) & set(yT)
+            x = yF & yT
             return (x, x)
 
         return doyarns
@@ -131,7 +135,7 @@ def basicRelations(searchExe, api):
         if isSlotF and isSlotT:
 
             def doyarns(yF, yT):
-                x = set(yF) & set(yT)
+                x = yF & yT
                 return (x, x)
 
             return doyarns
@@ -219,7 +223,7 @@ def basicRelations(searchExe, api):
         if isSlotF and isSlotT:
 
             def doyarns(yF, yT):
-                x = set(yF) & set(yT)
+                x = yF & yT
                 return (x, x)
 
             return doyarns
@@ -931,16 +935,8 @@ def basicRelations(searchExe, api):
             commonValues = set(indF) if f == g else set(indF) & set(indG)
 
             def doyarns(yF, yT):
-                fNodes = {
-                    n
-                    for n in chain.from_iterable(indF[v] for v in commonValues)
-                    if n in yF
-                }
-                gNodes = {
-                    n
-                    for n in chain.from_iterable(indG[v] for v in commonValues)
-                    if n in yT
-                }
+                fNodes = yF & set(chain.from_iterable(indF[v] for v in commonValues))
+                gNodes = yT & set(chain.from_iterable(indG[v] for v in commonValues))
                 return (fNodes, gNodes)
 
             return doyarns
@@ -1035,16 +1031,8 @@ def basicRelations(searchExe, api):
             commonValues = set(indFR) & set(indGR)
 
             def doyarns(yF, yT):
-                fNodes = {
-                    n
-                    for n in chain.from_iterable(indFR[v] for v in commonValues)
-                    if n in yF
-                }
-                gNodes = {
-                    n
-                    for n in chain.from_iterable(indGR[v] for v in commonValues)
-                    if n in yT
-                }
+                fNodes = yF & set(chain.from_iterable(indFR[v] for v in commonValues))
+                gNodes = yT & set(chain.from_iterable(indGR[v] for v in commonValues))
                 return (fNodes, gNodes)
 
             return doyarns
@@ -1596,6 +1584,7 @@ def add_F_Relations(searchExe, varRels):
                 newAcro = acroFmt.format(f=fF, g=gF)
                 newAcroi = acroiFmt.format(f=fF, g=gF)
                 fArgs = (fF, gF)
+                feats = ((fF, gF), (gF, fF))
             else:
                 ((f, fF), rPat, (t, gF)) = featInfo
                 acroFmt = (
@@ -1608,6 +1597,7 @@ def add_F_Relations(searchExe, varRels):
                 newAcroi = acroiFmt.format(f=fF, r=rPat, g=gF)
                 rRe = re.compile(rPat)
                 fArgs = (fF, rPat, rRe, gF)
+                feats = None
 
             r = relations[j]
             ri = relations[ji]
@@ -1634,6 +1624,10 @@ def add_F_Relations(searchExe, varRels):
                     ),
                 ]
             )
+            if feats is not None and acro in {".f.", ".f=g."}:
+                # the spread of value equality follows from the value histograms
+                relations[lr]["feats"] = feats[0]
+                relations[lr + 1]["feats"] = feats[1]
             searchExe.relationFromName[newAcro] = lr
             searchExe.relationFromName[newAcroi] = lr + 1
             searchExe.nodeMap.setdefault(f, set()).add(fF)
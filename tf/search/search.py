@@ -76,8 +76,22 @@ class Search(object):
                 We estimate the spreads of edges over and over again, in a series
                 of iterations where we reduce yarns.
 
-                An exhaustive computation would be too expensive, so we take
-                a sample of a limited amount of relation computations.
+                For the structural relations (`[[`, `]]`, `==`, `::`, `=:`, `:=`)
+                and for edge features we use statistics of the corpus,
+                which are computed when the corpus is loaded for the first time
+                (`tf.core.prepare.stats`):
+                the number of nodes per node type, the number of related nodes
+                per pair of node types, and the number of edges
+                from and to the nodes of each type.
+                For value equality (`.f.` and `.f=g.`) we use the histograms
+                of the values.
+
+                For the other relations an exhaustive computation would be too
+                expensive, so we take a sample of a limited amount of relation
+                computations, with nodes evenly spread over the yarns.
+
+                Either way, the estimates are the same every time you run a query,
+                so the plan and the time that a query takes do not vary.
 
 
         If you do not pass a parameter, its value will not be changed.
@@ -113,11 +127,14 @@ class Search(object):
             increase the yarnRatio.
 
         tryLimitFrom: integer
-            In order to determine the spreads of the relations, TF takes
-            random samples and extrapolates the results. We grab some nodes
+            In order to determine the spreads of the relations for which there are
+            no statistics of the corpus, TF takes samples and extrapolates the
+            results. We grab some nodes, evenly spread,
             from the set at the *from* side of an edge, and some nodes at the
             *to* side of the same edge, Then we compute in how many cases the relation
             holds. That is a measure for the spread.
+            For value equality, we look up the values of the sampled nodes
+            in the histogram of the values at the other side.
 
             The parameters `tryLimitFrom` and `tryLimitTo` dictate how big these
             samples are. The bigger, the better the estimation of the spread.
@@ -126,7 +143,7 @@ class Search(object):
             If you find that your queries take consistently a tad too much time,
             consider lowering these parameters to 10.
 
-            If you find that the times your queries take varies a lot,
+            If you find that a query with such relations gets a bad plan,
             increase these values to 10000.
         tryLimitTo: integer
             See `tryLimitFrom`
@@ -169,6 +186,7 @@ class Search(object):
         shallow=False,
         silent=True,
         here=True,
+        workers=None,
         _msgCache=False,
     ):
         """Searches for combinations of nodes that together match a search template.
@@ -191,9 +209,17 @@ class Search(object):
 
         sets: dict
             If not `None`, it should be a dictionary of sets, keyed by a names.
+            The sets may be Python sets of nodes or `tf.search.nodeset.NodeSet`s.
 
         limit: integer, optional `None`
             If `limit` is a number, it will fetch only that many results.
+
+        workers: integer, optional `None`
+            If you pass a number greater than 1, and no `limit`,
+            the results are stitched together by that many worker processes,
+            and delivered in the same order as without workers.
+            See `tf.search.searchexe`.
+
         Returns
         -------
         generator | tuple
@@ -227,7 +253,7 @@ class Search(object):
         )
         if here:
             self.exe = exe
-        queryResults = exe.search(limit=limit)
+        queryResults = exe.search(limit=limit, workers=workers)
         if type(_msgCache) is list:
             messages = wrapMessages(_msgCache)
             return (queryResults, messages) if here else (queryResults, messages, exe)
@@ -274,6 +300,7 @@ class Search(object):
 
         sets: dict
             If not `None`, it should be a dictionary of sets, keyed by a names.
+            The sets may be Python sets of nodes or `tf.search.nodeset.NodeSet`s.
             In the search template you can refer to those names to invoke those sets.
 
         silent: boolean, optional `None`
@@ -300,7 +327,7 @@ class Search(object):
             self.exe = exe
         return exe.study(strategy=strategy)
 
-    def fetch(self, limit=None, _msgCache=False):
+    def fetch(self, limit=None, workers=None, _msgCache=False):
         """Retrieves query results, up to a limit.
 
         Must be called after a previous `tf.search.search.Search.search()` or
@@ -311,6 +338,10 @@ class Search(object):
 
         limit: integer, optional `None`
             If `limit` is a number, it will fetch only that many results.
+
+        workers: integer, optional `None`
+            As in `tf.search.search.Search.search`.
+
         Returns
         -------
         generator | tuple
@@ -352,13 +383,13 @@ class Search(object):
             error = TF.error
             error('Cannot fetch if there is no previous "study()"')
         else:
-            queryResults = exe.fetch(limit=limit)
+            queryResults = exe.fetch(limit=limit, workers=workers)
             if type(_msgCache) is list:
                 messages = TF.cache(_asString=True)
                 return (queryResults, messages)
             return queryResults
 
-    def count(self, progress=None, limit=None):
+    def count(self, progress=None, limit=None, workers=None):
         """Counts the results, with progress messages, optionally up to a limit.
 
         Must be called after a previous `tf.search.search.Search.search()` or
@@ -375,6 +406,13 @@ class Search(object):
             Setting `limit` to 0 or a negative value means no limit: all results will be
             counted.
 
+        workers: integer, optional `None`
+            If you pass a number greater than 1, the results are counted
+            by that many worker processes, per chunk of the first yarn of the
+            stitch plan. See `tf.search.searchexe`.
+            Progress is then reported after each chunk that passes a multiple
+            of `progress`, with the count so far.
+
         !!! note "why needed"
             You typically need this in cases where result fetching turns out to
             be (very) slow.
@@ -395,7 +433,7 @@ class Search(object):
             error = self.api.TF.error
             error('Cannot count if there is no previous "study()"')
         else:
-            exe.count(progress=progress, limit=limit)
+            exe.count(progress=progress, limit=limit, workers=workers)
 
     def showPlan(self, details=False):
         """Show the result of the latest study of a template.
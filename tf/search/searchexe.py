@@ -1,7 +1,33 @@
 """
 # Search execution management
+
+!!! note "Parallel stitching"
+    When results are fetched or counted with `workers=` a number greater than 1,
+    the first yarn of the stitch plan is split into chunks,
+    and the results for each chunk are stitched in a worker process.
+    The workers are forked from the current process, so they share the loaded
+    corpus and the prepared search with it, without copying.
+    The results of the chunks are delivered in the order of the chunks,
+    which gives the same order as fetching the results in one process.
+    They are delivered by a generator, and only a few chunks ahead of the
+    one that is being delivered are stitched, so that not all results
+    have to be held in memory.
+
+    This needs the *fork* method of starting processes,
+    which is there on Linux and macOS, but not on Windows,
+    and Python 3.7 or higher.
+    Where it is not possible, you get a warning,
+    and the results are fetched in one process.
+    Forking a process that runs threads may also be unsafe,
+    so do not ask for workers in programs that rely on threads.
 """
 
+import multiprocessing
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
 from .relations import basicRelations
 from .syntax import syntax
 from .semantics import semantics
@@ -12,6 +38,36 @@ from .stitch import setStrategy, stitch
 
 PROGRESS = 100
 LIMIT = 1000
+CHUNKS = 4
+"""The number of chunks per worker when stitching in parallel.
+
+More chunks than workers balance the load, because some chunks
+have many more results than others.
+"""
+AHEAD = 2
+"""The number of chunks per worker that are stitched ahead of delivery.
+"""
+
+# the search that a worker process is stitching, set when the worker starts
+_workerSearch = None
+
+
+def _initWorker(searchExe):
+    global _workerSearch
+
+    _workerSearch = searchExe
+
+
+def _stitchChunk(first, remap, limit):
+    results = _workerSearch.results(remap=remap, first=first)
+    if limit is None:
+        return list(results)
+    i = 0
+    for r in results:
+        i += 1
+        if limit > 0 and i >= limit:
+            break
+    return i
 
 
 class SearchExe(object):
@@ -57,7 +113,7 @@ class SearchExe(object):
 
     # API METHODS ###
 
-    def search(self, limit=None):
+    def search(self, limit=None, workers=None):
         api = self.api
         TF = api.TF
         isSilent = TF.isSilent
@@ -66,7 +122,7 @@ class SearchExe(object):
         setSilent(True)
         self.study()
         setSilent(wasSilent)
-        return self.fetch(limit=limit)
+        return self.fetch(limit=limit, workers=workers)
 
     def study(self, strategy=None):
         api = self.api
@@ -110,13 +166,17 @@ class SearchExe(object):
             info("Iterate over S.fetch() to get the results", tm=False, cache=_msgCache)
             info("See S.showPlan() to interpret the results", tm=False, cache=_msgCache)
 
-    def fetch(self, limit=None):
+    def fetch(self, limit=None, workers=None):
         if not self.good:
             queryResults = set() if self.shallow else []
         elif self.shallow:
             queryResults = self.results
         else:
-            if limit is None:
+            parallel = limit is None and workers is not None and workers > 1
+            chunks = self._stitchParallel(workers) if parallel else None
+            if chunks is not None:
+                queryResults = chain.from_iterable(chunks)
+            elif limit is None:
                 queryResults = self.results()
             else:
                 queryResults = []
@@ -127,7 +187,7 @@ class SearchExe(object):
                 queryResults = tuple(queryResults)
         return queryResults
 
-    def count(self, progress=None, limit=None):
+    def count(self, progress=None, limit=None, workers=None):
         TF = self.api.TF
         info = TF.info
         error = TF.error
@@ -156,20 +216,109 @@ class SearchExe(object):
         )
         indent(level=1, reset=True)
 
+        chunks = (
+            self._stitchParallel(workers, remap=False, limit=limit)
+            if workers is not None and workers > 1
+            else None
+        )
         i = 0
-        j = 0
-        for r in self.results(remap=False):
-            i += 1
-            j += 1
-            if j == progress:
-                j = 0
-                info(i, cache=_msgCache)
-            if limit > 0 and i >= limit:
-                break
+        if chunks is not None:
+            # progress is reported after the chunks that pass a multiple of it
+            for n in chunks:
+                iPrev = i
+                i += n
+                if limit > 0 and i >= limit:
+                    i = limit
+                    break
+                if progress > 0 and i // progress > iPrev // progress:
+                    info(i, cache=_msgCache)
+        else:
+            j = 0
+            for r in self.results(remap=False):
+                i += 1
+                j += 1
+                if j == progress:
+                    j = 0
+                    info(i, cache=_msgCache)
+                if limit > 0 and i >= limit:
+                    break
 
         indent(level=0)
         info(f"Done: {i} results")
 
+    def _stitchParallel(self, workers, remap=True, limit=None):
+        """Stitches the results in worker processes, chunk by chunk.
+
+        Parameters
+        ----------
+        workers: integer
+            The maximum number of worker processes.
+        remap: boolean, optional True
+            Whether the nodes in the results must be in the order of the template.
+        limit: integer, optional None
+            If `None`, the results are delivered.
+            Otherwise they are counted, up to `limit` per chunk if it is positive.
+
+        Returns
+        -------
+        generator | None
+            For each chunk, in order, a list of results or a count.
+            `None` if the results cannot be stitched in parallel.
+        """
+
+        TF = self.api.TF
+        warning = TF.warning
+        _msgCache = self._msgCache
+
+        # fork is asked for explicitly, so it need not be the default start method
+        if sys.version_info < (3, 7):
+            warning(
+                "Parallel search needs Python 3.7 or higher; searching in one process",
+                cache=_msgCache,
+            )
+            return None
+        if "fork" not in multiprocessing.get_all_start_methods():
+            warning(
+                "Parallel search needs to fork processes, which is not possible here;"
+                " searching in one process",
+                cache=_msgCache,
+            )
+            return None
+        nodes = self.firstYarn.nodes
+        if len(nodes) < 2:
+            return None
+        size = -(-len(nodes) // (workers * CHUNKS))
+        chunks = [nodes[i : i + size] for i in range(0, len(nodes), size)]
+        return self._stitchChunks(chunks, workers, remap, limit)
+
+    def _stitchChunks(self, chunks, workers, remap, limit):
+        # the workers are forked when the first chunk is submitted,
+        # they inherit the search, which is not pickled.
+        # We name the fork context in order not to fix the default start method
+        # for the rest of the program
+        workers = min(workers, len(chunks))
+        processes = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_initWorker,
+            initargs=(self,),
+        )
+        chunks = iter(chunks)
+        pending = deque(
+            processes.submit(_stitchChunk, chunk, remap, limit)
+            for chunk in islice(chunks, workers * AHEAD)
+        )
+        try:
+            while pending:
+                result = pending.popleft().result()
+                for chunk in islice(chunks, 1):
+                    pending.append(processes.submit(_stitchChunk, chunk, remap, limit))
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            processes.shutdown()
+
     # SHOWING WITH THE SEARCH GRAPH ###
 
     def showPlan(self, details=False):
@@ -198,5 +347,6 @@ class SearchExe(object):
         self.spreads = {}
         self.spreadsC = {}
         self.uptodate = {}
+        self.spun = {}
         self.results = None
         connectedness(self)
@@ -3,9 +3,10 @@
 """
 
 import types
-from random import randrange
+import collections
 from inspect import signature
 
+from .nodeset import NodeSet
 from .syntax import (
     reTp,
     cleanParent,
@@ -28,9 +29,27 @@ def _spinAtom(searchExe, q):
     sets = searchExe.sets
 
     (otype, features, src, quantifiers) = qnodes[q]
-    featureList = sorted(features.items())
-    yarn = set()
-    nodeSet = sets[otype] if sets is not None and otype in sets else F.otype.s(otype)
+    featureList = []
+    candidates = None
+    for (ft, val) in sorted(features.items()):
+        nodes = _bulkNodes(Fs(ft), val)
+        if nodes is not None:
+            candidates = (
+                set(nodes) if candidates is None else candidates.intersection(nodes)
+            )
+            continue
+        featureList.append((ft, _perValue(val) if isinstance(val, reTp) else val))
+    yarn = []
+    if candidates is None:
+        nodeSet = (
+            sets[otype] if sets is not None and otype in sets else F.otype.s(otype)
+        )
+    elif sets is not None and otype in sets:
+        nodeSet = candidates.intersection(sets[otype])
+    else:
+        interval = F.otype.sInterval(otype)
+        (b, e) = interval if interval else (1, 0)
+        nodeSet = [n for n in candidates if b <= n <= e]
     for n in nodeSet:
         good = True
         for (ft, val) in featureList:
@@ -64,13 +83,54 @@ def _spinAtom(searchExe, q):
                         good = False
                         break
         if good:
-            yarn.add(n)
+            yarn.append(n)
+    yarn = NodeSet(yarn)
     if quantifiers:
         for quantifier in quantifiers:
             yarn = _doQuantifier(searchExe, yarn, src, quantifier)
     searchExe.yarns[q] = yarn
 
 
+def _bulkNodes(fObj, val):
+    # the nodes that satisfy a feature condition, found without visiting
+    # every node of the atom, or None if the condition has to be tested node by node
+    index = getattr(fObj, "index", None)
+    bounds = getattr(val, "bounds", None)
+    if bounds is not None:
+        # numeric limits are looked up in the sorted values of the index,
+        # or else evaluated on the whole column of values at once
+        nodes = None if index is None else index.findRange(*bounds)
+        if nodes is not None:
+            return nodes
+        data = fObj.data
+        return data.inRange(*bounds) if hasattr(data, "inRange") else None
+    if index is None:
+        return None
+    if isinstance(val, reTp):
+        # regular expressions are matched once per distinct value
+        return index.findWhere(val.search)
+    if type(val) is tuple:
+        (ident, vals) = val
+        if ident and type(vals) is frozenset:
+            # equality and alternatives are looked up in the index of the values
+            return index.findSet(vals)
+    return None
+
+
+def _perValue(regex):
+    # a test for regular expressions that remembers its result per value
+    results = {}
+
+    def test(fval):
+        result = results.get(fval, None)
+        if result is None:
+            result = fval is not None and regex.search(fval) is not None
+            results[fval] = result
+        return result
+
+    return test
+
+
 def _doQuantifier(searchExe, yarn, atom, quantifier):
     from .searchexe import SearchExe
 
@@ -186,7 +246,7 @@ def _doQuantifier(searchExe, yarn, atom, quantifier):
             resultYarn = universe - resultsAnotH
     elif quKind == QWITH:
         # compute the atom+alternative for all alternatives and union them
-        resultYarn = set()
+        resultYarn = NodeSet()
         nAlts = len(quTemplates)
         for (i, alt) in enumerate(quTemplates):
             queryAlt = "\n".join((cleanAtom, alt))
@@ -212,8 +272,7 @@ def _doQuantifier(searchExe, yarn, atom, quantifier):
                     tm=False,
                     cache=_msgCache,
                 )
-            altResults = exe.search()
-            altResults &= universe
+            altResults = universe & exe.search()
             nAlt = len(altResults)
             nYarn = len(resultYarn)
             resultYarn |= altResults
@@ -236,6 +295,22 @@ def spinAtoms(searchExe):
         _spinAtom(searchExe, q)
 
 
+STAT_PAIRS = {
+    "[[": ("embed", False),
+    "]]": ("embed", True),
+    "=:": ("start", False),
+    ":=": ("end", False),
+    "::": ("boundary", False),
+    "==": ("boundary", False),
+}
+"""Structural relations whose spread follows from `tf.core.prepare.stats`.
+
+For each relation: the kind of statistic,
+and whether the pairs of node types are counted the other way round.
+The pairs with the same slots are estimated by the pairs with the same boundaries.
+"""
+
+
 def estimateSpreads(searchExe, both=False):
     TRY_LIMIT_F = searchExe.perfParams["tryLimitFrom"]
     TRY_LIMIT_T = searchExe.perfParams["tryLimitTo"]
@@ -261,13 +336,11 @@ def estimateSpreads(searchExe, both=False):
                 # fixed estimates
                 dest[e] = len(yarnT) * s
                 continue
-            yarnF = list(yarnF)
-            yarnT = yarns[tt]
-            yarnFl = len(yarnF)
-            if yarnFl < TRY_LIMIT_F:
-                triesn = yarnF
-            else:
-                triesn = set(yarnF[randrange(yarnFl)] for n in range(TRY_LIMIT_F))
+            spread = _statSpread(searchExe, e, tf, trela, tt)
+            if spread is not None:
+                dest[e] = spread
+                continue
+            triesn = _sample(yarnF, TRY_LIMIT_F)
 
             if len(triesn) == 0:
                 dest[e] = 0
@@ -281,15 +354,8 @@ def estimateSpreads(searchExe, both=False):
                         totalSpread += len(mFromN)
                 else:
                     yarnTl = len(yarnT)
-                    yarnTL = list(yarnT)
+                    triesm = _sample(yarnT, TRY_LIMIT_T)
                     for n in triesn:
-                        triesm = (
-                            yarnT
-                            if yarnTl < TRY_LIMIT_T
-                            else set(
-                                yarnTL[randrange(yarnTl)] for m in range(TRY_LIMIT_T)
-                            )
-                        )
                         if len(triesm) == 0:
                             thisSpread = 0
                         else:
@@ -304,6 +370,161 @@ def estimateSpreads(searchExe, both=False):
     searchExe.spreadsC = spreadsC
 
 
+def _sample(yarn, limit):
+    # nodes evenly spread over the yarn, so that the estimates do not vary
+    nodes = yarn.nodes if type(yarn) is NodeSet else sorted(yarn)
+    n = len(nodes)
+    if n <= limit:
+        return nodes
+    return [nodes[i * n // limit] for i in range(limit)]
+
+
+def _statSpread(searchExe, e, f, rela, t):
+    """Estimates the spread of a relation by the statistics of the corpus.
+
+    For structural relations and edge features, the statistics give
+    how many nodes of the type at the *to* side are related to a node of the type
+    at the *from* side, on average.
+    We assume that the yarn at the *to* side is an arbitrary part of the nodes
+    of its type.
+
+    But if the edge has been spun, every node in one yarn has at least
+    one related node in the other yarn.
+    Then we estimate the number of related pairs in the yarns from both sides,
+    and divide it by the length of the yarn at the *from* side.
+
+    For value equality, we look up the values of the nodes in the yarns,
+    and count them in the value histogram of the other yarn.
+
+    Returns
+    -------
+    float | None
+        `None` if there are no statistics for this relation or these node types.
+    """
+
+    sets = searchExe.sets
+    qnodes = searchExe.qnodes
+    if sets is not None and (qnodes[f][0] in sets or qnodes[t][0] in sets):
+        return None
+    relation = searchExe.relations[rela]
+    if "feats" in relation:
+        return _valueSpread(searchExe, relation["feats"], f, t)
+
+    yarns = searchExe.yarns
+    yarnFl = len(yarns[f])
+    yarnTl = len(yarns[t])
+    fanOut = _fanOut(searchExe, f, rela, t)
+    if fanOut is None:
+        return None
+    (fanOut, nT) = fanOut
+    spread = _partSpread(fanOut, yarnTl / nT, False)
+    if not spread or not searchExe.spun.get(e, False):
+        return spread
+
+    spread = _partSpread(fanOut, yarnTl / nT, True)
+    fanBack = _fanOut(searchExe, t, searchExe.converse[rela], f)
+    if fanBack is None:
+        return spread
+    (fanBack, nF) = fanBack
+    spreadBack = _partSpread(fanBack, yarnFl / nF, True)
+    pairs = min(
+        max(yarnFl * spread, yarnTl * spreadBack),
+        yarnFl * max(fanOut, 1),
+        yarnTl * max(fanBack, 1),
+    )
+    return max(pairs, yarnFl, yarnTl) / yarnFl
+
+
+def _fanOut(searchExe, f, rela, t):
+    # how many nodes of the to-type are related to a node of the from-type,
+    # and the number of nodes of the to-type
+    api = searchExe.api
+    statsObj = getattr(api.C, "stats", None)
+    if statsObj is None:
+        return None
+    stats = statsObj.data
+    counts = stats["counts"]
+    fTp = searchExe.qnodes[f][0]
+    tTp = searchExe.qnodes[t][0]
+    nF = counts.get(fTp, 0)
+    nT = counts.get(tTp, 0)
+    if not nF or not nT:
+        return None
+    relation = searchExe.relations[rela]
+    name = relation.get("name", relation["acro"])
+    edge = searchExe.edgeMap.get(rela, None)
+    if edge is not None:
+        pairs = _edgePairs(api, edge, fTp, tTp)
+    elif name in STAT_PAIRS:
+        (kind, inverse) = STAT_PAIRS[name]
+        pairs = stats[kind].get((tTp, fTp) if inverse else (fTp, tTp), 0)
+    else:
+        return None
+    if pairs is None:
+        return None
+    return (pairs / nF, nT)
+
+
+def _partSpread(fanOut, part, atLeastOne):
+    # the number of related nodes in a part of the nodes of the to-type,
+    # optionally given that there is at least one
+    part = min(part, 1)
+    spread = fanOut * part
+    if spread and atLeastOne:
+        spread /= 1 - (1 - part) ** fanOut
+    return spread
+
+
+def _edgePairs(api, edge, fTp, tTp):
+    # the edges between two node types, assuming that the edges from the nodes
+    # of one type are distributed over the other types like all edges
+    (efName, dir) = edge
+    index = api.Es(efName).index
+    if index is None:
+        return None
+    ranges = {x[0]: (x[2], x[3]) for x in api.C.levels.data}
+    (kindF, kindT) = ("f", "t") if dir == 1 else ("t", "f") if dir == -1 else ("b", "b")
+    total = index.count(kindF, 1, api.F.otype.maxNode)
+    if not total:
+        return 0
+    return index.count(kindF, *ranges[fTp]) * index.count(kindT, *ranges[tTp]) / total
+
+
+def _valueSpread(searchExe, feats, f, t):
+    # the nodes with equal values: the value histogram of the to-yarn,
+    # looked up for the values in the from-yarn
+    api = searchExe.api
+    TRY_LIMIT_F = searchExe.perfParams["tryLimitFrom"]
+    TRY_LIMIT_T = searchExe.perfParams["tryLimitTo"]
+    (fF, gF) = feats
+    fObj = getattr(api.F, fF, None)
+    gObj = getattr(api.F, gF, None)
+    if fObj is None or gObj is None:
+        return None
+    indexG = getattr(gObj, "index", None)
+    if indexG is None:
+        return None
+    yarnF = searchExe.yarns[f]
+    yarnT = searchExe.yarns[t]
+    tTp = searchExe.qnodes[t][0]
+    statsObj = getattr(api.C, "stats", None)
+    nT = None if statsObj is None else statsObj.data["counts"].get(tTp, None)
+    if len(yarnT) == nT:
+        # all nodes of the type: the histogram of the values in the corpus
+        counts = indexG.counts((tTp,))
+    else:
+        triesm = _sample(yarnT, TRY_LIMIT_T)
+        factor = len(yarnT) / len(triesm) if len(triesm) else 0
+        counts = {
+            val: k * factor for (val, k) in collections.Counter(gObj.vs(triesm)).items()
+        }
+    triesn = _sample(yarnF, TRY_LIMIT_F)
+    if not len(triesn):
+        return 0
+    total = sum(counts.get(val, 0) for val in fObj.vs(triesn) if val is not None)
+    return total / len(triesn)
+
+
 def _chooseEdge(searchExe):
     qedges = searchExe.qedges
     yarns = searchExe.yarns
@@ -345,6 +566,8 @@ def _spinEdge(searchExe, e):
         if yarnFl and yarnTl and spreads[e]
         else -YARN_RATIO
     )
+    spun = searchExe.spun
+    spun[e] = False
     if thisYarnRatio < YARN_RATIO:
         return False
     # if spreads[e] * len(yarnF) >= SPIN_LIMIT:
@@ -354,6 +577,7 @@ def _spinEdge(searchExe, e):
     s = relations[rela]["spin"]
     if type(s) is float:
         return False
+    spun[e] = True
 
     # for other basic relations we have an optimized spin function
     # if type(s) is types.FunctionType:
@@ -362,19 +586,21 @@ def _spinEdge(searchExe, e):
     else:
         r = relations[rela]["func"](qnodes[f][0], qnodes[t][0])
         nparams = len(signature(r).parameters)
-        newYarnF = set()
+        newYarnF = []
         newYarnT = set()
 
         if nparams == 1:
+            maskT = yarnT.bitmap()
+            endT = len(maskT)
             for n in yarnF:
                 found = False
                 for m in r(n):
-                    if m not in yarnT:
+                    if m >= endT or not maskT[m]:
                         continue
                     newYarnT.add(m)
                     found = True
                 if found:
-                    newYarnF.add(n)
+                    newYarnF.append(n)
         else:
             for n in yarnF:
                 found = False
@@ -383,7 +609,7 @@ def _spinEdge(searchExe, e):
                         newYarnT.add(m)
                         found = True
                 if found:
-                    newYarnF.add(n)
+                    newYarnF.append(n)
 
     affectedF = len(newYarnF) != len(yarns[f])
     affectedT = len(newYarnT) != len(yarns[t])
@@ -394,8 +620,8 @@ def _spinEdge(searchExe, e):
             continue
         if (affectedF and f in {of, ot}) or (affectedT and t in {of, ot}):
             uptodate[oe] = False
-    searchExe.yarns[f] = newYarnF
-    searchExe.yarns[t] = newYarnT
+    searchExe.yarns[f] = NodeSet(newYarnF)
+    searchExe.yarns[t] = NodeSet(newYarnT)
 
     return affectedF or affectedT
 
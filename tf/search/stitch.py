@@ -583,12 +583,13 @@ def _stitchResults(searchExe):
         # hence we must deliver everything of its yarn
         yarn = yarns[0]
 
-        def deliver(remap=True):
-            for n in yarn:
+        def deliver(remap=True, first=None):
+            for n in yarn if first is None else first:
                 yield (n,)
 
+        searchExe.firstYarn = yarn
         if searchExe.shallow:
-            results = yarn
+            results = set(yarn)
         else:
             results = deliver
         searchExe.results = results
@@ -683,14 +684,24 @@ def _stitchResults(searchExe):
 
     yarnsPermuted = [yarns[q] for q in qPermuted]
 
+    # bitmaps of the yarns, to test whether a node is in a yarn;
+    # the first yarn is only walked through
+    masksPermuted = [
+        None if i == 0 else yarn.bitmap() for (i, yarn) in enumerate(yarnsPermuted)
+    ]
+
+    searchExe.firstYarn = yarnsPermuted[0]
     shallow = searchExe.shallow
 
-    def deliver(remap=True):
+    def deliver(remap=True, first=None):
+        # first: if given, only the results whose first node is in it are delivered,
+        # see tf.search.searchexe.SearchExe.fetch with workers
         stitch = [None for q in range(len(qPermuted))]
         lStitch = len(stitch)
         qs = tuple(range(lStitch))
         edgesC = edgesCompiled
         yarnsP = yarnsPermuted
+        masksP = masksPermuted
 
         def stitchOn(e):
             if e >= len(edgesC):
@@ -703,7 +714,7 @@ def _stitchResults(searchExe):
             yarnT = yarnsP[t]
             if e == 0 and stitch[f] is None:
                 # this cannot happen for a multi-edge
-                yarnF = yarnsP[f]
+                yarnF = yarnsP[f] if first is None else first
                 for sN in yarnF:
                     stitch[f] = sN
                     for s in stitchOn(e):
@@ -752,8 +763,9 @@ def _stitchResults(searchExe):
             else:
                 sN = stitch[f]
                 if nparams == 1:
+                    maskT = masksP[t]
                     for m in r(sN) or ():
-                        if m in yarnT:
+                        if m < len(maskT) and maskT[m]:
                             stitch[t] = m
                             for s in stitchOn(e + 1):
                                 yield s
@@ -775,6 +787,7 @@ def _stitchResults(searchExe):
         stitch = [None for q in range(tupleSize)]
         edgesC = edgesCompiled
         yarnsP = yarnsPermuted
+        masksP = masksPermuted
         resultQ = qPermutedPos[0]
         resultQmax = max(qPermutedPos[q] for q in range(shallowTupleSize))
         resultSet = set()
@@ -855,8 +868,9 @@ def _stitchResults(searchExe):
             else:
                 sN = stitch[f]
                 if nparams == 1:
+                    maskT = masksP[t]
                     for m in r(sN):
-                        if m in yarnT:
+                        if m < len(maskT) and maskT[m]:
                             stitch[t] = m
                             for s in stitchOn(e + 1):
                                 yield s
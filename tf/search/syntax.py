@@ -655,8 +655,19 @@ def deContext(quantifier, parentName):
 
 def _makeLimit(n, isLower):
     if isLower:
-        return lambda x: x is not None and x > n
-    return lambda x: x is not None and x < n
+
+        def limit(x):
+            return x is not None and x > n
+
+        limit.bounds = (n, None)
+    else:
+
+        def limit(x):
+            return x is not None and x < n
+
+        limit.bounds = (None, n)
+    # the bounds let the search engine scan the values of a feature in bulk
+    return limit
 
 
 def _esc(x):